@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from config import create_chrome_driver
+from constants import SCRAPE_LISTINGS_BASE_DEBUGGING_PORT
+from scraper import PadmapperScraper
+from selenium.webdriver.chrome.webdriver import WebDriver
+
+#################################### High Level Comments ###################################
+# Measures per-page bytes and load time of listing pages with the full and the lean chrome profile
+# Bytes are the transfer sizes the Resource Timing API reports for the document and every subresource it loaded
+# Load time is the time from starting the navigation until the summary table is present, i.e. when the scraper can read the page
+# Cross-origin resources without Timing-Allow-Origin report a transfer size of 0, so bytes are a lower bound for both profiles
+# Needs CHROMEDRIVER_PATH in .env and network access to the site
+# Usage: python benchmarks/bench_chrome_profile.py [--pages N] [listing url ...]
+# Without urls, the first N listing urls of listings.txt are used
+
+listings_filepath = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'listings.txt')
+
+def get_default_listing_urls(page_count: int) -> list:
+    with open(listings_filepath) as listings_file:
+        listing_urls = [line.strip() for line in listings_file if line.strip().startswith('http') and 'Extracted' not in line]
+    return listing_urls[:page_count]
+
+PAGE_BYTES_SCRIPT = """
+const entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+return [entries.reduce((total, entry) => total + (entry.transferSize || 0), 0), entries.length];
+"""
+
+def measure_page(web_driver: WebDriver, padmapper_scraper: PadmapperScraper, url: str) -> tuple:
+    start = time.perf_counter()
+    padmapper_scraper.get_rental_listing_data(web_driver, url)
+    load_time = time.perf_counter() - start
+    page_bytes, resource_count = web_driver.execute_script(PAGE_BYTES_SCRIPT)
+    return page_bytes, resource_count, load_time
+
+def main(listing_urls: list):
+    print(f"{'Profile':<10}{'Url':<60}{'KB':>10}{'Requests':>10}{'Load (s)':>10}")
+    for profile, lean in [('full', False), ('lean', True)]:
+        web_driver = create_chrome_driver(debugging_port=SCRAPE_LISTINGS_BASE_DEBUGGING_PORT, lean=lean)
+        padmapper_scraper = PadmapperScraper()
+        totals = [0, 0, 0.0]
+        try:
+            for url in listing_urls:
+                page_bytes, resource_count, load_time = measure_page(web_driver, padmapper_scraper, url)
+                totals = [totals[0] + page_bytes, totals[1] + resource_count, totals[2] + load_time]
+                print(f"{profile:<10}{url[-58:]:<60}{page_bytes / 1024:>10.0f}{resource_count:>10}{load_time:>10.2f}")
+        finally:
+            web_driver.quit()
+        count = len(listing_urls)
+        print(f"{profile:<10}{'mean per page':<60}{totals[0] / count / 1024:>10.0f}{totals[1] / count:>10.1f}{totals[2] / count:>10.2f}")
+
+if __name__ == '__main__':
+    arguments = sys.argv[1:]
+    page_count = 10
+    if '--pages' in arguments:
+        page_count = int(arguments.pop(arguments.index('--pages') + 1))
+        arguments.remove('--pages')
+    main(arguments or get_default_listing_urls(page_count))
@@ -0,0 +1,73 @@
+import os
+import sys
+import glob
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from functions import (
+    parse_bed_value, parse_bath_value, parse_sqft_value, parse_price_value, parse_pets_value,
+    parse_bed_column, parse_bath_column, parse_sqft_column, parse_price_column, parse_pets_column
+)
+from constants import TableHeaders
+
+#################################### High Level Comments ###################################
+# Benchmarks the row by row parse_* functions against the vectorized parse_*_column functions
+# Runs over every historical raw file in data/raw_data and checks both produce the same values
+#   (the column parsers always return NaN for a missing value, where apply may give None or an int64 column)
+# Usage: python benchmarks/bench_cleaning.py [--repeat N]
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+raw_data_dir = os.path.join(os.path.dirname(current_dir), 'data', 'raw_data')
+
+def parse_row_by_row(df: pd.DataFrame) -> list:
+    price_parsed = df[TableHeaders.PRICE.value].apply(parse_price_value)
+    return [
+        df[TableHeaders.BED.value].apply(parse_bed_value),
+        df[TableHeaders.BATH.value].apply(parse_bath_value),
+        df[TableHeaders.SQFT.value].apply(parse_sqft_value),
+        price_parsed.apply(lambda x: x[0]),
+        price_parsed.apply(lambda x: x[1]),
+        price_parsed.apply(lambda x: x[2]),
+        df[TableHeaders.PETS.value].apply(parse_pets_value),
+    ]
+
+def parse_vectorized(df: pd.DataFrame) -> list:
+    min_price, max_price, avg_price = parse_price_column(df[TableHeaders.PRICE.value])
+    return [
+        parse_bed_column(df[TableHeaders.BED.value]),
+        parse_bath_column(df[TableHeaders.BATH.value]),
+        parse_sqft_column(df[TableHeaders.SQFT.value]),
+        min_price,
+        max_price,
+        avg_price,
+        parse_pets_column(df[TableHeaders.PETS.value]),
+    ]
+
+def time_parser(parser, df: pd.DataFrame, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parser(df)
+    return (time.perf_counter() - start) / repeat
+
+def main(repeat: int = 5):
+    raw_filepaths = sorted(glob.glob(os.path.join(raw_data_dir, '*.xlsx')))
+    raw_dfs = [pd.read_excel(raw_filepath) for raw_filepath in raw_filepaths]
+
+    # Backfills parse many months at once, so also time every month stacked together
+    labelled_dfs = list(zip([os.path.basename(raw_filepath) for raw_filepath in raw_filepaths], raw_dfs))
+    labelled_dfs.append(('all months', pd.concat(raw_dfs, ignore_index=True)))
+
+    print(f"{'File':<36}{'Rows':>8}{'Row by row (ms)':>18}{'Vectorized (ms)':>18}{'Speedup':>10}")
+    for label, raw_df in labelled_dfs:
+        for expected, actual in zip(parse_row_by_row(raw_df), parse_vectorized(raw_df)):
+            pd.testing.assert_series_equal(actual, expected.astype('float64'), check_dtype=False)
+
+        row_by_row_time = time_parser(parse_row_by_row, raw_df, repeat)
+        vectorized_time = time_parser(parse_vectorized, raw_df, repeat)
+        speedup = row_by_row_time / vectorized_time if vectorized_time else float('nan')
+        print(f"{label:<36}{len(raw_df):>8}{row_by_row_time * 1000:>18.1f}{vectorized_time * 1000:>18.1f}{speedup:>9.1f}x")
+
+if __name__ == '__main__':
+    main(repeat=int(sys.argv[sys.argv.index('--repeat') + 1]) if '--repeat' in sys.argv else 5)
@@ -0,0 +1,84 @@
+import os
+import sys
+import glob
+import time
+import pandas as pd
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from stub_site import StubSite
+from scraper import DataExtractor
+from functions import get_cleaned_data
+from constants import TableHeaders
+
+#################################### High Level Comments ###################################
+# Micro-benchmarks of the two CPU bound stages, no browser or network needed
+#   DataExtractor - parse + extract of stub listing pages (server rendered ones) with the lxml and html.parser backends,
+#                   checking both backends extract identical units
+#   get_cleaned_data - every historical raw file in data/raw_data with listing urls, and every month stacked together
+# Usage: python benchmarks/bench_extraction.py [--pages N] [--repeat N]
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+raw_data_dir = os.path.join(os.path.dirname(current_dir), 'data', 'raw_data')
+
+PARSER_BACKENDS = ['lxml', 'html.parser']
+
+def get_stub_pages(page_count: int) -> list:
+    # Even building ids are rendered with their units expanded, like the pages the http fast path parses
+    stub_site = StubSite('http://127.0.0.1:8765', listings_per_city=page_count)
+    pages = []
+    for city in stub_site.cities:
+        for listable in stub_site.listables(city, 0, page_count):
+            path = urlparse(listable['url']).path
+            if int(path.split('/')[2][1:]) % 2 == 0:
+                pages.append((listable['url'], stub_site.listing_page(path)))
+    return pages[:page_count]
+
+def extract_pages(pages: list, parser_backend: str) -> list:
+    units = []
+    for url, page in pages:
+        soup = DataExtractor.parse_html(page, parser_backend)
+        units.append(DataExtractor.extract_listing_units(soup, False, url))
+    return units
+
+def time_call(function, repeat: int, *args) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(*args)
+    return (time.perf_counter() - start) / repeat
+
+def bench_data_extractor(page_count: int, repeat: int):
+    pages = get_stub_pages(page_count)
+    expected_units = extract_pages(pages, PARSER_BACKENDS[0])
+    unit_count = sum(len(units) for units in expected_units)
+
+    print(f"{'Parser backend':<20}{'Pages':>8}{'Units':>8}{'Per page (ms)':>16}{'Pages/s':>10}")
+    for parser_backend in PARSER_BACKENDS:
+        assert extract_pages(pages, parser_backend) == expected_units, f"{parser_backend} extracted different units"
+        elapsed = time_call(extract_pages, repeat, pages, parser_backend)
+        print(f"{parser_backend:<20}{len(pages):>8}{unit_count:>8}{elapsed / len(pages) * 1000:>16.2f}{len(pages) / elapsed:>10.0f}")
+
+def bench_cleaning(repeat: int):
+    raw_filepaths = sorted(glob.glob(os.path.join(raw_data_dir, '*.xlsx')))
+    labelled_dfs = [(os.path.basename(raw_filepath), pd.read_excel(raw_filepath)) for raw_filepath in raw_filepaths]
+    # Exports from before listing urls were scraped can not be cleaned
+    labelled_dfs = [(label, raw_df) for label, raw_df in labelled_dfs if TableHeaders.URL.value in raw_df.columns]
+    raw_dfs = [raw_df for _, raw_df in labelled_dfs]
+    labelled_dfs.append(('all months', pd.concat(raw_dfs, ignore_index=True)))
+
+    print(f"\n{'File':<36}{'Rows':>8}{'get_cleaned_data (ms)':>24}")
+    for label, raw_df in labelled_dfs:
+        # get_cleaned_data modifies the frame in place, so each run gets its own copy
+        elapsed = time_call(lambda: get_cleaned_data(raw_df.copy()), repeat)
+        print(f"{label:<36}{len(raw_df):>8}{elapsed * 1000:>24.1f}")
+
+def main(page_count: int = 200, repeat: int = 3):
+    bench_data_extractor(page_count, repeat)
+    bench_cleaning(repeat)
+
+if __name__ == '__main__':
+    main(
+        page_count=int(sys.argv[sys.argv.index('--pages') + 1]) if '--pages' in sys.argv else 200,
+        repeat=int(sys.argv[sys.argv.index('--repeat') + 1]) if '--repeat' in sys.argv else 3,
+    )
@@ -0,0 +1,160 @@
+import os
+import sys
+import time
+import tempfile
+import argparse
+import threading
+import statistics
+import psutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from stub_site import serve
+from config import create_chrome_driver, create_http_session
+from constants import FETCH_URLS_DEBUGGING_PORT, SCRAPE_LISTINGS_BASE_DEBUGGING_PORT
+from functions import extract_raw_data
+from rate_limiter import RateLimiter
+from scraper import PadmapperScraper, extract_listing_units
+
+#################################### High Level Comments ###################################
+# Benchmarks the real PadmapperScraper and extract_raw_data against the local stub site (see stub_site.py)
+# Stages are timed on their own first, then the whole pipeline end to end:
+#   discovery  - landing page to listing urls, through the search API capture and through scroll harvesting
+#   fetch      - one listing page over HTTP and in the browser (including floorplan expansion)
+#   parse      - extract_listing_units on the fetched pages
+#   pipeline   - extract_raw_data over every stub city, reported as listing pages per minute
+# Peak RSS covers this process and every child (chromedriver, chrome, parse processes), sampled every PEAK_RSS_INTERVAL
+# The rate limiter is relaxed so the numbers measure the scraper, not the politeness limits of the live site
+# Needs CHROMEDRIVER_PATH in .env, no network access
+# Usage: python benchmarks/bench_scraper.py [--listings 100] [--latency-ms 50] [--workers 2] [--sample 20] [--recorded <raw xlsx>]
+
+PEAK_RSS_INTERVAL = 0.2
+
+class PeakRssSampler():
+    """
+    Samples the resident memory of this process and all of its children on a background thread.
+
+    Attributes:
+        peak_mb (float): Highest total resident memory seen, in megabytes.
+    """
+    def __init__(self):
+        self.peak_mb = 0.0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+    def _sample(self):
+        process = psutil.Process()
+        while not self._stopped.is_set():
+            rss = 0
+            for tree_process in [process] + process.children(recursive=True):
+                try:
+                    rss += tree_process.memory_info().rss
+                except psutil.Error:
+                    # Child exited between listing and sampling
+                    pass
+            self.peak_mb = max(self.peak_mb, rss / (1024 * 1024))
+            self._stopped.wait(PEAK_RSS_INTERVAL)
+
+def relaxed_rate_limiter() -> RateLimiter:
+    return RateLimiter(initial_rate=1000, max_rate=1000, burst_size=100)
+
+def summarize(label: str, durations: list):
+    if not durations:
+        print(f"{label:<32}{'-':>8}")
+        return
+    ordered = sorted(durations)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    print(f"{label:<32}{len(durations):>8}{statistics.mean(durations) * 1000:>12.1f}{statistics.median(durations) * 1000:>12.1f}{p95 * 1000:>12.1f}")
+
+def bench_discovery(landing_page_urls: list) -> tuple:
+    durations = {'discovery (search api)': [], 'discovery (scroll harvest)': []}
+    listing_urls = []
+    for use_network_capture, label in [(True, 'discovery (search api)'), (False, 'discovery (scroll harvest)')]:
+        for landing_page_url in landing_page_urls:
+            web_driver = create_chrome_driver(debugging_port=FETCH_URLS_DEBUGGING_PORT, capture_network=use_network_capture, lean=True)
+            padmapper_scraper = PadmapperScraper(rate_limiter=relaxed_rate_limiter())
+            try:
+                start = time.perf_counter()
+                padmapper_scraper.fetch_rental_listing_urls(web_driver, landing_page_url, use_network_capture=use_network_capture)
+                durations[label].append(time.perf_counter() - start)
+            finally:
+                web_driver.quit()
+            print(f"{label}: {len(padmapper_scraper.urls)} listings on {landing_page_url}")
+            if use_network_capture:
+                listing_urls += padmapper_scraper.urls
+    return durations, listing_urls
+
+def bench_fetch_and_parse(listing_urls: list) -> dict:
+    durations = {'fetch (http)': [], 'fetch (browser)': [], 'parse': []}
+    padmapper_scraper = PadmapperScraper(rate_limiter=relaxed_rate_limiter())
+    http_session = create_http_session(base_url='')
+    web_driver = create_chrome_driver(debugging_port=SCRAPE_LISTINGS_BASE_DEBUGGING_PORT, lean=True)
+    pages = []
+    try:
+        for url in listing_urls:
+            start = time.perf_counter()
+            page_content = padmapper_scraper.get_rental_listing_page_http(http_session, url)
+            durations['fetch (http)'].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            listing_page = padmapper_scraper.get_rental_listing_page(web_driver, url)
+            durations['fetch (browser)'].append(time.perf_counter() - start)
+            if listing_page:
+                pages.append((url, listing_page))
+    finally:
+        web_driver.quit()
+        http_session.close()
+
+    for url, (page_content, is_single_unit) in pages:
+        start = time.perf_counter()
+        extract_listing_units(page_content, is_single_unit, url)
+        durations['parse'].append(time.perf_counter() - start)
+    return durations
+
+def bench_pipeline(landing_page_urls: list, num_workers: int) -> tuple:
+    with tempfile.TemporaryDirectory() as output_dir:
+        # Fresh journal, fingerprint cache and page archive so every listing is visited
+        filepath = os.path.join(output_dir, 'raw_data', 'bench_raw_listings.xlsx')
+        os.makedirs(os.path.dirname(filepath))
+        start = time.perf_counter()
+        raw_df = extract_raw_data(filepath, landing_page_urls, num_workers=num_workers, rate_limiter=relaxed_rate_limiter())
+        elapsed = time.perf_counter() - start
+    return raw_df, elapsed
+
+def main(listings_per_city: int, latency_ms: float, num_workers: int, sample_size: int, recorded_run: str = None):
+    server, stub_site = serve(0, listings_per_city, latency_ms, recorded_run=recorded_run)
+    landing_page_urls = stub_site.landing_page_urls()
+    try:
+        with PeakRssSampler() as rss_sampler:
+            discovery_durations, listing_urls = bench_discovery(landing_page_urls)
+            fetch_durations = bench_fetch_and_parse(listing_urls[:sample_size])
+            raw_df, pipeline_time = bench_pipeline(landing_page_urls, num_workers)
+    finally:
+        server.shutdown()
+
+    listing_count = raw_df['Url'].nunique() if len(raw_df) else 0
+    print(f"\n{'Stage':<32}{'Count':>8}{'Mean (ms)':>12}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+    for label, durations in {**discovery_durations, **fetch_durations}.items():
+        summarize(label, durations)
+    print(f"\nPipeline: {listing_count} listings, {len(raw_df)} units in {pipeline_time:.1f} s with {num_workers} workers")
+    print(f"Pages/min: {listing_count / pipeline_time * 60 if pipeline_time else 0:.1f}")
+    print(f"Peak RSS (process tree): {rss_sampler.peak_mb:.0f} MB")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the scraper against a local stub Padmapper site.')
+    parser.add_argument('--listings', type=int, default=100, help='Synthetic listings per city')
+    parser.add_argument('--latency-ms', type=float, default=50, help='Delay the stub site adds to every response')
+    parser.add_argument('--workers', type=int, default=2, help='Scrape workers used by extract_raw_data')
+    parser.add_argument('--sample', type=int, default=20, help='Listings timed one by one in the fetch and parse stages')
+    parser.add_argument('--recorded', default=None, help='Raw data Excel file whose archived pages are served instead of synthetic ones')
+    args = parser.parse_args()
+
+    main(args.listings, args.latency_ms, args.workers, args.sample, args.recorded)
@@ -0,0 +1,377 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from urllib.parse import urlparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+#################################### High Level Comments ###################################
+# Local stand-in for Padmapper so the scraper can be benchmarked without touching the live site
+# Serves the pages the scraper reads, using the class names DataExtractor and PadmapperScraper look for:
+#   /apartments/<city>       landing page with the tile view button and an infinitely scrolling, virtualized tile list
+#   /api/listables           search API the landing page pages through (POST {"city", "offset", "limit"})
+#   /buildings/p<id>/<slug>  listing page with a summary table, amenities, place meta tags and floorplan panels
+# Even building ids render their units server side (http fast path), odd ids only render them when a panel is clicked
+# Buildings are synthetic and deterministic for a seed, or recorded pages read back from a page archive run
+# Usage: python benchmarks/stub_site.py [--port 8765] [--listings 200] [--latency-ms 50] [--recorded data/raw_data/06-2024_raw_listings.xlsx]
+
+CITIES = {
+    'toronto-on': ('Toronto', 43.65, -79.38),
+    'vancouver-bc': ('Vancouver', 49.28, -123.12),
+    'montreal-qc': ('Montreal', 45.50, -73.57),
+}
+NEIGHBOURHOODS = ['Downtown', 'Midtown', 'West End', 'East End', 'Waterfront', 'Uptown']
+STREETS = ['King St', 'Queen St', 'Bay St', 'Main St', 'Front St', 'College St', 'Davie St', 'Water St']
+UNIT_AMENITIES = ['Balcony', 'In Unit Laundry', 'Air Conditioning', 'High Ceilings', 'Furnished', 'Hardwood Floor', 'Dishwasher']
+BUILDING_AMENITIES = ['Controlled Access', 'Fitness Center', 'Swimming Pool', 'Roof Deck', 'Storage', 'Residents Lounge', 'Outdoor Space', 'Concierge']
+FLOORPLAN_NAMES = ['Studio', '1 Bedroom', '2 Bedrooms', '3 Bedrooms']
+API_PAGE_SIZE = 40
+VISIBLE_TILES = 60
+TILE_HEIGHT_PX = 120
+
+LANDING_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Apartments for rent in {city_name}</title>
+<style>.tile {{ height: {tile_height}px; }}</style></head>
+<body>
+<button aria-label="Tile View" class="list_gridOptionIconContainer_x1">Tiles</button>
+<div id="spacer" style="height: 0px"></div>
+<div id="list"></div>
+<div id="footer" style="height: 400px"></div>
+<script>
+const city = {city_json};
+const list = document.getElementById('list');
+const spacer = document.getElementById('spacer');
+let offset = 0, loading = false, done = false;
+function renderTile(listable) {{
+    const tile = document.createElement('div');
+    tile.className = 'tile ListItemTile_container_x1';
+    const floorplans = listable.floorplan_count > 1 ? listable.floorplan_count + ' Floorplans' : '1 Floorplan';
+    tile.innerHTML = '<div class="ListItemTile_price_x1">$' + listable.min_price.toLocaleString('en-US') + ' - $' + listable.max_price.toLocaleString('en-US') + '</div>'
+        + '<div class="ListItemTile_bedBath_x1">' + floorplans + '</div>'
+        + '<a class="ListItemTile_address_x1" href="' + listable.url + '">' + listable.address + '</a>';
+    list.appendChild(tile);
+}}
+function loadMore() {{
+    if (loading || done) {{ return; }}
+    loading = true;
+    fetch('/api/listables', {{method: 'POST', headers: {{'Content-Type': 'application/json'}}, body: JSON.stringify({{city: city, offset: offset, limit: {page_size}}})}})
+        .then(response => response.json())
+        .then(page => {{
+            page.listables.forEach(renderTile);
+            offset += page.listables.length;
+            done = page.listables.length === 0;
+            // Virtualized list: tiles scrolled far out of view are removed and replaced by spacer height
+            while (list.children.length > {visible_tiles}) {{
+                list.removeChild(list.firstElementChild);
+                spacer.style.height = (parseInt(spacer.style.height) + {tile_height}) + 'px';
+            }}
+            loading = false;
+        }});
+}}
+window.addEventListener('scroll', () => {{
+    if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 800) {{ loadMore(); }}
+}});
+loadMore();
+</script>
+</body></html>
+"""
+
+LISTING_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{street} - Apartments for rent</title>
+<meta name="place:location:latitude" content="{lat}">
+<meta name="place:location:longitude" content="{lon}">
+<meta name="place:locality" content="{city_name}">
+</head>
+<body>
+<h1 class="FullDetail_street_x1">{street}, {city_name}</h1>
+<div><span class="FullDetail_cityStateDivider_x1">|</span><a class="FullDetail_cityStateLink_x1" href="#">{neighbourhood}</a></div>
+<div class="SummaryTable_summaryTable_x1"><ul>
+<li><h3>Price</h3><div>{price_range}</div></li>
+<li><h3>Bedrooms</h3><div>{bed_range}</div></li>
+<li><h3>Bathrooms</h3><div>1 Bath</div></li>
+<li><h3>Square Feet</h3><div>{sqft_range}</div></li>
+<li><h3>Address</h3><div>{street}, {city_name}</div></li>
+<li><h3>Dogs / Cats</h3><div>{pets}</div></li>
+</ul></div>
+<div><div class="Amenities_header_x1">Apartment Amenities</div>{unit_amenities}</div>
+<div><div class="Amenities_header_x1">Building Amenities</div>{building_amenities}</div>
+{floorplans}
+<script>
+const units = {units_json};
+document.querySelectorAll("div[class*='Floorplan_floorplanPanel']").forEach(panel => {{
+    panel.addEventListener('click', () => {{
+        const container = panel.parentElement;
+        if (container.querySelector("div[class*='Floorplan_floorplanDetailContainer_']")) {{ return; }}
+        // Expanding a panel renders its units a moment later, like the live site
+        setTimeout(() => {{ container.insertAdjacentHTML('beforeend', units[panel.dataset.floorplan]); }}, 50);
+    }});
+}});
+</script>
+</body></html>
+"""
+
+def render_unit(unit: dict) -> str:
+    return (
+        '<div class="Floorplan_floorplanDetailContainer_x1">'
+        f'<div class="Floorplan_floorplanTitle_x1">{unit["title"]}</div>'
+        f'<div class="Floorplan_floorplanPrice_x1">${unit["price"]:,}</div>'
+        f'<div class="Floorplan_sqft_x1"><span>{unit["sqft"]} ft²</span></div>'
+        f'<div class="Floorplan_bath_x1"><span>{unit["bath"]}</span></div>'
+        '</div>'
+    )
+
+class StubSite():
+    """
+    Synthetic (or recorded) Padmapper landing and listing pages.
+
+    Attributes:
+        base_url (str): Root url the pages link to e.g. http://127.0.0.1:8765.
+        listings_per_city (int): Number of listings on each city's landing page.
+        seed (int): Seed making the synthetic buildings deterministic.
+        recorded_pages (dict): Listing path -> (archived page, city slug), empty for a synthetic site.
+        cities (List[str]): City slugs with a landing page.
+    """
+    def __init__(self, base_url: str, listings_per_city: int = 200, seed: int = 0, recorded_run: str = None):
+        self.base_url = base_url
+        self.listings_per_city = listings_per_city
+        self.seed = seed
+        self.recorded_pages = {}
+        if recorded_run:
+            self._load_recorded_pages(recorded_run)
+        self.cities = sorted({city for _, city in self.recorded_pages.values()}) if self.recorded_pages else list(CITIES)
+
+    def landing_page_urls(self) -> list:
+        return [f"{self.base_url}/apartments/{city}" for city in self.cities]
+
+    def landing_page(self, city: str) -> str:
+        return LANDING_PAGE_TEMPLATE.format(
+            city_name=CITIES[city][0] if city in CITIES else city, city_json=json.dumps(city), page_size=API_PAGE_SIZE,
+            visible_tiles=VISIBLE_TILES, tile_height=TILE_HEIGHT_PX
+        )
+
+    def listables(self, city: str, offset: int, limit: int) -> list:
+        """
+        Returns a page of search API results for a city.
+
+        Args:
+            city (str): City slug e.g. toronto-on.
+            offset (int): Position of the first listing.
+            limit (int): Maximum number of listings.
+
+        Returns:
+            List[dict]: Listables with the url, floorplan count, price range and coordinates.
+        """
+        page_slice = slice(offset, offset + max(0, min(limit, API_PAGE_SIZE)))
+        if self.recorded_pages:
+            # Recorded listings were visited when they were archived, so every tile claims enough floorplans to be visited again
+            recorded_paths = [path for path, (_, page_city) in self.recorded_pages.items() if page_city == city][page_slice]
+            return [
+                {'url': f"{self.base_url}{path}", 'address': path.split('/')[-1], 'floorplan_count': 2, 'min_price': 0, 'max_price': 0, 'lat': None, 'lng': None}
+                for path in recorded_paths
+            ]
+
+        building_ids = self._building_ids(city)[page_slice]
+        listables = []
+        for building_id in building_ids:
+            building = self.building(city, building_id)
+            prices = [unit['price'] for floorplan in building['floorplans'] for unit in floorplan['units']]
+            listables.append({
+                'url': building['url'],
+                'address': building['street'],
+                'floorplan_count': len(building['floorplans']),
+                'min_price': min(prices),
+                'max_price': max(prices),
+                'lat': building['lat'],
+                'lng': building['lon'],
+            })
+        return listables
+
+    def building(self, city: str, building_id: int) -> dict:
+        """
+        Generates a building deterministically from the seed and its id.
+
+        Args:
+            city (str): City slug the building belongs to.
+            building_id (int): Building id, the p<id> part of its url.
+
+        Returns:
+            dict: The building's street, location, amenities and floorplans with their units.
+        """
+        building_random = random.Random(self.seed * 1000003 + building_id)
+        city_name, city_lat, city_lon = CITIES[city]
+        street = f"{building_random.randint(1, 999)} {building_random.choice(STREETS)}"
+        floorplans = []
+        # Mostly multi floorplan buildings, with a few single floorplan ones the scraper skips
+        for floorplan_name in FLOORPLAN_NAMES[:building_random.choice([1, 2, 2, 3, 3, 4])]:
+            base_price = 1500 + 600 * FLOORPLAN_NAMES.index(floorplan_name)
+            floorplans.append({
+                'name': floorplan_name,
+                'units': [
+                    {
+                        'title': f"Unit {building_random.randint(100, 2999)}",
+                        'price': base_price + building_random.randrange(0, 800, 25),
+                        'sqft': 400 + 250 * FLOORPLAN_NAMES.index(floorplan_name) + building_random.randrange(0, 200, 10),
+                        'bath': building_random.choice(['1 Bath', '1 Bath', '2 Baths', '1 Bath, 1 Half Bath']),
+                    }
+                    for _ in range(building_random.randint(1, 4))
+                ],
+            })
+        return {
+            'url': f"{self.base_url}/buildings/p{building_id}/apartments-at-{street.lower().replace(' ', '-')}-{city}",
+            'street': street,
+            'city_name': city_name,
+            'neighbourhood': building_random.choice(NEIGHBOURHOODS),
+            'lat': round(city_lat + building_random.uniform(-0.05, 0.05), 6),
+            'lon': round(city_lon + building_random.uniform(-0.05, 0.05), 6),
+            'pets': building_random.choice(['Dogs and Cats Allowed', 'Cats Allowed', 'No Pets']),
+            'unit_amenities': building_random.sample(UNIT_AMENITIES, building_random.randint(0, 4)),
+            'building_amenities': building_random.sample(BUILDING_AMENITIES, building_random.randint(0, 5)),
+            'floorplans': floorplans,
+        }
+
+    def listing_page(self, path: str):
+        """
+        Renders the listing page for a /buildings/ path.
+
+        Args:
+            path (str): Request path e.g. /buildings/p12/apartments-at-1-main-st-toronto-on.
+
+        Returns:
+            str | bytes | None: The page, None if the path is not a listing of this site.
+        """
+        if path in self.recorded_pages:
+            return self.recorded_pages[path][0]
+        try:
+            building_id = int(path.split('/')[2][1:])
+            city = next(city for city in CITIES if path.endswith(city))
+        except (IndexError, ValueError, StopIteration):
+            return None
+        building = self.building(city, building_id)
+        prices = [unit['price'] for floorplan in building['floorplans'] for unit in floorplan['units']]
+        sqfts = [unit['sqft'] for floorplan in building['floorplans'] for unit in floorplan['units']]
+
+        # Even ids render every unit server side, odd ids render them when their panel is clicked
+        expanded = building_id % 2 == 0
+        floorplans_html = ''.join(
+            '<div class="Floorplan_floorplansContainer_x1">'
+            f'<div class="Floorplan_title_x1">{floorplan["name"]}</div>'
+            f'<div class="Floorplan_floorplanPanel_x1" data-floorplan="{position}">{len(floorplan["units"])} units</div>'
+            + (''.join(render_unit(unit) for unit in floorplan['units']) if expanded else '')
+            + '</div>'
+            for position, floorplan in enumerate(building['floorplans'])
+        )
+        return LISTING_PAGE_TEMPLATE.format(
+            street=building['street'],
+            city_name=building['city_name'],
+            lat=building['lat'],
+            lon=building['lon'],
+            neighbourhood=building['neighbourhood'],
+            price_range=f"${min(prices):,}—${max(prices):,}",
+            bed_range=f"{building['floorplans'][0]['name']} - {building['floorplans'][-1]['name']}",
+            sqft_range=f"{min(sqfts)} - {max(sqfts)} ft²",
+            pets=building['pets'],
+            unit_amenities=''.join(f'<div class="Amenities_text_x1">{amenity}</div>' for amenity in building['unit_amenities']),
+            building_amenities=''.join(f'<div class="Amenities_text_x1">{amenity}</div>' for amenity in building['building_amenities']),
+            floorplans=floorplans_html,
+            units_json=json.dumps([''.join(render_unit(unit) for unit in floorplan['units']) for floorplan in building['floorplans']]),
+        )
+
+    def _building_ids(self, city: str) -> list:
+        city_offset = list(CITIES).index(city) * 100000
+        return list(range(city_offset + 1, city_offset + self.listings_per_city + 1))
+
+    def _load_recorded_pages(self, recorded_run: str):
+        # Recorded listing pages are read back from the page archive run of a raw data file
+        from page_archive import PageArchive, get_archive_path, get_run_name
+        page_archive = PageArchive(get_archive_path(recorded_run), get_run_name(recorded_run))
+        for entry in page_archive.read_index():
+            self.recorded_pages[urlparse(entry['url']).path] = (page_archive.read_page(entry), f"city-{entry['city_index']}")
+
+class StubSiteHandler(BaseHTTPRequestHandler):
+    # Set on the handler class by serve()
+    stub_site: StubSite = None
+    latency: float = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        path = urlparse(self.path).path
+        if path.startswith('/apartments/') and path.split('/')[2] in self.stub_site.cities:
+            self._respond(200, 'text/html; charset=utf-8', self.stub_site.landing_page(path.split('/')[2]))
+        elif path.startswith('/buildings/'):
+            page = self.stub_site.listing_page(path)
+            if page is None:
+                self._respond(404, 'text/plain', 'Not found')
+            else:
+                self._respond(200, 'text/html; charset=utf-8', page)
+        else:
+            self._respond(404, 'text/plain', 'Not found')
+
+    def do_POST(self):
+        time.sleep(self.latency)
+        if urlparse(self.path).path != '/api/listables':
+            self._respond(404, 'text/plain', 'Not found')
+            return
+        try:
+            request_body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            if request_body['city'] not in self.stub_site.cities:
+                raise KeyError(request_body['city'])
+            listables = self.stub_site.listables(request_body['city'], int(request_body.get('offset', 0)), int(request_body.get('limit', API_PAGE_SIZE)))
+        except (ValueError, KeyError):
+            self._respond(400, 'text/plain', 'Bad request')
+            return
+        self._respond(200, 'application/json', json.dumps({'listables': listables}))
+
+    def log_message(self, format, *args):
+        # Keep benchmark output readable
+        pass
+
+    def _respond(self, status: int, content_type: str, body):
+        body = body.encode('utf-8') if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def serve(port: int = 0, listings_per_city: int = 200, latency_ms: float = 0, seed: int = 0, recorded_run: str = None) -> tuple:
+    """
+    Starts the stub site on a background thread.
+
+    Args:
+        port (int): Port to listen on, 0 picks a free port.
+        listings_per_city (int): Number of synthetic listings per city.
+        latency_ms (float): Delay added to every response, in milliseconds.
+        seed (int): Seed of the synthetic buildings.
+        recorded_run (str): Raw data Excel file whose archived pages are served instead of synthetic buildings.
+
+    Returns:
+        tuple: The running server and the StubSite it serves.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubSiteHandler)
+    server.daemon_threads = True
+    stub_site = StubSite(f"http://127.0.0.1:{server.server_address[1]}", listings_per_city, seed, recorded_run)
+    StubSiteHandler.stub_site = stub_site
+    StubSiteHandler.latency = latency_ms / 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stub_site
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve a local stub Padmapper site.')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--listings', type=int, default=200, help='Synthetic listings per city')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Delay added to every response')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--recorded', default=None, help='Raw data Excel file whose archived pages are served')
+    args = parser.parse_args()
+
+    server, stub_site = serve(args.port, args.listings, args.latency_ms, args.seed, args.recorded)
+    print("Serving landing pages:\n" + "\n".join(stub_site.landing_page_urls()))
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
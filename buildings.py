@@ -0,0 +1,284 @@
+import os
+import re
+import json
+import argparse
+import unicodedata
+import pandas as pd
+from datetime import datetime
+from functools import lru_cache
+
+from constants import TableHeaders
+
+#################################### High Level Comments ###################################
+# Stable building ids, so the same building can be matched across months, url changes and cities without fuzzy joins
+# Building names are unreliable (titles are truncated at the first punctuation, renamed, or just the street address),
+#   so a building is identified by its normalized address and its coordinates
+# The address key keeps the street line, city and province, and drops the postal code (Padmapper often shows "R3T None")
+#   e.g. "1555 Boul René-Lévesque O, Montréal, QC H3G 0G9" -> "1555 blvd rene levesque w|montreal|qc"
+#   street types and directions are abbreviated, accents / punctuation / unit prefixes are removed
+# normalize_address is memoized, a month repeats the same few thousand addresses across its units
+# An address key that was never seen is matched against buildings within one geocell (GEOCELL_DECIMALS of a degree)
+#   sharing its street number, so a reformatted address keeps its building's id; the new key is then added as an alias
+# Addresses that cannot be parsed fall back to a geocell key
+# The index is a JSON file next to the history partitions, written atomically (see history.py)
+#   building id -> canonical key, name, address, city, coordinates, first / last month seen
+#   address key -> building id, geocell -> building ids
+# Usage: python buildings.py --history-dir data/history Toronto  (lists the ids and addresses of a city's buildings)
+
+BUILDING_ID_COLUMN = 'Building Id'
+BUILDING_INDEX_FILENAME = '_buildings.json'
+BUILDING_ID_PREFIX = 'B'
+GEOCELL_DECIMALS = 4
+ADDRESS_CACHE_SIZE = 65536
+
+STREET_ABBREVIATIONS = {
+    'street': 'st', 'saint': 'st', 'ste': 'st', 'avenue': 'ave', 'av': 'ave', 'road': 'rd', 'drive': 'dr',
+    'boulevard': 'blvd', 'boul': 'blvd', 'bd': 'blvd', 'crescent': 'cres', 'cr': 'cres', 'court': 'crt', 'ct': 'crt',
+    'place': 'pl', 'terrace': 'terr', 'ter': 'terr', 'lane': 'ln', 'highway': 'hwy', 'parkway': 'pkwy',
+    'square': 'sq', 'circle': 'cir', 'trail': 'trl', 'gate': 'gt', 'gardens': 'gdns', 'heights': 'hts',
+    'point': 'pt', 'chemin': 'ch', 'montee': 'mtee',
+}
+
+DIRECTION_ABBREVIATIONS = {
+    'north': 'n', 'nord': 'n', 'south': 's', 'sud': 's', 'east': 'e', 'est': 'e', 'west': 'w', 'ouest': 'w', 'o': 'w',
+    'northwest': 'nw', 'northeast': 'ne', 'southwest': 'sw', 'southeast': 'se',
+}
+
+# e.g. "Unit 5, ", "#1203 - ", "Apt 4 "
+UNIT_PREFIX_PATTERN = re.compile(r'^(?:(?:unit|apt|suite)\s*\w+|#\s*\w+)\s*[-,]?\s*')
+# e.g. "1203-25 Main St" -> "25 Main St", not "2393-2395 Pembina Hwy"
+UNIT_NUMBER_PATTERN = re.compile(r'^(\d+[a-z]?)-(\d+[a-z]?)\s+(?=\D)')
+PROVINCE_PATTERN = re.compile(r'^[a-z]{2}\b')
+MISSING_ADDRESSES = {'', 'none', 'nan'}
+
+def get_building_index_path(history_path: str) -> str:
+    return os.path.join(history_path, BUILDING_INDEX_FILENAME)
+
+def _fold(text: str) -> str:
+    # Lowercase, strip accents and replace punctuation with spaces
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
+    return ' '.join(re.sub(r"[^\w#/\- ]+", ' ', text).replace('_', ' ').split())
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def normalize_street(street: str) -> str:
+    """
+    Normalizes the street line of an address.
+
+    Args:
+        street (str): e.g. "#1203 - 1555 Boul René-Lévesque O".
+
+    Returns:
+        str: e.g. "1555 blvd rene levesque w", empty if the street line has no text.
+    """
+    street = UNIT_PREFIX_PATTERN.sub('', _fold(street))
+    unit_number_match = UNIT_NUMBER_PATTERN.match(street)
+    if unit_number_match and int(re.sub(r'\D', '', unit_number_match.group(1))) > int(re.sub(r'\D', '', unit_number_match.group(2))):
+        # A unit number before the street number is larger than it, a number range (2393-2395) is not
+        street = street[len(unit_number_match.group(1)) + 1:]
+    tokens = street.replace('/', '-').replace('-', ' - ').split()
+
+    normalized_tokens = []
+    for index, token in enumerate(tokens):
+        if token == '-':
+            # Keeps number ranges together (2393-2395), drops hyphens inside names (rene-levesque)
+            if normalized_tokens and normalized_tokens[-1].isdigit() and index + 1 < len(tokens) and tokens[index + 1].isdigit():
+                normalized_tokens[-1] += '-'
+            continue
+        token = STREET_ABBREVIATIONS.get(token, token)
+        # A direction is only abbreviated after the street name, "East Mall" and "Rue Est" keep their names
+        if index >= 2:
+            token = DIRECTION_ABBREVIATIONS.get(token, token)
+        if normalized_tokens and normalized_tokens[-1].endswith('-'):
+            normalized_tokens[-1] += token
+        else:
+            normalized_tokens.append(token)
+    return ' '.join(normalized_tokens)
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def normalize_address(address: str) -> str:
+    """
+    Normalizes a listing address into a key shared by every spelling of it.
+
+    Args:
+        address (str): e.g. "1555 Boul René-Lévesque O, Montréal, QC H3G 0G9".
+
+    Returns:
+        str: e.g. "1555 blvd rene levesque w|montreal|qc", empty if the address has no street line.
+    """
+    parts = [part.strip() for part in str(address).split(',')]
+    # A unit prefix followed by a comma ("Unit 5, 15 Carlton St") normalizes to nothing, the street line is the next part
+    while len(parts) > 1 and not normalize_street(parts[0]):
+        parts = parts[1:]
+    street = normalize_street(parts[0])
+    if street in MISSING_ADDRESSES or not any(character.isalpha() for character in street):
+        return ''
+    city = _fold(parts[1]) if len(parts) > 1 else ''
+    province_match = PROVINCE_PATTERN.match(_fold(parts[2])) if len(parts) > 2 else None
+    return '|'.join([street, city, province_match.group(0) if province_match else ''])
+
+def get_geocell(latitude, longitude) -> tuple:
+    """
+    Rounds coordinates to the geocell they fall in.
+
+    Args:
+        latitude: Latitude as a float or string.
+        longitude: Longitude as a float or string.
+
+    Returns:
+        tuple or None: (latitude, longitude) rounded to GEOCELL_DECIMALS, None if either is missing.
+    """
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None
+    if pd.isna(latitude) or pd.isna(longitude):
+        return None
+    return (round(latitude, GEOCELL_DECIMALS), round(longitude, GEOCELL_DECIMALS))
+
+class BuildingIndex():
+    """
+    Persistent mapping of normalized addresses and geocells to building ids.
+
+    Attributes:
+        filepath (str): Path of the JSON index file.
+        buildings (dict): Building id -> {'key', 'name', 'address', 'city', 'latitude', 'longitude', 'first_seen', 'last_seen'}.
+        keys (dict): Address key -> building id, every spelling seen so far.
+        geocells (dict): Geocell string -> building ids located in it.
+    """
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.buildings = {}
+        self.keys = {}
+        self.geocells = {}
+
+        if os.path.exists(self.filepath):
+            with open(self.filepath, 'r', encoding='utf-8') as file:
+                index = json.load(file)
+            self.buildings, self.keys, self.geocells = index['buildings'], index['keys'], index['geocells']
+
+    def get_building_id(self, address: str, latitude=None, longitude=None, name: str = None, city: str = None, month: str = None) -> str:
+        """
+        Returns the id of the building at an address, registering a new building if none matches.
+
+        Args:
+            address (str): Listing address.
+            latitude: Listing latitude.
+            longitude: Listing longitude.
+            name (str): Building name, stored for new buildings.
+            city (str): City of the listing, stored for new buildings.
+            month (str): Month (YYYY-MM) the building was seen in, defaults to the current month.
+
+        Returns:
+            str: The building id, None if the listing has neither a usable address nor coordinates.
+        """
+        month = month or datetime.now().strftime('%Y-%m')
+        address_key = normalize_address(address) if isinstance(address, str) else ''
+        geocell = get_geocell(latitude, longitude)
+        if not address_key:
+            if geocell is None:
+                return None
+            address_key = f"geo:{geocell[0]:.{GEOCELL_DECIMALS}f},{geocell[1]:.{GEOCELL_DECIMALS}f}"
+
+        building_id = self.keys.get(address_key) or self._match_nearby(address_key, geocell)
+        if building_id is None:
+            building_id = f"{BUILDING_ID_PREFIX}{len(self.buildings) + 1:07d}"
+            self.buildings[building_id] = {
+                'key': address_key,
+                'name': None if pd.isna(name) else name,
+                'address': address,
+                'city': None if pd.isna(city) else city,
+                'latitude': geocell[0] if geocell else None,
+                'longitude': geocell[1] if geocell else None,
+                'first_seen': month,
+                'last_seen': month,
+            }
+            if geocell:
+                self.geocells.setdefault(self._geocell_key(geocell), []).append(building_id)
+
+        # Later lookups of this spelling are a single dictionary hit
+        self.keys[address_key] = building_id
+        building = self.buildings[building_id]
+        building['first_seen'] = min(building['first_seen'], month)
+        building['last_seen'] = max(building['last_seen'], month)
+        return building_id
+
+    def assign_building_ids(self, df: pd.DataFrame, months: pd.Series = None) -> pd.Series:
+        """
+        Looks up the building id of every row, once per distinct address and coordinates.
+
+        Args:
+            df (pd.DataFrame): Raw or cleaned listings with Address, Latitude, Longitude, Building and City columns.
+            months (pd.Series): Month (YYYY-MM) of each row, defaults to the current month.
+
+        Returns:
+            pd.Series: Building id of each row, aligned with df.
+        """
+        lookup_columns = [TableHeaders.ADDRESS.value, TableHeaders.LAT.value, TableHeaders.LON.value, TableHeaders.BUILDING.value, TableHeaders.CITY.value]
+        lookup_df = df.reindex(columns=lookup_columns).astype(object).where(df.reindex(columns=lookup_columns).notna(), None)
+        lookup_df['month'] = months if months is not None else datetime.now().strftime('%Y-%m')
+
+        building_ids = {}
+        for address, latitude, longitude, name, city, month in lookup_df.drop_duplicates().itertuples(index=False):
+            building_ids[(address, latitude, longitude, name, city, month)] = self.get_building_id(address, latitude, longitude, name, city, month)
+        return pd.Series([building_ids[tuple(row)] for row in lookup_df.itertuples(index=False)], index=df.index, dtype=object)
+
+    def find(self, address: str = None, latitude=None, longitude=None) -> str:
+        """
+        Looks up a building id without registering anything.
+
+        Args:
+            address (str): Listing address.
+            latitude: Listing latitude.
+            longitude: Listing longitude.
+
+        Returns:
+            str: The building id, None if no building matches.
+        """
+        address_key = normalize_address(address) if isinstance(address, str) else ''
+        return self.keys.get(address_key) or self._match_nearby(address_key, get_geocell(latitude, longitude))
+
+    def save(self):
+        # Write to a temporary file first so a crash never leaves a truncated index behind
+        os.makedirs(os.path.dirname(os.path.abspath(self.filepath)), exist_ok=True)
+        with open(f"{self.filepath}.tmp", 'w', encoding='utf-8') as file:
+            json.dump({'buildings': self.buildings, 'keys': self.keys, 'geocells': self.geocells}, file)
+        os.replace(f"{self.filepath}.tmp", self.filepath)
+
+    def _match_nearby(self, address_key: str, geocell: tuple) -> str:
+        """
+        Finds a building in the geocell or its neighbours with the same street number, e.g. a reformatted address.
+
+        Args:
+            address_key (str): Normalized address of the listing.
+            geocell (tuple): Rounded coordinates of the listing.
+
+        Returns:
+            str: The building id, None if no building matches.
+        """
+        if geocell is None:
+            return None
+        street_number = address_key.split(' ')[0] if not address_key.startswith('geo:') else None
+        step = 10 ** -GEOCELL_DECIMALS
+        for latitude_offset in (0, -step, step):
+            for longitude_offset in (0, -step, step):
+                neighbour = (round(geocell[0] + latitude_offset, GEOCELL_DECIMALS), round(geocell[1] + longitude_offset, GEOCELL_DECIMALS))
+                for building_id in self.geocells.get(self._geocell_key(neighbour), []):
+                    building_key = self.buildings[building_id]['key']
+                    # A listing without a usable address matches any building at its coordinates, and vice versa
+                    if street_number is None or building_key.startswith('geo:') or building_key.split(' ')[0] == street_number:
+                        return building_id
+        return None
+
+    def _geocell_key(self, geocell: tuple) -> str:
+        return f"{geocell[0]:.{GEOCELL_DECIMALS}f},{geocell[1]:.{GEOCELL_DECIMALS}f}"
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='List the buildings of a city in the building index.')
+    parser.add_argument('city', help='City as stored in the City column e.g. Toronto')
+    parser.add_argument('--history-dir', default=os.path.join('data', 'history'), help='History store directory')
+    args = parser.parse_args()
+
+    building_index = BuildingIndex(get_building_index_path(args.history_dir))
+    for building_id, building in building_index.buildings.items():
+        if building['city'] == args.city:
+            print(f"{building_id}  {building['first_seen']} - {building['last_seen']}  {building['name']}  {building['address']}")
@@ -0,0 +1,221 @@
+import os
+import math
+import argparse
+import numpy as np
+import pandas as pd
+
+from constants import TableHeaders
+from storage import read_cleaned_data
+
+#################################### High Level Comments ###################################
+# Competitor comp sets: every unit within a radius of a subject property, optionally matching its Bed / Bath / SqFt
+# Instead of a haversine over every cleaned row per subject, the rows are bucketed once into a latitude / longitude grid
+#   cells are GRID_CELL_KM of latitude high and as many degrees of longitude wide (narrower on the ground further north)
+#   rows are sorted by cell, each cell is a slice of the sorted arrays
+# A query only reads the cells overlapping the radius's bounding box, widened in longitude for the subject's latitude,
+#   then filters those candidates with the exact haversine distance and the Bed / Bath / SqFt tolerances
+# query_batch answers hundreds of subjects against one index and returns every comp set in one DataFrame
+# Rows without coordinates (older months, failed extractions) are left out of the index
+# Usage: python comps.py subjects.xlsx --cleaned data/cleaned_data/06-2024_cleaned_listings.xlsx --radius-km 2 [--output comps.xlsx]
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+GRID_CELL_KM = 1.0
+
+SUBJECT_COLUMN = 'Subject'
+DISTANCE_COLUMN = 'Distance Km'
+
+def haversine_km(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """
+    Great circle distance from one point to many.
+
+    Args:
+        latitude (float): Latitude of the point.
+        longitude (float): Longitude of the point.
+        latitudes (np.ndarray): Latitudes of the other points.
+        longitudes (np.ndarray): Longitudes of the other points.
+
+    Returns:
+        np.ndarray: Distances in km.
+    """
+    latitude, longitude = math.radians(latitude), math.radians(longitude)
+    latitudes, longitudes = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((latitudes - latitude) / 2) ** 2 + math.cos(latitude) * np.cos(latitudes) * np.sin((longitudes - longitude) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+class CompIndex():
+    """
+    Grid index over the coordinates of cleaned listings.
+
+    Attributes:
+        listings_df (pd.DataFrame): Indexed listings with coordinates, sorted by grid cell.
+        cell_km (float): Size of a grid cell, in km of latitude.
+    """
+    def __init__(self, cleaned_df: pd.DataFrame, cell_km: float = GRID_CELL_KM):
+        self.cell_km = cell_km
+
+        latitudes = pd.to_numeric(cleaned_df[TableHeaders.LAT.value], errors='coerce').to_numpy(dtype=float)
+        longitudes = pd.to_numeric(cleaned_df[TableHeaders.LON.value], errors='coerce').to_numpy(dtype=float)
+        has_coordinates = ~(np.isnan(latitudes) | np.isnan(longitudes))
+
+        cells_x, cells_y = self._get_cells(latitudes[has_coordinates], longitudes[has_coordinates])
+        order = np.lexsort((cells_y, cells_x))
+        self.listings_df = cleaned_df[has_coordinates].iloc[order].reset_index(drop=True)
+
+        # Columns read by every query, as contiguous arrays in cell order
+        self._latitudes = latitudes[has_coordinates][order]
+        self._longitudes = longitudes[has_coordinates][order]
+        self._beds = self._get_numeric_column(TableHeaders.BED.value)
+        self._baths = self._get_numeric_column(TableHeaders.BATH.value)
+        self._sqfts = self._get_numeric_column(TableHeaders.SQFT.value)
+
+        # (cell x, cell y) -> (start, end) slice of the sorted arrays
+        cells = np.column_stack((cells_x[order], cells_y[order]))
+        unique_cells, starts, counts = np.unique(cells, axis=0, return_index=True, return_counts=True)
+        self._cell_slices = {
+            (int(cell_x), int(cell_y)): (int(start), int(start + count))
+            for (cell_x, cell_y), start, count in zip(unique_cells, starts, counts)
+        }
+
+    @classmethod
+    def from_cleaned_file(cls, cleaned_filepath: str, cell_km: float = GRID_CELL_KM) -> 'CompIndex':
+        return cls(read_cleaned_data(cleaned_filepath), cell_km)
+
+    def __len__(self):
+        return len(self.listings_df)
+
+    def query(self, latitude: float, longitude: float, radius_km: float, bed: float = None, bath: float = None, sqft: float = None, bed_tolerance: float = 0, bath_tolerance: float = 0, sqft_tolerance: float = None) -> pd.DataFrame:
+        """
+        Finds the comp set of one subject property.
+
+        Args:
+            latitude (float): Latitude of the subject.
+            longitude (float): Longitude of the subject.
+            radius_km (float): Search radius.
+            bed (float): Bedrooms of the subject unit, None to keep every bedroom count.
+            bath (float): Bathrooms of the subject unit, None to keep every bathroom count.
+            sqft (float): Square footage of the subject unit, None to keep every size.
+            bed_tolerance (float): Largest bedroom difference of a comp.
+            bath_tolerance (float): Largest bathroom difference of a comp.
+            sqft_tolerance (float): Largest square footage difference of a comp as a fraction of sqft e.g. 0.15, None to keep every size.
+
+        Returns:
+            pd.DataFrame: Matching listings with their Distance Km, closest first.
+        """
+        positions, distances = self._find(latitude, longitude, radius_km, bed, bath, sqft, bed_tolerance, bath_tolerance, sqft_tolerance)
+        comps_df = self.listings_df.iloc[positions].assign(**{DISTANCE_COLUMN: distances})
+        return comps_df.sort_values(DISTANCE_COLUMN, kind='stable').reset_index(drop=True)
+
+    def query_batch(self, subjects_df: pd.DataFrame, radius_km: float, bed_tolerance: float = 0, bath_tolerance: float = 0, sqft_tolerance: float = None, match_units: bool = True) -> pd.DataFrame:
+        """
+        Finds the comp sets of many subject properties in one call.
+
+        Args:
+            subjects_df (pd.DataFrame): One row per subject with Latitude / Longitude, optional Bed / Bath / SqFt and Subject columns.
+            radius_km (float): Search radius.
+            bed_tolerance (float): Largest bedroom difference of a comp.
+            bath_tolerance (float): Largest bathroom difference of a comp.
+            sqft_tolerance (float): Largest square footage difference of a comp as a fraction of the subject's, None to keep every size.
+            match_units (bool): Whether comps are filtered by the subjects' Bed / Bath / SqFt, False for every unit in the radius.
+
+        Returns:
+            pd.DataFrame: Every comp with the Subject it belongs to and its Distance Km, by subject then closest first.
+        """
+        subject_names = subjects_df[SUBJECT_COLUMN] if SUBJECT_COLUMN in subjects_df.columns else pd.Series(subjects_df.index, index=subjects_df.index)
+
+        def get_subject_values(column: str) -> list:
+            if not match_units or column not in subjects_df.columns:
+                return [None] * len(subjects_df)
+            return [None if pd.isna(value) else float(value) for value in pd.to_numeric(subjects_df[column], errors='coerce')]
+
+        subject_positions, subject_distances, subject_labels = [], [], []
+        for subject_name, latitude, longitude, bed, bath, sqft in zip(
+            subject_names,
+            pd.to_numeric(subjects_df[TableHeaders.LAT.value], errors='coerce'),
+            pd.to_numeric(subjects_df[TableHeaders.LON.value], errors='coerce'),
+            get_subject_values(TableHeaders.BED.value),
+            get_subject_values(TableHeaders.BATH.value),
+            get_subject_values(TableHeaders.SQFT.value),
+        ):
+            if pd.isna(latitude) or pd.isna(longitude):
+                print(f"ERROR: Subject {subject_name} has no coordinates, skipping it")
+                continue
+            positions, distances = self._find(latitude, longitude, radius_km, bed, bath, sqft, bed_tolerance, bath_tolerance, sqft_tolerance)
+            order = np.argsort(distances, kind='stable')
+            subject_positions.append(positions[order])
+            subject_distances.append(distances[order])
+            subject_labels.append(np.full(len(positions), subject_name, dtype=object))
+
+        # One take over the listings for every comp set, instead of one DataFrame per subject
+        comps_df = self.listings_df.iloc[np.concatenate(subject_positions or [np.array([], dtype=np.int64)])].reset_index(drop=True)
+        comps_df.insert(0, SUBJECT_COLUMN, np.concatenate(subject_labels or [np.array([], dtype=object)]))
+        comps_df[DISTANCE_COLUMN] = np.concatenate(subject_distances or [np.array([], dtype=float)])
+        return comps_df
+
+    def _find(self, latitude: float, longitude: float, radius_km: float, bed: float, bath: float, sqft: float, bed_tolerance: float, bath_tolerance: float, sqft_tolerance: float) -> tuple:
+        """
+        Finds the positions of the matching listings in listings_df.
+
+        Returns:
+            tuple: Positions and distances of the matching listings, as arrays.
+        """
+        cell_degrees = self.cell_km / KM_PER_DEGREE
+        latitude_span = radius_km / KM_PER_DEGREE
+        # A degree of longitude is shortest on the edge of the radius furthest from the equator
+        furthest_latitude = min(abs(latitude) + latitude_span, 89.9)
+        longitude_span = min(radius_km / (KM_PER_DEGREE * math.cos(math.radians(furthest_latitude))), 180)
+        cells_x = range(int(math.floor((longitude - longitude_span) / cell_degrees)), int(math.floor((longitude + longitude_span) / cell_degrees)) + 1)
+        cells_y = range(int(math.floor((latitude - latitude_span) / cell_degrees)), int(math.floor((latitude + latitude_span) / cell_degrees)) + 1)
+        slices = [self._cell_slices[(x, y)] for x in cells_x for y in cells_y if (x, y) in self._cell_slices]
+        if not slices:
+            return np.array([], dtype=np.int64), np.array([], dtype=float)
+        candidates = np.concatenate([np.arange(start, end) for start, end in slices])
+
+        distances = haversine_km(latitude, longitude, self._latitudes[candidates], self._longitudes[candidates])
+        matches = distances <= radius_km
+        if bed is not None:
+            matches &= np.abs(self._beds[candidates] - bed) <= bed_tolerance
+        if bath is not None:
+            matches &= np.abs(self._baths[candidates] - bath) <= bath_tolerance
+        if sqft is not None and sqft_tolerance is not None:
+            matches &= np.abs(self._sqfts[candidates] - sqft) <= sqft * sqft_tolerance
+        return candidates[matches], distances[matches]
+
+    def _get_cells(self, latitudes: np.ndarray, longitudes: np.ndarray) -> tuple:
+        cell_degrees = self.cell_km / KM_PER_DEGREE
+        return np.floor(longitudes / cell_degrees).astype(np.int64), np.floor(latitudes / cell_degrees).astype(np.int64)
+
+    def _get_numeric_column(self, column: str) -> np.ndarray:
+        if column not in self.listings_df.columns:
+            return np.full(len(self.listings_df), np.nan)
+        return pd.to_numeric(self.listings_df[column], errors='coerce').to_numpy(dtype=float)
+
+def read_subjects(subjects_filepath: str) -> pd.DataFrame:
+    if os.path.splitext(subjects_filepath)[1].lower() == '.csv':
+        return pd.read_csv(subjects_filepath)
+    return pd.read_excel(subjects_filepath)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Find the comp set of every subject property within a radius.')
+    parser.add_argument('subjects', help='CSV / Excel file of subjects with Latitude and Longitude, optional Subject, Bed, Bath and SqFt columns')
+    parser.add_argument('--cleaned', required=True, help='Cleaned data Excel file e.g. data/cleaned_data/06-2024_cleaned_listings.xlsx, its Parquet file is read if present')
+    parser.add_argument('--radius-km', type=float, default=2.0, help='Search radius around each subject')
+    parser.add_argument('--bed-tolerance', type=float, default=0, help='Largest bedroom difference of a comp')
+    parser.add_argument('--bath-tolerance', type=float, default=0, help='Largest bathroom difference of a comp')
+    parser.add_argument('--sqft-tolerance', type=float, default=None, help='Largest square footage difference of a comp as a fraction e.g. 0.15')
+    parser.add_argument('--all-units', action='store_true', help='Ignore the subjects\' Bed / Bath / SqFt and return every unit in the radius')
+    parser.add_argument('--output', default=None, help='CSV / Excel file the comps are written to, printed if omitted')
+    args = parser.parse_args()
+
+    comp_index = CompIndex.from_cleaned_file(args.cleaned)
+    comps_df = comp_index.query_batch(
+        read_subjects(args.subjects), args.radius_km, args.bed_tolerance, args.bath_tolerance, args.sqft_tolerance, match_units=not args.all_units
+    )
+    print(f"Found {len(comps_df)} comps among {len(comp_index)} indexed listings")
+
+    if args.output is None:
+        print(comps_df.to_string(index=False))
+    elif os.path.splitext(args.output)[1].lower() == '.csv':
+        comps_df.to_csv(args.output, index=False)
+    else:
+        comps_df.to_excel(args.output, index=False)
@@ -1,23 +1,61 @@
-from fake_useragent import UserAgent
 from dotenv import load_dotenv
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.chrome.options import Options as ChromeOptions
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from utils import get_headers, get_random_user_agent
+import requests
 import logging
 import os
 
 # Creates a Chrome Web Driver instance with certain configurations
 # This is use case agnostic - should be consistent across different scraper applications
+# With capture_network, chrome's performance log records every network event (CDP Network domain)
+#   so responses the page fetches itself (e.g. search API JSON) can be read back with Network.getResponseBody
+# With lean, chrome only fetches what the scraper reads (DOM text, meta tags, the site's own scripts and API calls)
+#   images are disabled through preferences, fonts / media / map tiles / analytics are blocked with CDP Network.setBlockedURLs
+#   the eager page load strategy returns once the DOM is interactive instead of waiting for every subresource
+#   see benchmarks/bench_chrome_profile.py for per-page bytes and load time of the full and lean profiles
 
-def create_chrome_driver(*, debugging_port):
-    load_dotenv()
+LEAN_BLOCKED_URL_PATTERNS = [
+    # Images, fonts and media that survive the image preference (e.g. css backgrounds, video posters)
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.mp3',
+    # Map tiles - the map script itself is kept so the page's own scripts do not fail
+    '*.pbf', '*.mvt', '*tiles.mapbox.com*', '*maps.googleapis.com/maps/vt*',
+    # Third-party analytics / ads / tracking
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*googlesyndication.com*',
+    '*facebook.net*', '*facebook.com/tr*', '*hotjar.com*', '*segment.io*', '*segment.com*',
+    '*sentry.io*', '*newrelic.com*', '*nr-data.net*', '*bat.bing.com*', '*amazon-adsystem.com*',
+]
+
+LEAN_CHROME_ARGUMENTS = [
+    '--blink-settings=imagesEnabled=false',
+    '--disable-extensions',
+    '--disable-gpu',
+    '--disable-background-networking',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-notifications',
+    '--mute-audio',
+    '--no-first-run',
+    '--disable-features=Translate,OptimizationHints,MediaRouter,AutofillServerCommunication',
+]
+
+LEAN_CHROME_PREFERENCES = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.managed_default_content_settings.media_stream': 2,
+    'profile.default_content_setting_values.notifications': 2,
+    'profile.default_content_setting_values.geolocation': 2,
+}
 
-     # Create a UserAgent object to generate random user agent strings
-    user_agent = UserAgent().random
+def create_chrome_driver(*, debugging_port, capture_network=False, lean=False):
+    load_dotenv()
 
-    # Loop to ensure the user agent is for Windows Chrome
-    while not ('windows' in user_agent.lower() and 'chrome' in user_agent.lower()):
-        user_agent = UserAgent().random
+    # Windows Chrome user agent from the pool cached on disk (see utils.py)
+    user_agent = get_random_user_agent()
 
     chrome_driver_path = os.getenv('CHROMEDRIVER_PATH') 
 
@@ -29,8 +67,38 @@ def create_chrome_driver(*, debugging_port):
     chrome_options.add_argument("--headless")  # Enable headless mode (does not open browser GUI)
     chrome_options.add_argument("--log-level=3") 
 
+    if capture_network:
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        chrome_options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
+
+    if lean:
+        for argument in LEAN_CHROME_ARGUMENTS:
+            chrome_options.add_argument(argument)
+        chrome_options.add_experimental_option('prefs', LEAN_CHROME_PREFERENCES)
+        chrome_options.page_load_strategy = 'eager'
+
     chrome_service = ChromeService(executable_path=chrome_driver_path)
 
     web_driver = webdriver.Chrome(service=chrome_service, options=chrome_options)
 
-    return web_driver
\ No newline at end of file
+    if lean:
+        # Blocked urls apply to every later navigation of this driver's tab
+        web_driver.execute_cdp_cmd('Network.enable', {})
+        web_driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_URL_PATTERNS})
+
+    return web_driver
+
+# Creates a pooled HTTP session that mimics a Chrome on Windows browser
+# Used to fetch server-rendered pages without starting a browser - connections are kept alive and reused
+
+def create_http_session(*, base_url, pool_size=10):
+    http_session = requests.Session()
+    http_session.headers.update(get_headers(base_url))
+
+    # Retry transient connection errors / server errors with a short backoff before falling back to the browser
+    retries = Retry(total=2, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504])
+    http_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retries)
+    http_session.mount('https://', http_adapter)
+    http_session.mount('http://', http_adapter)
+
+    return http_session
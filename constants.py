@@ -63,6 +63,31 @@ table_columns = [table_header.value for table_header in TableHeaders]
 
 PADMAPPER_BASE_URL = "https://www.padmapper.com"
 
+# Regional landing pages scraped every month, shared by main.py and the frontier workers (see frontier.py)
+
+LANDING_PAGE_URLS = [
+    "https://www.padmapper.com/apartments/vancouver-bc",
+    "https://www.padmapper.com/apartments/winnipeg-mb",
+    "https://www.padmapper.com/apartments/toronto-on",
+    "https://www.padmapper.com/apartments/ottawa-on",
+    "https://www.padmapper.com/apartments/montreal-qc",
+    "https://www.padmapper.com/apartments/edmonton-ab",
+]
+
+# Listing pages are scraped by a pool of workers, each owning a chrome driver on its own debugging port
+# Worker count is capped by the per-host politeness limit to avoid detection / blocking by the website
+
+PADMAPPER_MAX_CONCURRENCY = 4
+DEFAULT_SCRAPE_WORKERS = 2
+FETCH_URLS_DEBUGGING_PORT = 9221
+SCRAPE_LISTINGS_BASE_DEBUGGING_PORT = 9222
+
+# Listings whose landing page tile is unchanged carry their cached units forward until the units are this old (see fingerprints.py)
+# Runs are monthly, a few days apart either way: 75 days carries an unchanged listing forward for two runs
+#   and revisits it on the third, so fields the tile does not show (e.g. amenities) are refreshed about once a quarter
+
+FINGERPRINT_TTL_DAYS = 75
+
 # Defines the root sharepoint folder where the output files will be uploaded
 # .env will contain the graph API endpoint which is the target sharepoint site
 
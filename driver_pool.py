@@ -0,0 +1,206 @@
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.webdriver import WebDriver
+from urllib3.exceptions import HTTPError
+from config import create_chrome_driver
+from metrics import Metrics
+from datetime import datetime
+from enum import Enum
+import threading
+import queue
+import psutil
+
+#################################### High Level Comments ###################################
+# Chrome cold starts cost more than scraping a listing page, so drivers are kept alive across urls
+# Each pooled driver owns its own remote debugging port for its whole lifetime
+# Drivers are health checked with a cheap execute_script ping whenever they are handed out
+# A driver whose page load hit the time limit is reset to about:blank before reuse, as the abandoned load may still be running
+# A driver is only recycled (quit + recreated) when it has crashed / stopped responding,
+#   has served MAX_PAGES_PER_DRIVER pages, or its chrome process tree grew by more than MAX_MEMORY_GROWTH_MB
+# Every recycle is recorded with its reason so restarts can be reviewed after a run
+#   and counted in the run's Metrics with the time the restart took (see metrics.py)
+# Drivers use the lean chrome profile by default (no images / fonts / media / trackers, eager page loads), see config.py
+
+MAX_PAGES_PER_DRIVER = 200
+MAX_MEMORY_GROWTH_MB = 1024
+
+class RecycleReason(Enum):
+    CRASH = 'crash'
+    UNRESPONSIVE = 'unresponsive'
+    PAGE_LIMIT = 'page limit'
+    MEMORY_GROWTH = 'memory growth'
+
+class PooledDriver():
+    """
+    Chrome WebDriver kept alive across listing urls.
+
+    Attributes:
+        debugging_port (int): Remote debugging port owned by this driver.
+        lean (bool): Whether the driver uses the lean chrome profile.
+        web_driver (WebDriver): The underlying Selenium WebDriver.
+        pages_served (int): Number of page loads since the driver was (re)created.
+        baseline_memory_mb (float): Memory of the chrome process tree when the driver was (re)created.
+    """
+    def __init__(self, debugging_port: int, lean: bool = True):
+        self.debugging_port = debugging_port
+        self.lean = lean
+        self.web_driver: WebDriver = None
+        self.pages_served = 0
+        self.baseline_memory_mb = 0.0
+        self.start()
+
+    def start(self):
+        self.web_driver = create_chrome_driver(debugging_port=self.debugging_port, lean=self.lean)
+        self.pages_served = 0
+        self.baseline_memory_mb = self.memory_mb()
+
+    def quit(self):
+        try:
+            self.web_driver.quit()
+        except Exception:
+            # Driver may already be dead, nothing left to clean up
+            pass
+
+    def is_healthy(self) -> bool:
+        """
+        Pings the browser with a trivial script to check it is still responsive.
+
+        Returns:
+            bool: True if the browser answered the ping, False otherwise.
+        """
+        try:
+            return self.web_driver.execute_script('return 1') == 1
+        except (WebDriverException, ConnectionError, HTTPError):
+            # urllib3 errors mean chromedriver itself is gone
+            return False
+
+    def reset(self) -> bool:
+        """
+        Stops whatever the browser is still loading by navigating to a blank page.
+
+        Returns:
+            bool: True if the browser answered the ping and navigated, False if it should be recycled.
+        """
+        if not self.is_healthy():
+            return False
+        try:
+            self.web_driver.get('about:blank')
+            return True
+        except (WebDriverException, ConnectionError, HTTPError):
+            return False
+
+    def memory_mb(self) -> float:
+        """
+        Returns the resident memory of chromedriver and every chrome process it spawned.
+
+        Returns:
+            float: Resident set size in megabytes, 0 if it cannot be measured.
+        """
+        try:
+            service_process = psutil.Process(self.web_driver.service.process.pid)
+            processes = [service_process] + service_process.children(recursive=True)
+            return sum(process.memory_info().rss for process in processes) / (1024 * 1024)
+        except (psutil.Error, AttributeError):
+            return 0.0
+
+class DriverPool():
+    """
+    Pool of persistent, health-checked Chrome WebDrivers.
+
+    Attributes:
+        max_pages_per_driver (int): Page loads after which a driver is recycled.
+        max_memory_growth_mb (float): Memory growth after which a driver is recycled.
+        recycle_log (List[dict]): One entry per recycle with the port, reason, pages served and time.
+        metrics (Metrics): Stage timings and counters of the run.
+    """
+    def __init__(self, debugging_ports: list[int], max_pages_per_driver: int = MAX_PAGES_PER_DRIVER, max_memory_growth_mb: float = MAX_MEMORY_GROWTH_MB, lean: bool = True, metrics: Metrics = None):
+        self.max_pages_per_driver = max_pages_per_driver
+        self.max_memory_growth_mb = max_memory_growth_mb
+        self.metrics = metrics or Metrics()
+        self.recycle_log = []
+        self._recycle_log_lock = threading.Lock()
+        self._drivers = []
+        self._available = queue.Queue()
+
+        for debugging_port in debugging_ports:
+            try:
+                pooled_driver = PooledDriver(debugging_port, lean)
+            except Exception as e:
+                print(f"ERROR: Failed to start chrome driver on port {debugging_port}: {e}")
+                continue
+            self._drivers.append(pooled_driver)
+            self._available.put(pooled_driver)
+
+    def __len__(self):
+        return len(self._drivers)
+
+    def acquire(self) -> PooledDriver:
+        """
+        Takes a driver out of the pool, recycling it first if it is unhealthy or worn out.
+
+        Returns:
+            PooledDriver: A responsive driver reserved for the caller until released.
+        """
+        pooled_driver = self._available.get()
+        self.check(pooled_driver)
+        return pooled_driver
+
+    def release(self, pooled_driver: PooledDriver, crashed: bool = False):
+        """
+        Returns a driver to the pool.
+
+        Args:
+            pooled_driver (PooledDriver): The driver previously returned by acquire().
+            crashed (bool): Whether the caller saw the driver crash, forcing a recycle.
+        """
+        if crashed:
+            self._recycle(pooled_driver, RecycleReason.CRASH.value)
+        self._available.put(pooled_driver)
+
+    def check(self, pooled_driver: PooledDriver):
+        """
+        Recycles the driver if it fails the health check or exceeded its page / memory budget.
+
+        Args:
+            pooled_driver (PooledDriver): The driver to check.
+        """
+        if not pooled_driver.is_healthy():
+            self._recycle(pooled_driver, RecycleReason.UNRESPONSIVE.value)
+        elif pooled_driver.pages_served >= self.max_pages_per_driver:
+            self._recycle(pooled_driver, RecycleReason.PAGE_LIMIT.value)
+        elif pooled_driver.memory_mb() - pooled_driver.baseline_memory_mb > self.max_memory_growth_mb:
+            self._recycle(pooled_driver, RecycleReason.MEMORY_GROWTH.value)
+
+    def recycle_counts(self) -> dict:
+        """
+        Counts recycles by reason.
+
+        Returns:
+            dict: Mapping of recycle reason to number of recycles.
+        """
+        with self._recycle_log_lock:
+            counts = {}
+            for entry in self.recycle_log:
+                counts[entry['reason']] = counts.get(entry['reason'], 0) + 1
+            return counts
+
+    def close(self):
+        for pooled_driver in self._drivers:
+            pooled_driver.quit()
+
+    def _recycle(self, pooled_driver: PooledDriver, reason: str):
+        print(f"Recycling chrome driver on port {pooled_driver.debugging_port} ({reason}) after {pooled_driver.pages_served} pages")
+        with self._recycle_log_lock:
+            self.recycle_log.append({
+                'port': pooled_driver.debugging_port,
+                'reason': reason,
+                'pages_served': pooled_driver.pages_served,
+                'time': datetime.now()
+            })
+        self.metrics.increment('driver_restarts', reason=reason)
+        pooled_driver.quit()
+        try:
+            with self.metrics.time('driver_restart'):
+                pooled_driver.start()
+        except Exception as e:
+            # Leave the dead driver in place, the next health check will retry the restart
+            print(f"ERROR: Failed to restart chrome driver on port {pooled_driver.debugging_port}: {e}")
@@ -0,0 +1,116 @@
+import os
+import re
+import json
+import hashlib
+from datetime import datetime, timedelta
+
+from constants import TableHeaders, FINGERPRINT_TTL_DAYS
+
+#################################### High Level Comments ###################################
+# Most buildings do not change between monthly runs, yet every listing page used to be revisited
+# The landing page tile already shows a listing's floorplan count and price range
+# A fingerprint of that tile summary is cached per listing url together with the units scraped from it
+# On the next run a listing is only revisited if its fingerprint changed or its cached units are older than the TTL
+# Unchanged listings carry their cached units forward with a new Date
+# The TTL bounds how stale carried forward units can get (e.g. amenities are not visible on the tile)
+#   it is set in constants.py against the monthly run cadence
+# Summaries come from harvested tiles ('3 Floorplans', '$2,150 - $3,480') or from search API listables ('3 Floorplans', '2150 - 3480'),
+#   both are reduced to the floorplan count and the min / max price before hashing so a listing keeps its fingerprint
+#   whichever discovery path found it
+# The cache is a single JSON file shared by every month, written atomically after each city
+
+NUMBER_PATTERN = re.compile(r'\d[\d,]*(?:\.\d+)?')
+
+def normalize_tile_summary(tile_summary: dict) -> dict:
+    """
+    Reduces a tile summary to the values it shows, independent of how they were formatted.
+
+    Args:
+        tile_summary (dict): Summary with the floorplan count text and the price range text.
+
+    Returns:
+        dict: The floorplan count (None if missing) and the [min, max] price ([] if the tile shows no price).
+    """
+    floorplan_counts = NUMBER_PATTERN.findall(str(tile_summary.get('floorplans') or ''))
+    prices = [float(price.replace(',', '')) for price in NUMBER_PATTERN.findall(str(tile_summary.get('price') or ''))]
+    return {
+        'floorplans': int(floorplan_counts[0].replace(',', '')) if floorplan_counts else None,
+        'price': [min(prices), max(prices)] if prices else []
+    }
+
+def get_tile_fingerprint(tile_summary: dict) -> str:
+    """
+    Hashes a normalized landing page tile summary.
+
+    Args:
+        tile_summary (dict): Summary returned by PadmapperScraper._get_tile_summary or built from a search API listable.
+
+    Returns:
+        str: Hex digest identifying the summary.
+    """
+    return hashlib.sha1(json.dumps(normalize_tile_summary(tile_summary), sort_keys=True).encode('utf-8')).hexdigest()
+
+class FingerprintCache():
+    """
+    Tile fingerprints and units of listings scraped in previous runs, keyed by listing url.
+
+    Attributes:
+        filepath (str): Path of the JSON cache file.
+        ttl (timedelta): Age after which a listing is revisited even if its tile did not change.
+        entries (dict): Listing url -> {'fingerprint', 'scraped_at', 'units'}.
+    """
+    def __init__(self, filepath: str, ttl_days: int = FINGERPRINT_TTL_DAYS):
+        self.filepath = filepath
+        self.ttl = timedelta(days=ttl_days)
+        self.entries = {}
+
+        if os.path.exists(self.filepath):
+            try:
+                with open(self.filepath, 'r', encoding='utf-8') as file:
+                    self.entries = json.load(file)
+            except (OSError, ValueError) as e:
+                # A lost cache only costs one full scrape
+                print(f"ERROR: Could not read fingerprint cache {self.filepath}, revisiting every listing: {e}")
+
+    def get_unchanged_units(self, url: str, tile_summary: dict) -> list:
+        """
+        Returns the cached units of a listing whose tile has not changed since it was last scraped.
+
+        Args:
+            url (str): URL of the listing page.
+            tile_summary (dict): Summary shown on the listing's tile in this run.
+
+        Returns:
+            list or None: Copies of the cached units with the Date set to now, None if the listing must be revisited.
+        """
+        entry = self.entries.get(url)
+        if not entry or not entry['units'] or tile_summary is None:
+            return None
+        if entry['fingerprint'] != get_tile_fingerprint(tile_summary):
+            return None
+        if datetime.now() - datetime.fromisoformat(entry['scraped_at']) > self.ttl:
+            return None
+
+        scrape_date = datetime.now().isoformat()
+        return [{**unit, TableHeaders.DATE.value: scrape_date} for unit in entry['units']]
+
+    def update(self, url: str, tile_summary: dict, units: list[dict]):
+        """
+        Caches the units freshly scraped from a listing.
+
+        Args:
+            url (str): URL of the listing page.
+            tile_summary (dict): Summary shown on the listing's tile in this run.
+            units (list[dict]): Rental unit data dictionaries scraped from the listing.
+        """
+        self.entries[url] = {
+            'fingerprint': get_tile_fingerprint(tile_summary),
+            'scraped_at': datetime.now().isoformat(),
+            'units': units
+        }
+
+    def save(self):
+        # Write to a temporary file first so a crash never leaves a truncated cache behind
+        with open(f"{self.filepath}.tmp", 'w', encoding='utf-8') as file:
+            json.dump(self.entries, file, default=str)
+        os.replace(f"{self.filepath}.tmp", self.filepath)
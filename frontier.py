@@ -0,0 +1,397 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import threading
+from contextlib import contextmanager
+from enum import Enum
+
+#################################### High Level Comments ###################################
+# Durable work queue (frontier) of a run, so several extract_raw_data workers can drain one run together
+#   on one box or on several sharing the database file, and a stopped run can be resumed by starting a worker again
+# One SQLite file holds every landing page and listing url of the run, with its state and result
+#   pending -> leased (by one worker, until lease_expires) -> done (units / discovered urls stored) or failed
+# Workers lease items, keep the lease alive with a heartbeat while working on them and ack them with their result
+# A lease that is not renewed (worker killed, host lost) expires and the item goes back to the queue
+#   items leased MAX_ATTEMPTS times without being acked are marked failed instead of being retried forever
+# Landing pages are leased first - discovering a city adds its listing urls to the queue for every worker
+# Listing urls are leased in batches from one city at a time, in the order they were discovered
+# Once nothing is pending or leased, one worker leases the export item and writes the raw dataset / Excel file
+# Lease expiry uses wall clock time, hosts sharing a database need synchronised clocks
+# WAL mode needs shared memory, so hosts sharing the file over a network filesystem should open it with use_wal=False
+# Usage: python frontier.py data/raw_data/06-2024_raw_listings.xlsx [--workers 2] [--frontier data/frontier/06-2024_raw_listings.sqlite3]
+
+LEASE_SECONDS = 300
+HEARTBEAT_INTERVAL = 60
+MAX_ATTEMPTS = 3
+BUSY_TIMEOUT = 30
+
+class ItemKind(Enum):
+    LANDING = 'landing'
+    LISTING = 'listing'
+    EXPORT = 'export'
+
+class ItemState(Enum):
+    PENDING = 'pending'
+    LEASED = 'leased'
+    DONE = 'done'
+    FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    url TEXT NOT NULL,
+    city_index INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    tile_summary TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    carried_forward INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (kind, url)
+);
+CREATE INDEX IF NOT EXISTS items_queue ON items (kind, state, city_index, position);
+"""
+
+def get_frontier_path(filepath: str) -> str:
+    """
+    Returns the frontier database of a run, next to the raw / cleaned data directories.
+
+    Args:
+        filepath (str): Path of a raw data Excel file e.g. data/raw_data/06-2024_raw_listings.xlsx.
+
+    Returns:
+        str: The database path e.g. data/frontier/06-2024_raw_listings.sqlite3.
+    """
+    run_name = os.path.splitext(os.path.basename(filepath))[0]
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(filepath))), 'frontier', f"{run_name}.sqlite3")
+
+def get_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+class ScrapeFrontier():
+    """
+    SQLite backed queue of the landing pages and listing urls of a run, leased to workers.
+
+    Attributes:
+        db_path (str): Path of the SQLite database.
+        worker_id (str): Owner recorded on the leases taken by this worker.
+        lease_seconds (float): Time a lease is held without a heartbeat.
+    """
+    def __init__(self, db_path: str, worker_id: str = None, lease_seconds: float = LEASE_SECONDS, use_wal: bool = True):
+        self.db_path = db_path
+        self.worker_id = worker_id or get_worker_id()
+        self.lease_seconds = lease_seconds
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # Autocommit mode, transactions are opened explicitly with BEGIN IMMEDIATE so leases never race
+        self._connection = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        if use_wal:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        # Takes the database write lock up front, so a select followed by an update is atomic across processes
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+            self._connection.execute('COMMIT')
+
+    def add_landing_pages(self, landing_page_urls: list[str]):
+        """
+        Seeds the run with its landing pages and export item, every worker may call it.
+
+        Args:
+            landing_page_urls (list[str]): Regional landing page URLs, in city order.
+        """
+        with self._transaction() as connection:
+            connection.executemany(
+                'INSERT OR IGNORE INTO items (kind, url, city_index, position) VALUES (?, ?, ?, 0)',
+                [(ItemKind.LANDING.value, landing_page_url, city_index) for city_index, landing_page_url in enumerate(landing_page_urls)]
+            )
+            connection.execute('INSERT OR IGNORE INTO items (kind, url, city_index, position) VALUES (?, ?, ?, 0)', (ItemKind.EXPORT.value, '', len(landing_page_urls)))
+
+    def lease_landing_page(self) -> tuple:
+        """
+        Leases the next landing page to discover.
+
+        Returns:
+            tuple or None: The city index and landing page url, or None if no landing page is available.
+        """
+        leased_items = self._lease(ItemKind.LANDING.value, 1)
+        return (leased_items[0]['city_index'], leased_items[0]['url']) if leased_items else None
+
+    def complete_landing_page(self, landing_page_url: str, urls: list[str], tile_summaries: dict = None, unchanged_listings: dict = None):
+        """
+        Queues the listing urls discovered on a landing page and acks it, in one transaction.
+
+        Args:
+            landing_page_url (str): The leased landing page url.
+            urls (list[str]): Listing urls discovered on it, in order.
+            tile_summaries (dict): Listing url -> summary shown on its landing page tile.
+            unchanged_listings (dict): Listing url -> units carried forward from the fingerprint cache, queued as done.
+        """
+        tile_summaries = tile_summaries or {}
+        unchanged_listings = unchanged_listings or {}
+        with self._transaction() as connection:
+            city_index = connection.execute('SELECT city_index FROM items WHERE kind = ? AND url = ?', (ItemKind.LANDING.value, landing_page_url)).fetchone()[0]
+            connection.executemany(
+                'INSERT OR IGNORE INTO items (kind, url, city_index, position, tile_summary, state, result, carried_forward) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (
+                        ItemKind.LISTING.value, url, city_index, position, json.dumps(tile_summaries.get(url)),
+                        ItemState.DONE.value if url in unchanged_listings else ItemState.PENDING.value,
+                        json.dumps(unchanged_listings[url], default=str) if url in unchanged_listings else None,
+                        int(url in unchanged_listings)
+                    )
+                    for position, url in enumerate(urls)
+                ]
+            )
+            self._ack(connection, ItemKind.LANDING.value, landing_page_url, urls)
+
+    def lease_listings(self, batch_size: int) -> tuple:
+        """
+        Leases a batch of listing urls of one city.
+
+        Args:
+            batch_size (int): Maximum number of urls leased.
+
+        Returns:
+            tuple or None: The city index and a list of (position, url) pairs, or None if no listing is available.
+        """
+        leased_items = self._lease(ItemKind.LISTING.value, batch_size)
+        if not leased_items:
+            return None
+        return leased_items[0]['city_index'], [(item['position'], item['url']) for item in leased_items]
+
+    def complete_listing(self, url: str, units: list[dict]) -> bool:
+        """
+        Acks a leased listing url with the units extracted from it.
+
+        Args:
+            url (str): URL of the listing page.
+            units (list[dict]): Rental unit data dictionaries extracted from it.
+
+        Returns:
+            bool: False if another worker already completed the url after this worker's lease expired.
+        """
+        with self._transaction() as connection:
+            return self._ack(connection, ItemKind.LISTING.value, url, units)
+
+    def release(self, kind: str, urls: list[str]):
+        """
+        Hands leased items back without a result, e.g. after every fetch attempt failed.
+
+        Items leased MAX_ATTEMPTS times are marked failed, the others go back to the queue.
+
+        Args:
+            kind (str): ItemKind value of the items.
+            urls (list[str]): URLs of the items.
+        """
+        with self._transaction() as connection:
+            connection.executemany(
+                'UPDATE items SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, lease_owner = NULL, lease_expires = NULL '
+                'WHERE kind = ? AND url = ? AND state = ? AND lease_owner = ?',
+                [(MAX_ATTEMPTS, ItemState.FAILED.value, ItemState.PENDING.value, kind, url, ItemState.LEASED.value, self.worker_id) for url in urls]
+            )
+
+    def renew(self, kind: str, urls: list[str]):
+        """
+        Extends this worker's leases on the given items.
+
+        Args:
+            kind (str): ItemKind value of the items.
+            urls (list[str]): URLs of the items.
+        """
+        lease_expires = time.time() + self.lease_seconds
+        with self._transaction() as connection:
+            connection.executemany(
+                'UPDATE items SET lease_expires = ? WHERE kind = ? AND url = ? AND state = ? AND lease_owner = ?',
+                [(lease_expires, kind, url, ItemState.LEASED.value, self.worker_id) for url in urls]
+            )
+
+    @contextmanager
+    def heartbeat(self, kind: str, urls: list[str]):
+        """
+        Renews the leases on the given items every HEARTBEAT_INTERVAL seconds for the duration of a with block.
+
+        Args:
+            kind (str): ItemKind value of the items.
+            urls (list[str]): URLs of the items.
+        """
+        stopped = threading.Event()
+
+        def renew_until_stopped():
+            while not stopped.wait(min(HEARTBEAT_INTERVAL, self.lease_seconds / 3)):
+                try:
+                    self.renew(kind, urls)
+                except sqlite3.Error as e:
+                    # A missed heartbeat only risks another worker repeating the items
+                    print(f"ERROR: Failed to renew frontier leases: {e}")
+
+        heartbeat_thread = threading.Thread(target=renew_until_stopped, daemon=True)
+        heartbeat_thread.start()
+        try:
+            yield
+        finally:
+            stopped.set()
+            heartbeat_thread.join()
+
+    def is_drained(self) -> bool:
+        """
+        Checks whether every landing page and listing url is done or failed.
+
+        Returns:
+            bool: True if nothing is pending or leased.
+        """
+        with self._lock:
+            remaining_count = self._connection.execute(
+                'SELECT COUNT(*) FROM items WHERE kind != ? AND state IN (?, ?)', (ItemKind.EXPORT.value, ItemState.PENDING.value, ItemState.LEASED.value)
+            ).fetchone()[0]
+        return remaining_count == 0
+
+    def lease_export(self) -> bool:
+        """
+        Leases the export of the run, only once every landing page and listing url is done or failed.
+
+        Returns:
+            bool: True if this worker should export the run.
+        """
+        if not self.is_drained():
+            return False
+        return bool(self._lease(ItemKind.EXPORT.value, 1))
+
+    def is_exported(self) -> bool:
+        with self._lock:
+            export_state = self._connection.execute('SELECT state FROM items WHERE kind = ?', (ItemKind.EXPORT.value,)).fetchone()
+        return export_state is not None and export_state[0] in (ItemState.DONE.value, ItemState.FAILED.value)
+
+    def complete_export(self, unit_count: int):
+        with self._transaction() as connection:
+            self._ack(connection, ItemKind.EXPORT.value, '', unit_count)
+
+    def get_city_results(self) -> list:
+        """
+        Reads the results of every city, in city order.
+
+        Returns:
+            List[dict]: One entry per landing page with its 'city_index', 'landing_page_url' and 'listings',
+            the listings being dicts of 'url', 'units', 'tile_summary' and 'carried_forward' in discovery order.
+        """
+        with self._lock:
+            landing_rows = self._connection.execute(
+                'SELECT city_index, url FROM items WHERE kind = ? ORDER BY city_index', (ItemKind.LANDING.value,)
+            ).fetchall()
+            listing_rows = self._connection.execute(
+                'SELECT city_index, url, result, tile_summary, carried_forward FROM items WHERE kind = ? AND state = ? ORDER BY city_index, position',
+                (ItemKind.LISTING.value, ItemState.DONE.value)
+            ).fetchall()
+
+        city_results = {city_index: {'city_index': city_index, 'landing_page_url': url, 'listings': []} for city_index, url in landing_rows}
+        for city_index, url, result, tile_summary, carried_forward in listing_rows:
+            city_results[city_index]['listings'].append({
+                'url': url,
+                'units': json.loads(result),
+                'tile_summary': json.loads(tile_summary) if tile_summary else None,
+                'carried_forward': bool(carried_forward),
+            })
+        return list(city_results.values())
+
+    def get_state_counts(self) -> dict:
+        """
+        Counts items by kind and state, e.g. for progress reporting.
+
+        Returns:
+            dict: Mapping of (kind, state) to number of items.
+        """
+        with self._lock:
+            rows = self._connection.execute('SELECT kind, state, COUNT(*) FROM items GROUP BY kind, state').fetchall()
+        return {(kind, state): count for kind, state, count in rows}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _lease(self, kind: str, batch_size: int) -> list:
+        """
+        Leases up to batch_size pending (or expired) items of a kind, listings from a single city.
+
+        Args:
+            kind (str): ItemKind value to lease.
+            batch_size (int): Maximum number of items leased.
+
+        Returns:
+            List[dict]: The leased items' url, city index and position.
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            # Expired leases that used up their attempts are given up on, the rest are leasable again
+            connection.execute(
+                'UPDATE items SET state = ?, lease_owner = NULL, lease_expires = NULL WHERE kind = ? AND state = ? AND lease_expires < ? AND attempts >= ?',
+                (ItemState.FAILED.value, kind, ItemState.LEASED.value, now, MAX_ATTEMPTS)
+            )
+            leasable = '(state = ? OR (state = ? AND lease_expires < ?))'
+            leasable_args = (ItemState.PENDING.value, ItemState.LEASED.value, now)
+            first_item = connection.execute(
+                f'SELECT city_index FROM items WHERE kind = ? AND {leasable} ORDER BY city_index, position LIMIT 1', (kind, *leasable_args)
+            ).fetchone()
+            if first_item is None:
+                return []
+            rows = connection.execute(
+                f'SELECT id, url, city_index, position FROM items WHERE kind = ? AND city_index = ? AND {leasable} ORDER BY position LIMIT ?',
+                (kind, first_item[0], *leasable_args, batch_size)
+            ).fetchall()
+            connection.executemany(
+                'UPDATE items SET state = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?',
+                [(ItemState.LEASED.value, self.worker_id, now + self.lease_seconds, item_id) for item_id, _, _, _ in rows]
+            )
+        return [{'url': url, 'city_index': city_index, 'position': position} for _, url, city_index, position in rows]
+
+    def _ack(self, connection: sqlite3.Connection, kind: str, url: str, result) -> bool:
+        # An expired lease can still be acked as long as no other worker finished the item first
+        cursor = connection.execute(
+            'UPDATE items SET state = ?, result = ?, lease_owner = NULL, lease_expires = NULL WHERE kind = ? AND url = ? AND state != ?',
+            (ItemState.DONE.value, json.dumps(result, default=str), kind, url, ItemState.DONE.value)
+        )
+        return cursor.rowcount > 0
+
+class FrontierJournal():
+    """
+    Stands in for the ScrapeJournal in _scrape_listing_urls, acking listings in the frontier as they are scraped.
+
+    Attributes:
+        frontier (ScrapeFrontier): The run's frontier.
+        completed_listings (dict): Always empty, leased urls are never already completed.
+        acked_urls (set): URLs acked through this journal.
+    """
+    def __init__(self, frontier: ScrapeFrontier):
+        self.frontier = frontier
+        self.completed_listings = {}
+        self.acked_urls = set()
+
+    def record_listing(self, url: str, units: list[dict]):
+        self.frontier.complete_listing(url, units)
+        self.acked_urls.add(url)
+
+if __name__ == '__main__':
+    from functions import extract_raw_data
+    from constants import DEFAULT_SCRAPE_WORKERS, LANDING_PAGE_URLS
+
+    parser = argparse.ArgumentParser(description='Run one worker draining a shared run frontier, start one per box / IP.')
+    parser.add_argument('filepath', help='Raw data Excel file of the run e.g. data/raw_data/06-2024_raw_listings.xlsx')
+    parser.add_argument('--frontier', default=None, help='Frontier database shared by the workers, defaults to data/frontier/<run>.sqlite3')
+    parser.add_argument('--workers', type=int, default=DEFAULT_SCRAPE_WORKERS, help='Chrome drivers of this worker')
+    parser.add_argument('--no-wal', action='store_true', help='Use a rollback journal, for databases shared over a network filesystem')
+    args = parser.parse_args()
+
+    extract_raw_data(args.filepath, LANDING_PAGE_URLS, num_workers=args.workers, frontier_path=args.frontier or get_frontier_path(args.filepath), frontier_wal=not args.no_wal)
@@ -1,117 +1,647 @@
 import os
 import re
+import time
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait, FIRST_COMPLETED
 import func_timeout
+import numpy as np
 import pandas as pd
 
 from constants import (
-    TableHeaders, UnitAmenitiesDict, BuildingAmenitiesDict
+    TableHeaders, UnitAmenitiesDict, BuildingAmenitiesDict, PADMAPPER_BASE_URL,
+    PADMAPPER_MAX_CONCURRENCY, DEFAULT_SCRAPE_WORKERS, FETCH_URLS_DEBUGGING_PORT, SCRAPE_LISTINGS_BASE_DEBUGGING_PORT
 )
 
-from constants import (
-    table_columns, TableHeaders, PADMAPPER_BASE_URL
-)
-
-from config import create_chrome_driver
-from scraper import PadmapperScraper
-from selenium.webdriver.chrome.webdriver import WebDriver
+from storage import RawDataset, RAW_SCHEMA, get_dataset_path, write_cleaned_data
+from metrics import Metrics, create_run_metrics
 from datetime import datetime
+from typing import TYPE_CHECKING
+
+# Scraping and history modules (selenium, bs4, lxml, fake_useragent) are imported by the stage that uses them
+# so cleaning a month or importing the parse_* functions does not pay for the scraping stack
+if TYPE_CHECKING:
+    from driver_pool import DriverPool, PooledDriver
+    from journal import ScrapeJournal
+    from fingerprints import FingerprintCache
+    from frontier import ScrapeFrontier
+    from page_archive import PageArchive
+    from rate_limiter import RateLimiter
+    from scraper import PadmapperScraper
 
 #################################### High Level Comments ###################################
 # Used separate drivers for fetching and scraping listing urls
-# Preferred explicitly creating a new driver instance in case previous instance disconnected
+# Scraping drivers are kept alive across urls in a DriverPool and only recycled when crashed or worn out
 # Fetching urls driver visits regional landing pages e.g. https://www.padmapper.com/apartments/toronto-on
-# Scraping urls driver visits each url extracted by fetching urls driver
-
-def extract_raw_data(filepath: str, landing_page_urls: list[str]) -> pd.DataFrame:
+# Scraping urls drivers visit each url extracted by fetching urls driver
+# Listing urls are scraped by a pool of worker threads pulling from a shared queue
+# Each pooled chrome driver owns its own debugging port (base port + worker index)
+# Results are slotted by url position so the output order matches the order urls were extracted
+# With the http fast path, workers first fetch the server-rendered listing page over a pooled requests.Session
+# A driver is only leased from the pool when the summary table or floorplan containers are missing from that HTML
+# Discovered urls and scraped listings are appended to a ScrapeJournal next to the output file
+# Re-running after a crash replays the journal, skipping landing pages and listing urls that are already done
+# Raw units are checkpointed to a Parquet dataset (see storage.py), Excel is only written once as the final export
+# Listings whose landing page tile is unchanged since the last run reuse their cached units (see fingerprints.py)
+# One RateLimiter paces every request of the run, across cities, workers and the http / browser paths (see rate_limiter.py)
+# Fetching and parsing are decoupled: fetch workers only capture the page HTML and put it on a bounded queue
+#   a process pool runs DataExtractor on the pages, so parsing overlaps fetching across cores
+#   and only loading a page counts against PAGE_TIME_LIMIT, its rate limiter token is taken before the limit starts
+# A failed page load, an empty parse or an http page missing its floorplans puts the url back on the queue
+#   a page that timed out or did not render is retried on a healthy driver, only a lost session or a driver
+#   failing its health check counts as a crash and gets the driver recycled
+#   (up to MAX_FETCH_ATTEMPTS browser attempts), so retries go through the same workers
+# A worker hitting an error none of the fetch paths handle reports its url as failed and keeps going,
+#   so the main loop always receives one result per url instead of waiting on an item a dead worker held
+# A page whose parse raised, or that could not be handed to a broken parse pool, is retried the same way and then failed
+# Every fetched page is archived (see page_archive.py) so the run can be re-extracted offline if a selector breaks
+# Each stage (discovery, fetches, parsing, pickling to the parse processes, archive / checkpoint / Excel writes)
+#   is timed into the run's Metrics with counters for retries, timeouts, fallbacks and units per city (see metrics.py)
+# With a frontier (see frontier.py) several workers, on one box or several, drain one run together instead:
+#   landing pages and listing urls are leased from the shared SQLite queue rather than walked city by city,
+#   acked units live in the frontier instead of the journal / checkpoints,
+#   and the last worker out leases the export and writes the raw dataset and Excel file from the frontier
+
+PAGE_TIME_LIMIT = 30
+MAX_FETCH_ATTEMPTS = 3
+PARSE_BACKLOG_PER_WORKER = 2
+LISTING_LEASE_BATCH_PER_DRIVER = 10
+FRONTIER_POLL_INTERVAL = 15
+
+def extract_raw_data(filepath: str, landing_page_urls: list[str], num_workers: int = DEFAULT_SCRAPE_WORKERS, use_http_fast_path: bool = True, journal_filepath: str = None, fingerprint_filepath: str = None, use_network_discovery: bool = False, lean_chrome: bool = True, parse_processes: int = None, archive_path: str = None, rate_limiter: 'RateLimiter' = None, metrics: Metrics = None, frontier_path: str = None, frontier_wal: bool = True) -> pd.DataFrame:
     """
-    Extracts raw rental listing data from provided URLs and saves it to an Excel file.
+    Extracts raw rental listing data from provided URLs, checkpoints it to Parquet and exports it to an Excel file.
 
     Args:
-        filepath (str): The path to save the extracted data Excel file.
+        filepath (str): The path to save the extracted data Excel file, the Parquet dataset is stored alongside it.
         landing_page_urls (list[str]): A list of regional landing page URLs to scrape for rental listings.
+        num_workers (int): Number of concurrent chrome drivers used to scrape listing pages, capped at PADMAPPER_MAX_CONCURRENCY.
+        use_http_fast_path (bool): Whether to try fetching listing pages over HTTP before falling back to the browser.
+        journal_filepath (str): Path of the scrape journal used to resume the run, defaults to the filepath with a .journal extension.
+        fingerprint_filepath (str): Path of the tile fingerprint cache shared across runs, defaults to tile_fingerprints.json next to the filepath.
+        use_network_discovery (bool): Whether to discover listing urls from the search API responses before falling back to scrolling, off until checked against a captured response.
+        lean_chrome (bool): Whether chrome drivers block images, fonts, media and trackers and use eager page loads.
+        parse_processes (int): Number of processes parsing listing pages, defaults to one per worker up to the cpu count.
+        archive_path (str): Directory of the page archive fetched pages are stored in, defaults to page_archive next to the raw data directory.
+        rate_limiter (RateLimiter): Paces every request of the run, defaults to a RateLimiter with the site's politeness limits.
+        metrics (Metrics): Stage timings and counters of the run, defaults to metrics files named after the filepath in data/metrics.
+        frontier_path (str): SQLite frontier shared with other workers of the run, None to scrape the cities one by one on its own.
+        frontier_wal (bool): Whether the frontier uses WAL mode, disable it for a database shared over a network filesystem.
 
     Returns:
-        pd.DataFrame: A DataFrame containing the extracted rental listing data.
+        pd.DataFrame: A DataFrame containing the extracted rental listing data,
+        empty for a frontier worker that finished before the last worker exported the run.
     """
 
-    extracted_listing_data = []
-        
-    for landing_page_url in landing_page_urls:
+    from config import create_chrome_driver
+    from driver_pool import DriverPool
+    from journal import ScrapeJournal
+    from fingerprints import FingerprintCache
+    from frontier import ScrapeFrontier
+    from page_archive import PageArchive, get_archive_path, get_run_name
+    from rate_limiter import RateLimiter
+    from scraper import PadmapperScraper
+
+    num_workers = max(1, min(num_workers, PADMAPPER_MAX_CONCURRENCY))
+
+    total_units = 0
+
+    raw_dataset = RawDataset(get_dataset_path(filepath))
+
+    frontier = ScrapeFrontier(frontier_path, use_wal=frontier_wal) if frontier_path else None
+
+    fingerprint_cache = FingerprintCache(fingerprint_filepath or os.path.join(os.path.dirname(filepath), 'tile_fingerprints.json'))
+
+    rate_limiter = rate_limiter or RateLimiter()
+
+    # Workers draining a shared frontier each keep their own metrics files and page archive index
+    metrics = metrics or create_run_metrics(filepath, worker_id=frontier.worker_id if frontier else None)
+
+    page_archive = PageArchive(archive_path or get_archive_path(filepath), get_run_name(filepath), worker_id=frontier.worker_id if frontier else None)
+
+    # Parse processes shared by all cities, started once since each one imports the scraping modules
+    parse_executor = ProcessPoolExecutor(max_workers=parse_processes or max(1, min(num_workers, os.cpu_count() or 1)))
+
+    # Persistent drivers for extracting data from every extracted rental listing, shared by all cities
+    with metrics.time('driver_pool_start'):
+        driver_pool = DriverPool([SCRAPE_LISTINGS_BASE_DEBUGGING_PORT + worker_index for worker_index in range(num_workers)], lean=lean_chrome, metrics=metrics)
+
+    if frontier:
+        is_exporter = _drain_frontier(frontier, landing_page_urls, raw_dataset, fingerprint_cache, driver_pool, parse_executor, page_archive, rate_limiter, metrics, use_http_fast_path, use_network_discovery, lean_chrome)
+    else:
+        is_exporter = True
+        raw_dataset.reset()
+        scrape_journal = ScrapeJournal(journal_filepath or f"{os.path.splitext(filepath)[0]}.journal")
+
+        for city_index, landing_page_url in enumerate(landing_page_urls):
+
+            print(F"********** Total Listings Extracted: {total_units} **********")
+
+            city = landing_page_url.split('/')[-1]
+            padmapper_scraper = PadmapperScraper(PADMAPPER_BASE_URL, rate_limiter, metrics)
+
+            if landing_page_url in scrape_journal.landing_pages:
+                # Listing urls were already discovered before the previous run stopped
+                padmapper_scraper.urls = list(scrape_journal.landing_pages[landing_page_url])
+                padmapper_scraper.tile_summaries = {url: scrape_journal.tile_summaries.get(url) for url in padmapper_scraper.urls}
+            else:
+                # Initialize web driver for retrieving rental listings from regional landing page
+                with metrics.time('discovery', city=city):
+                    fetch_rental_listings_driver = create_chrome_driver(debugging_port=FETCH_URLS_DEBUGGING_PORT, capture_network=use_network_discovery, lean=lean_chrome) 
+                    padmapper_scraper.fetch_rental_listing_urls(web_driver=fetch_rental_listings_driver, landing_page_url=landing_page_url, use_network_capture=use_network_discovery)
+
+                fetch_rental_listings_driver.quit()
+
+                scrape_journal.record_landing_page(landing_page_url, padmapper_scraper.urls, padmapper_scraper.tile_summaries)
 
-        print(F"********** Total Listings Extracted: {len(extracted_listing_data)} **********")
+            print(f"***** Extracted {len(padmapper_scraper.urls)} listings for {landing_page_url.split('/')[-1]} *****")
+            print("\n".join(padmapper_scraper.urls))
 
-        # Initialize web driver for retrieving rental listings from regional landing page
-        fetch_rental_listings_driver: WebDriver = create_chrome_driver(debugging_port=9221) 
-        padmapper_scraper = PadmapperScraper(PADMAPPER_BASE_URL)
-        padmapper_scraper.fetch_rental_listing_urls(web_driver=fetch_rental_listings_driver, landing_page_url=landing_page_url)
+            unchanged_listings = _get_unchanged_listings(fingerprint_cache, padmapper_scraper, metrics, city)
 
-        fetch_rental_listings_driver.quit()
+            # Scrape page content of scraped listing URLs to get rental listing data 
+            # Every 100 units, the new units are appended to the raw dataset (in case web driver crashes)
+            with metrics.time('scrape_city', city=city):
+                city_listing_data = _scrape_listing_urls(padmapper_scraper, padmapper_scraper.urls, driver_pool, scrape_journal, raw_dataset.checkpoint, parse_executor, page_archive, city_index, use_http_fast_path, unchanged_listings)
 
-        # Initialize web driver for extracting data from every extracted rental listing
-        get_rental_data_driver: WebDriver = create_chrome_driver(debugging_port=9222)
+            _update_fingerprint_cache(fingerprint_cache, padmapper_scraper.urls, padmapper_scraper.tile_summaries, city_listing_data, unchanged_listings)
 
-        current_100_units = []
-        
-        print(f"***** Extracted {len(padmapper_scraper.urls)} listings for {landing_page_url.split('/')[-1]} *****")
-        print(f"{'\n'.join(padmapper_scraper.urls)}")
+            with metrics.time('commit_city'):
+                raw_dataset.commit_city(city_listing_data, city_index)
+            total_units += len(city_listing_data)
+            metrics.increment('units', len(city_listing_data), city=city)
+            metrics.export()
 
-        # Scrape page content of scraped listing URLs to get rental listing data 
-        for url in padmapper_scraper.urls:
+        scrape_journal.close()
+
+    # Close the pooled scraping drivers and the parse processes
+    driver_pool.close()
+    parse_executor.shutdown()
+    page_archive.close()
+    print(f"********** Driver recycles: {driver_pool.recycle_counts()} **********")
+    print(f"********** Request outcomes: {rate_limiter.outcome_counts}, final rates: {rate_limiter.get_rates()} **********")
+
+    if not is_exporter:
+        # The worker that finishes last exports the run
+        print("********** Frontier drained, the run is exported by another worker **********")
+        frontier.close()
+        metrics.print_summary()
+        metrics.close()
+        return RAW_SCHEMA.empty_table().to_pandas()
+
+    with metrics.time('dataset_read'):
+        extracted_listing_data_df = raw_dataset.read()
+    
+    with metrics.time('excel_write'):
+        extracted_listing_data_df.to_excel(filepath, index=False)
+
+    if frontier:
+        frontier.complete_export(len(extracted_listing_data_df))
+        frontier.close()
+
+    metrics.print_summary()
+    metrics.close()
+
+    return extracted_listing_data_df
+
+def _scrape_listing_urls(padmapper_scraper: 'PadmapperScraper', urls: list[str], driver_pool: 'DriverPool', scrape_journal: 'ScrapeJournal', on_checkpoint, parse_executor: ProcessPoolExecutor, page_archive: 'PageArchive', city_index: int, use_http_fast_path: bool = True, unchanged_listings: dict = None, positions: list[int] = None) -> list:
+    """
+    Scrapes listing urls with a pool of fetch workers and parse processes, and merges the results back in url order.
+
+    Args:
+        padmapper_scraper (PadmapperScraper): The scraper shared by all workers.
+        urls (list[str]): Listing URLs to scrape.
+        driver_pool (DriverPool): Pool of persistent chrome drivers, one fetch worker is started per driver.
+        scrape_journal (ScrapeJournal): Journal of listings already scraped, urls found in it are not scraped again.
+        on_checkpoint (Callable[[list], None]): Called with the units scraped since the previous call every 100 units.
+        parse_executor (ProcessPoolExecutor): Processes parsing the fetched pages into units.
+        page_archive (PageArchive): Archive every fetched page is stored in.
+        city_index (int): Position of the city's landing page, recorded with the archived pages.
+        use_http_fast_path (bool): Whether workers try fetching listing pages over HTTP first.
+        unchanged_listings (dict): Listing url -> units carried forward from the fingerprint cache, these urls are not scraped.
+        positions (list[int]): Position of each url among its city's listing urls, recorded with the archived pages, defaults to its index in urls.
+
+    Returns:
+        list: Rental unit data dictionaries for all urls, in url order.
+    """
+    metrics = padmapper_scraper.metrics
+
+    unchanged_listings = unchanged_listings or {}
+
+    # One result slot per url so the merged output keeps the extraction order regardless of which worker finishes first
+    results = [scrape_journal.completed_listings.get(url) or unchanged_listings.get(url) for url in urls]
+
+    # Work items are (index, url, attempt, browser_only), urls are put back for a retry or a browser fallback
+    url_queue = queue.Queue()
+    for index, url in enumerate(urls):
+        if results[index] is None:
+            url_queue.put((index, url, 1, not use_http_fast_path))
+    pending_count = url_queue.qsize()
+
+    fetch_worker_count = min(len(driver_pool), pending_count)
+    max_parse_backlog = PARSE_BACKLOG_PER_WORKER * max(1, fetch_worker_count)
+
+    # Bounded, fetch workers wait here when parsing falls behind instead of holding every page in memory
+    page_queue = queue.Queue(maxsize=max_parse_backlog)
+    workers = [
+        threading.Thread(
+            target=_listing_worker,
+            args=(padmapper_scraper, driver_pool, url_queue, page_queue),
+            daemon=True
+        )
+        for _ in range(fetch_worker_count)
+    ]
+    for worker in workers:
+        worker.start()
+
+    received_count = 0
+    units_since_checkpoint = []
+    parse_futures = {}
+
+    while received_count < pending_count:
+        # Hand fetched pages to the parse processes while the backlog has room
+        while len(parse_futures) < max_parse_backlog:
+            try:
+                work_item, page_content, is_single_unit = page_queue.get(block=not parse_futures, timeout=5)
+            except queue.Empty:
+                break
+            index, url, attempt, browser_only = work_item
+            if page_content is not None:
+                with metrics.time('archive_write'):
+                    page_archive.add_page(url, page_content, is_single_unit, not browser_only, city_index, positions[index] if positions else index)
+                try:
+                    parse_future = parse_executor.submit(_extract_listing_units_timed, page_content, is_single_unit, url, not browser_only)
+                except RuntimeError as e:
+                    # A broken or shut down pool fails this url through the same path as an exception raised while parsing
+                    parse_future = Future()
+                    parse_future.set_exception(e)
+                parse_futures[parse_future] = (work_item, time.perf_counter())
+                continue
+            # Every fetch attempt failed
+            metrics.increment('failed_listings')
+            results[index] = []
+            received_count += 1
+
+        if not parse_futures:
+            # Stop waiting if every worker has exited unexpectedly
+            if received_count < pending_count and page_queue.empty() and not any(worker.is_alive() for worker in workers):
+                print(f"ERROR: All scrape workers exited with {pending_count - received_count} urls remaining")
+                break
+            continue
+
+        done_futures, _ = wait(parse_futures, timeout=1, return_when=FIRST_COMPLETED)
+        for parse_future in done_futures:
+            (index, url, attempt, browser_only), submitted_at = parse_futures.pop(parse_future)
             try:
-                try_count = 0
+                listing_data, parse_time = parse_future.result()
+                # Whatever the round trip took beyond parsing went to pickling, process hand-off and queueing
+                metrics.observe('parse', parse_time)
+                metrics.observe('parse_overhead', max(0.0, time.perf_counter() - submitted_at - parse_time))
+            except Exception as e:
+                # Retried like a failed fetch, e.g. a parse process died and took the pool down with it (BrokenProcessPool)
+                print(f"ERROR: Failed to parse listing {url}: {e!r}")
+                metrics.increment('parse_errors')
+                if attempt < MAX_FETCH_ATTEMPTS:
+                    metrics.increment('retries', reason='parse_error')
+                    url_queue.put((index, url, attempt + 1, browser_only))
+                else:
+                    metrics.increment('failed_listings')
+                    results[index] = []
+                    received_count += 1
+                continue
+
+            if listing_data is None:
+                # Server-rendered page without the summary table or floorplans, only the browser can expand them
+                print(f"Falling back to browser for {url}")
+                metrics.increment('http_fallbacks', reason='missing_content')
+                url_queue.put((index, url, attempt, True))
+                continue
+            if not listing_data and browser_only and attempt < MAX_FETCH_ATTEMPTS:
+                print(f"ERROR: Extracted 0 units on url {url}, retrying...")
+                metrics.increment('retries', reason='empty_parse')
+                url_queue.put((index, url, attempt + 1, True))
+                continue
+
+            padmapper_scraper.add_listing_units(listing_data)
+            results[index] = listing_data
+            received_count += 1
+
+            # Failed urls are not journaled so they are retried when the run is resumed
+            if listing_data:
+                with metrics.time('journal_write'):
+                    scrape_journal.record_listing(url, listing_data)
+
+            units_since_checkpoint += listing_data
+
+            if len(units_since_checkpoint) >= 100:
+                with metrics.time('checkpoint_write'):
+                    on_checkpoint(units_since_checkpoint)
+                units_since_checkpoint = []
 
-                # Max retries for attempting to scrape a url
-                max_retries = 3  
+    # One stop signal per worker, workers wait for retries until then
+    for _ in workers:
+        url_queue.put(None)
+    for worker in workers:
+        worker.join()
+
+    return _merge_ordered_results(results)
+
+def _extract_listing_units_timed(html_content, is_single_unit: bool, url: str, from_http: bool = False) -> tuple:
+    """
+    Runs extract_listing_units in a parse process and measures it there, where the main thread's Metrics can not reach.
+
+    Args:
+        html_content (str | bytes): The HTML content of the listing page.
+        is_single_unit (bool): Whether the listing is a single unit or has multiple units.
+        url (str): URL of the listing page.
+        from_http (bool): Whether the page is server-rendered HTML fetched without a browser.
 
-                while try_count < max_retries:
+    Returns:
+        tuple: The result of extract_listing_units and the seconds it took.
+    """
+    from scraper import extract_listing_units
+
+    started = time.perf_counter()
+    listing_data = extract_listing_units(html_content, is_single_unit, url, from_http)
+    return listing_data, time.perf_counter() - started
+
+def _get_unchanged_listings(fingerprint_cache: 'FingerprintCache', padmapper_scraper: 'PadmapperScraper', metrics: Metrics, city: str) -> dict:
+    """
+    Finds the discovered listings whose tile did not change since the last run, they are not revisited.
+
+    Args:
+        fingerprint_cache (FingerprintCache): Cache shared across runs.
+        padmapper_scraper (PadmapperScraper): The scraper holding the city's urls and tile summaries.
+        metrics (Metrics): Stage timings and counters of the run.
+        city (str): City slug the listings are counted under.
+
+    Returns:
+        dict: Listing url -> units carried forward from the cache.
+    """
+    unchanged_listings = {}
+    for url in padmapper_scraper.urls:
+        unchanged_units = fingerprint_cache.get_unchanged_units(url, padmapper_scraper.tile_summaries.get(url))
+        if unchanged_units:
+            unchanged_listings[url] = unchanged_units
+    print(f"***** Carrying forward {len(unchanged_listings)} unchanged listings, visiting {len(padmapper_scraper.urls) - len(unchanged_listings)} *****")
+    metrics.increment('listings', len(padmapper_scraper.urls), city=city, source='discovered')
+    metrics.increment('listings', len(unchanged_listings), city=city, source='unchanged')
+    return unchanged_listings
+
+def _update_fingerprint_cache(fingerprint_cache: 'FingerprintCache', urls: list[str], tile_summaries: dict, city_listing_data: list, unchanged_listings):
+    """
+    Caches the tile fingerprints and units of the listings visited for a city.
+
+    Args:
+        fingerprint_cache (FingerprintCache): Cache shared across runs.
+        urls (list[str]): The city's listing urls.
+        tile_summaries (dict): Listing url -> summary shown on its landing page tile.
+        city_listing_data (list): Rental unit data dictionaries scraped for the city.
+        unchanged_listings (dict | set): Listing urls that were carried forward, their cache entries keep their original scrape time.
+    """
+    units_by_url = {}
+    for unit in city_listing_data:
+        units_by_url.setdefault(unit[TableHeaders.URL.value], []).append(unit)
+
+    for url in urls:
+        tile_summary = tile_summaries.get(url)
+        if url not in unchanged_listings and tile_summary is not None and url in units_by_url:
+            fingerprint_cache.update(url, tile_summary, units_by_url[url])
+    fingerprint_cache.save()
+
+def _drain_frontier(frontier: 'ScrapeFrontier', landing_page_urls: list[str], raw_dataset: RawDataset, fingerprint_cache: 'FingerprintCache', driver_pool: 'DriverPool', parse_executor: ProcessPoolExecutor, page_archive: 'PageArchive', rate_limiter: 'RateLimiter', metrics: Metrics, use_http_fast_path: bool = True, use_network_discovery: bool = False, lean_chrome: bool = True) -> bool:
+    """
+    Leases landing pages, then batches of listing urls, from the shared frontier until nothing is left, alongside any other workers.
+
+    Args:
+        frontier (ScrapeFrontier): The run's frontier.
+        landing_page_urls (list[str]): Regional landing pages of the run, seeded into the frontier if missing.
+        raw_dataset (RawDataset): Dataset the run is exported to if this worker finishes last.
+        fingerprint_cache (FingerprintCache): Cache shared across runs.
+        driver_pool (DriverPool): Pool of persistent chrome drivers.
+        parse_executor (ProcessPoolExecutor): Processes parsing the fetched pages into units.
+        page_archive (PageArchive): Archive every fetched page is stored in.
+        rate_limiter (RateLimiter): Paces every request of this worker.
+        metrics (Metrics): Stage timings and counters of this worker.
+        use_http_fast_path (bool): Whether listing pages are fetched over HTTP first.
+        use_network_discovery (bool): Whether listing urls are discovered from the search API responses first, off until checked against a captured response.
+        lean_chrome (bool): Whether the discovery driver uses the lean chrome profile.
+
+    Returns:
+        bool: True if this worker exported the run into the raw dataset.
+    """
+    from config import create_chrome_driver
+    from frontier import FrontierJournal, ItemKind
+    from scraper import PadmapperScraper
+
+    frontier.add_landing_pages(landing_page_urls)
+    listing_batch_size = LISTING_LEASE_BATCH_PER_DRIVER * max(1, len(driver_pool))
+
+    while True:
+        leased_landing_page = frontier.lease_landing_page()
+        if leased_landing_page:
+            city_index, landing_page_url = leased_landing_page
+            city = landing_page_url.split('/')[-1]
+            padmapper_scraper = PadmapperScraper(PADMAPPER_BASE_URL, rate_limiter, metrics)
+            try:
+                # Scrolling discovery can outlast a lease, the heartbeat keeps other workers off the landing page
+                with frontier.heartbeat(ItemKind.LANDING.value, [landing_page_url]), metrics.time('discovery', city=city):
+                    fetch_rental_listings_driver = create_chrome_driver(debugging_port=FETCH_URLS_DEBUGGING_PORT, capture_network=use_network_discovery, lean=lean_chrome)
                     try:
-                        # Attempt to scrape url with a 30 second time limit
-                        # If function times out or no data was extracted, retry upto 3 times
-                        # Else, data was retrieved successful, break and exit the loop
-
-                        listing_data = func_timeout.func_timeout(30, padmapper_scraper.get_rental_listing_data, args=(get_rental_data_driver, url))
-                        if len(listing_data) == 0:
-                            print(f"ERROR: Extracted 0 units on url {url}, retrying...")
-                        else:
-                            break
-                    except func_timeout.FunctionTimedOut:
-                        print(f"ERROR: Function timed out on url {url}, retrying...")
+                        padmapper_scraper.fetch_rental_listing_urls(web_driver=fetch_rental_listings_driver, landing_page_url=landing_page_url, use_network_capture=use_network_discovery)
                     finally:
-                        try_count += 1
-                        get_rental_data_driver.quit()
-                        get_rental_data_driver = create_chrome_driver(debugging_port=9222)
-                        get_rental_data_driver.refresh()
-
-                # Every 100 listings, write to the Excel sheet (in case web driver crashes)
-                if len(current_100_units) >= 100:
-                    extracted_listing_data += current_100_units
-                    extracted_listing_data_df = pd.DataFrame(extracted_listing_data, columns=table_columns)
-                    extracted_listing_data_df.to_excel(filepath, index=False)
-                    current_100_units.clear()
-
-                if listing_data:
-                    current_100_units += listing_data
-
-            except:
-                print(f"Error occurred on url: {url}")
+                        fetch_rental_listings_driver.quit()
+            except Exception as e:
+                print(f"ERROR: Discovery failed on {landing_page_url}, handing it back: {e}")
+                frontier.release(ItemKind.LANDING.value, [landing_page_url])
                 continue
 
-        # Append remaining padmapper listings to all listings
-        extracted_listing_data += current_100_units
+            print(f"***** Extracted {len(padmapper_scraper.urls)} listings for {city} *****")
+            unchanged_listings = _get_unchanged_listings(fingerprint_cache, padmapper_scraper, metrics, city)
+            frontier.complete_landing_page(landing_page_url, padmapper_scraper.urls, padmapper_scraper.tile_summaries, unchanged_listings)
+            continue
+
+        leased_listings = frontier.lease_listings(listing_batch_size)
+        if leased_listings:
+            city_index, leased_items = leased_listings
+            positions = [position for position, _ in leased_items]
+            urls = [url for _, url in leased_items]
+            padmapper_scraper = PadmapperScraper(PADMAPPER_BASE_URL, rate_limiter, metrics)
+            # Listings are acked in the frontier as they are scraped, so no checkpoints are needed
+            frontier_journal = FrontierJournal(frontier)
+            with frontier.heartbeat(ItemKind.LISTING.value, urls), metrics.time('scrape_batch'):
+                _scrape_listing_urls(padmapper_scraper, urls, driver_pool, frontier_journal, lambda units: None, parse_executor, page_archive, city_index, use_http_fast_path, positions=positions)
+
+            # Urls that produced no units go back to the queue, possibly for another worker / IP
+            failed_urls = [url for url in urls if url not in frontier_journal.acked_urls]
+            frontier.release(ItemKind.LISTING.value, failed_urls)
+            print(f"********** Frontier: {frontier.get_state_counts()} **********")
+            metrics.export()
+            continue
+
+        if frontier.lease_export():
+            _export_frontier(frontier, raw_dataset, fingerprint_cache, metrics)
+            return True
+        if frontier.is_drained():
+            # Another worker holds (or finished) the export
+            return False
+        # Other workers hold the remaining leases, wait in case one of them expires
+        time.sleep(FRONTIER_POLL_INTERVAL)
+
+def _export_frontier(frontier: 'ScrapeFrontier', raw_dataset: RawDataset, fingerprint_cache: 'FingerprintCache', metrics: Metrics):
+    """
+    Writes every city's acked units from the frontier to the raw dataset and updates the fingerprint cache.
+
+    Args:
+        frontier (ScrapeFrontier): The drained frontier.
+        raw_dataset (RawDataset): Dataset the run is written to.
+        fingerprint_cache (FingerprintCache): Cache shared across runs.
+        metrics (Metrics): Stage timings and counters of the exporting worker.
+    """
+    raw_dataset.reset()
+    for city_result in frontier.get_city_results():
+        listings = city_result['listings']
+        urls = [listing['url'] for listing in listings]
+        city_listing_data = [unit for listing in listings for unit in listing['units']]
+
+        _update_fingerprint_cache(
+            fingerprint_cache, urls, {listing['url']: listing['tile_summary'] for listing in listings}, city_listing_data,
+            {listing['url'] for listing in listings if listing['carried_forward']}
+        )
+
+        with metrics.time('commit_city'):
+            raw_dataset.commit_city(city_listing_data, city_result['city_index'])
+        metrics.increment('units', len(city_listing_data), city=city_result['landing_page_url'].split('/')[-1])
+
+def _merge_ordered_results(results: list) -> list:
+    """
+    Flattens per-url results into a single list of units, skipping urls that have not finished.
 
-        extracted_listing_data_df = pd.DataFrame(extracted_listing_data, columns=table_columns)
+    Args:
+        results (list): One list of unit dictionaries (or None) per url.
 
-        extracted_listing_data_df.to_excel(filepath, index=False)
+    Returns:
+        list: Rental unit data dictionaries in url order.
+    """
+    return [unit for listing_data in results if listing_data for unit in listing_data]
 
-        # Close the get_rental_data_driver
-        get_rental_data_driver.quit()
+def _listing_worker(padmapper_scraper: 'PadmapperScraper', driver_pool: 'DriverPool', url_queue: queue.Queue, page_queue: queue.Queue):
+    """
+    Pulls listing urls off the shared queue and fetches their pages, over HTTP or on a driver leased from the pool.
 
-    extracted_listing_data_df[TableHeaders.DATE.value] = pd.to_datetime(extracted_listing_data_df[TableHeaders.DATE.value], errors='coerce')
-    extracted_listing_data_df[TableHeaders.DATE.value] = extracted_listing_data_df[TableHeaders.DATE.value].fillna(datetime.now())    
-    
-    extracted_listing_data_df.to_excel(filepath, index=False)
+    Args:
+        padmapper_scraper (PadmapperScraper): The scraper shared by all workers.
+        driver_pool (DriverPool): Pool of persistent chrome drivers.
+        url_queue (queue.Queue): Queue of (index, url, attempt, browser_only) work items, None to stop.
+        page_queue (queue.Queue): Queue receiving (work item, page content, is_single_unit) tuples, page content is None if the fetch failed.
+    """
+    from config import create_http_session
+    from selenium.common.exceptions import InvalidSessionIdException, NoSuchElementException, TimeoutException, WebDriverException
 
-    return extracted_listing_data_df
+    metrics = padmapper_scraper.metrics
+
+    # requests.Session is not thread safe, so each worker keeps its own pooled session
+    http_session = None
+
+    while True:
+        work_item = url_queue.get()
+        if work_item is None:
+            break
+        try:
+            index, url, attempt, browser_only = work_item
+
+            if not browser_only:
+                http_session = http_session or create_http_session(base_url=padmapper_scraper.base_url)
+                page_content = padmapper_scraper.get_rental_listing_page_http(http_session, url)
+                if page_content is not None:
+                    # Time blocked here means parsing is the bottleneck
+                    with metrics.time('parse_backpressure'):
+                        page_queue.put((work_item, page_content, False))
+                    continue
+                print(f"Falling back to browser for {url}")
+                metrics.increment('http_fallbacks', reason='fetch_failed')
+                work_item = (index, url, attempt, True)
+
+            with metrics.time('driver_wait'):
+                pooled_driver = driver_pool.acquire()
+            crashed = False
+            retry_reason = None
+            try:
+                listing_page = _fetch_listing_page(padmapper_scraper, pooled_driver, url)
+            except func_timeout.FunctionTimedOut:
+                print(f"ERROR: Function timed out on url {url}")
+                metrics.increment('timeouts', stage='page_time_limit')
+                listing_page = None
+                retry_reason = 'page_time_limit'
+                # The abandoned load may still be running in the browser, the driver is recycled if it cannot be reset
+                crashed = not pooled_driver.reset()
+            except (TimeoutException, NoSuchElementException) as e:
+                # The page never rendered what the scraper waits for, the browser itself is fine
+                print(f"ERROR: Page failed to render on url {url}: {e.__class__.__name__}")
+                metrics.increment('page_failures', error=e.__class__.__name__)
+                listing_page = None
+                retry_reason = 'page_failure'
+            except WebDriverException as e:
+                listing_page = None
+                # Only a lost session or a browser that no longer answers is a crash, other errors fail the page
+                crashed = isinstance(e, InvalidSessionIdException) or not pooled_driver.is_healthy()
+                if crashed:
+                    print(f"ERROR: Chrome driver crashed on url {url}: {e}")
+                    metrics.increment('driver_crashes')
+                else:
+                    print(f"ERROR: Browser error on url {url}: {e}")
+                    metrics.increment('page_failures', error=e.__class__.__name__)
+                    retry_reason = 'page_failure'
+            finally:
+                driver_pool.release(pooled_driver, crashed=crashed)
+            if listing_page is None and not crashed and retry_reason is None:
+                # The page did not load or failed while expanding, each attempt loads it once
+                retry_reason = 'page_load'
+            if retry_reason and attempt < MAX_FETCH_ATTEMPTS:
+                print(f"Retrying {url}...")
+                metrics.increment('retries', reason=retry_reason)
+                url_queue.put((index, url, attempt + 1, True))
+                continue
+            page_content, is_single_unit = listing_page or (None, False)
+            with metrics.time('parse_backpressure'):
+                page_queue.put((work_item, page_content, is_single_unit))
+        except Exception as e:
+            # Anything the fetch paths above do not handle still reports the item, so the main loop never waits on it
+            print(f"ERROR: Scrape worker failed on url {work_item[1]}: {e}")
+            metrics.increment('worker_errors')
+            page_queue.put((work_item, None, False))
+
+    if http_session:
+        http_session.close()
+
+def _fetch_listing_page(padmapper_scraper: 'PadmapperScraper', pooled_driver: 'PooledDriver', url: str):
+    """
+    Loads a single listing page in the browser within the page time limit.
+
+    Args:
+        padmapper_scraper (PadmapperScraper): The scraper used to load the listing.
+        pooled_driver (PooledDriver): The driver leased by the calling worker.
+        url (str): URL of the listing page to scrape.
+
+    Returns:
+        tuple or None: The page source and whether it's a single unit listing, or None if the page could not be loaded.
+    """
+    from selenium.common.exceptions import WebDriverException
+
+    try:
+        # The rate limiter wait (and any block cooldown) happens before the time limit starts
+        padmapper_scraper.acquire(url)
+        # Only loading the page counts against the time limit, parsing happens in the parse processes
+        # One load per attempt, reloads go back through the queue and take their own token outside the limit
+        with padmapper_scraper.metrics.time('browser_fetch'):
+            return func_timeout.func_timeout(PAGE_TIME_LIMIT, padmapper_scraper.get_rental_listing_page, args=(pooled_driver.web_driver, url), kwargs={'acquire': False, 'max_attempts': 1})
+    except (func_timeout.FunctionTimedOut, WebDriverException):
+        raise
+    except Exception:
+        print(f"Error occurred on url: {url}")
+        return None
+    finally:
+        pooled_driver.pages_served += 1
 
 ################## Parsing and validation functions #################
 
@@ -246,9 +776,153 @@ def parse_pets_value(pets_value):
     pets_value = pets_value.lower()
     return 1 if any(pet in pets_value for pet in ['dog', 'cat', 'yes']) else 0
 
+################## Column parsing functions #################
+# Column-at-once versions of the parse_* functions above, used by get_cleaned_data
+# Each reads a whole column with Series.str and pd.to_numeric, missing or unparseable values become NaN
+# The parse_* functions stay the reference for a single value
+
+BED_PATTERN = r'^([+-]?\d+)(?: |$)'
+BATH_PATTERN = r'^ *(?P<full>[+-]?\d+)(?: [^,]*)?(?:, *(?P<half>[+-]?\d+)(?: [^,]*)?)? *$'
+SQFT_PATTERN = r'^([+-]?\d+)(?: |$)'
+PRICE_PATTERN = r'^ *(?P<min>[+-]?\d+) *(?:— *(?P<max>[+-]?\d+) *)?$'
+
+def _to_float(values: pd.Series) -> pd.Series:
+    # Extracted digits as float64, NaN where nothing matched
+    return pd.to_numeric(values, errors='coerce').astype('float64')
+
+def parse_bed_column(bed_column: pd.Series) -> pd.Series:
+    """
+    Parses a column of bed values, see parse_bed_value.
+
+    Args:
+        bed_column (pd.Series): The raw bed values.
+
+    Returns:
+        pd.Series: The number of bedrooms per row, NaN if parsing fails.
+    """
+    bed_text = bed_column.astype('string').str.lower()
+    is_studio = bed_text.str.contains('studio', regex=False).fillna(False).astype(bool)
+    is_bedroom = bed_text.str.contains('bedroom', regex=False).fillna(False).astype(bool) | (is_studio & ~bed_text.str.contains('room', regex=False).fillna(False).astype(bool))
+    bed_counts = _to_float(bed_text.str.extract(BED_PATTERN, expand=False)).mask(is_studio, 0.0)
+    return bed_counts.where(is_bedroom).rename(bed_column.name)
+
+def parse_bath_column(bath_column: pd.Series) -> pd.Series:
+    """
+    Parses a column of bath values, see parse_bath_value.
+
+    Args:
+        bath_column (pd.Series): The raw bath values.
+
+    Returns:
+        pd.Series: The number of bathrooms per row, half baths counted as 0.5, NaN if parsing fails.
+    """
+    bath_counts = bath_column.astype('string').str.extract(BATH_PATTERN)
+    return (_to_float(bath_counts['full']) + 0.5 * _to_float(bath_counts['half']).fillna(0.0)).rename(bath_column.name)
+
+def parse_sqft_column(sqft_column: pd.Series) -> pd.Series:
+    """
+    Parses a column of square footage values, see parse_sqft_value.
+
+    Args:
+        sqft_column (pd.Series): The raw square footage values.
+
+    Returns:
+        pd.Series: The square footage per row, NaN if parsing fails.
+    """
+    sqft_text = sqft_column.astype('string').str.replace(',', '', regex=False)
+    return _to_float(sqft_text.str.extract(SQFT_PATTERN, expand=False)).rename(sqft_column.name)
+
+def parse_price_column(price_column: pd.Series) -> tuple:
+    """
+    Parses a column of prices or price ranges, see parse_price_value.
+
+    Args:
+        price_column (pd.Series): The raw price values.
+
+    Returns:
+        tuple: The minimum, maximum and average price columns, NaN if parsing fails.
+    """
+    price_text = price_column.astype('string').str.replace('$', '', regex=False).str.replace(',', '', regex=False)
+    prices = price_text.str.extract(PRICE_PATTERN)
+    min_price = _to_float(prices['min']).rename(price_column.name)
+    # A single price is its own min, max and average
+    max_price = _to_float(prices['max']).rename(price_column.name).fillna(min_price)
+    return min_price, max_price, (min_price + max_price) / 2
+
+def parse_pets_column(pets_column: pd.Series) -> pd.Series:
+    """
+    Parses a column of pets allowed values, see parse_pets_value.
+
+    Args:
+        pets_column (pd.Series): The raw pets allowed values.
+
+    Returns:
+        pd.Series: 1 if pets are allowed, 0 otherwise.
+    """
+    return pets_column.astype('string').str.lower().str.contains('dog|cat|yes').fillna(False).astype('int64').rename(pets_column.name)
+
+################## Amenity encoding functions #################
+# Amenities are one-hot encoded through a bitmask instead of explode + get_dummies + groupby
+# Each amenity in UnitAmenitiesDict / BuildingAmenitiesDict owns one bit, in the order the dict defines them
+# Raw amenity strings repeat heavily between units of a building, so each distinct string is parsed into a mask once
+# The masks are broadcast to every row by code and expanded straight into int8 columns - the row set is never duplicated
+# Every amenity gets a column even when no unit has it that month, so cleaned files share one schema
+
+def get_amenity_bits(amenities_dict: dict) -> dict:
+    """
+    Assigns one bit per known amenity.
+
+    Args:
+        amenities_dict (dict): UnitAmenitiesDict or BuildingAmenitiesDict.
+
+    Returns:
+        dict: Mapping of amenity name to its bit.
+    """
+    return {amenity: 1 << position for position, amenity in enumerate(amenities_dict)}
+
+def get_amenities_bitmask(amenities: list, amenity_bits: dict) -> int:
+    """
+    Combines a parsed amenity list into a bitmask.
+
+    Args:
+        amenities (list): Amenities returned by parse_unit_amenities / parse_building_amenities, or None.
+        amenity_bits (dict): Mapping of amenity name to its bit.
+
+    Returns:
+        int: The bitmask, 0 if there are no known amenities.
+    """
+    bitmask = 0
+    for amenity in amenities or []:
+        bitmask |= amenity_bits[amenity]
+    return bitmask
+
+def encode_amenities_column(amenities_column: pd.Series, amenities_dict: dict, parse_amenities) -> pd.DataFrame:
+    """
+    One-hot encodes a raw amenities column into one int8 column per known amenity.
+
+    Args:
+        amenities_column (pd.Series): The raw comma separated amenities.
+        amenities_dict (dict): UnitAmenitiesDict or BuildingAmenitiesDict, defines the columns and their order.
+        parse_amenities (function): parse_unit_amenities or parse_building_amenities.
+
+    Returns:
+        pd.DataFrame: One 0 / 1 int8 column per amenity, aligned with the input column.
+    """
+    amenity_bits = get_amenity_bits(amenities_dict)
+    codes, unique_values = pd.factorize(amenities_column)
+
+    # Missing values have code -1, which picks the trailing 0 mask
+    unique_bitmasks = [get_amenities_bitmask(parse_amenities(value), amenity_bits) for value in unique_values]
+    bitmasks = np.array(unique_bitmasks + [0], dtype='int64')[codes]
+
+    return pd.DataFrame(
+        {amenity: ((bitmasks & bit) != 0).astype('int8') for amenity, bit in amenity_bits.items()},
+        index=amenities_column.index
+    )
+
 def get_raw_df(raw_filepath: str) -> pd.DataFrame:
     """
-    Reads a raw Excel file and returns it as a DataFrame.
+    Reads the raw data for an Excel path, preferring the Parquet dataset stored alongside it.
 
     Args:
         raw_filepath (str): The path to the raw data Excel file.
@@ -256,43 +930,48 @@ def get_raw_df(raw_filepath: str) -> pd.DataFrame:
     Returns:
         pd.DataFrame: A DataFrame containing the raw data.
     """
+    raw_dataset_path = get_dataset_path(raw_filepath)
+    if os.path.isdir(raw_dataset_path):
+        return RawDataset(raw_dataset_path).read()
+    # Months scraped before the Parquet stage only have the Excel file
     return pd.read_excel(raw_filepath)
 
-def get_cleaned_data(df):
+def get_cleaned_data(df, metrics: Metrics = None):
     """
     Cleans and processes the raw data DataFrame.
 
     Args:
         df (pd.DataFrame): The raw data DataFrame.
+        metrics (Metrics): Records the time spent on each cleaning step, optional.
 
     Returns:
         pd.DataFrame: A cleaned and processed DataFrame.
     """
-    df[TableHeaders.BED.value] = df[TableHeaders.BED.value].apply(parse_bed_value)
-    df[TableHeaders.BATH.value] = df[TableHeaders.BATH.value].apply(parse_bath_value)
-    df[TableHeaders.SQFT.value] = df[TableHeaders.SQFT.value].apply(parse_sqft_value)
+    metrics = metrics or Metrics()
 
-    price_parsed = df[TableHeaders.PRICE.value].apply(parse_price_value)
-    df[TableHeaders.PRICE.value] = price_parsed.apply(lambda x: x[2]) 
-    df['Min Price'] = price_parsed.apply(lambda x: x[0])
-    df['Max Price'] = price_parsed.apply(lambda x: x[1])
+    with metrics.time('clean', step='bed_bath_sqft'):
+        df[TableHeaders.BED.value] = parse_bed_column(df[TableHeaders.BED.value])
+        df[TableHeaders.BATH.value] = parse_bath_column(df[TableHeaders.BATH.value])
+        df[TableHeaders.SQFT.value] = parse_sqft_column(df[TableHeaders.SQFT.value])
 
-    df[TableHeaders.PETS.value] = df[TableHeaders.PETS.value].apply(parse_pets_value)
-    df[TableHeaders.BUILDING_AMENITIES.value] = df[TableHeaders.BUILDING_AMENITIES.value].apply(parse_building_amenities)
-    df[TableHeaders.UNIT_AMENITIES.value] = df[TableHeaders.UNIT_AMENITIES.value].apply(parse_unit_amenities)
+    with metrics.time('clean', step='price'):
+        min_price, max_price, avg_price = parse_price_column(df[TableHeaders.PRICE.value])
+        df[TableHeaders.PRICE.value] = avg_price
+        df['Min Price'] = min_price
+        df['Max Price'] = max_price
 
-    # Flatten out the building amenities into one-hot encoded columns
-    df_exploded = df.explode(TableHeaders.BUILDING_AMENITIES.value)
-    dummies = pd.get_dummies(df_exploded, columns=[TableHeaders.BUILDING_AMENITIES.value], prefix='', prefix_sep='', dtype=int)
-    df = dummies.groupby(dummies.index).max()
+    with metrics.time('clean', step='pets'):
+        df[TableHeaders.PETS.value] = parse_pets_column(df[TableHeaders.PETS.value])
 
-    # Flatten out the unit amenities into one-hot encoded columns
-    df_exploded = df.explode(TableHeaders.UNIT_AMENITIES.value)
-    dummies = pd.get_dummies(df_exploded, columns=[TableHeaders.UNIT_AMENITIES.value], prefix='', prefix_sep='', dtype=int)
-    df = dummies.groupby(dummies.index).max()
+    # Flatten out the building and unit amenities into one-hot encoded columns
+    with metrics.time('clean', step='amenities'):
+        building_amenities = encode_amenities_column(df.pop(TableHeaders.BUILDING_AMENITIES.value), BuildingAmenitiesDict, parse_building_amenities)
+        unit_amenities = encode_amenities_column(df.pop(TableHeaders.UNIT_AMENITIES.value), UnitAmenitiesDict, parse_unit_amenities)
+        df = pd.concat([df, building_amenities, unit_amenities], axis=1)
 
-    df[TableHeaders.DATE.value] = pd.to_datetime(df[TableHeaders.DATE.value], errors='coerce').fillna(datetime.now())
-    df[TableHeaders.DATE.value] = df[TableHeaders.DATE.value].dt.strftime("%b %Y")
+    with metrics.time('clean', step='date'):
+        df[TableHeaders.DATE.value] = pd.to_datetime(df[TableHeaders.DATE.value], errors='coerce').fillna(datetime.now())
+        df[TableHeaders.DATE.value] = df[TableHeaders.DATE.value].dt.strftime("%b %Y")
 
     # Reorder columns to ensure price columns are together
     price_index = df.columns.get_loc(TableHeaders.PRICE.value)
@@ -315,21 +994,39 @@ def get_cleaned_data(df):
     na_columns_to_drop = [TableHeaders.BUILDING.value, TableHeaders.CITY.value, TableHeaders.BED.value, TableHeaders.BATH.value, TableHeaders.SQFT.value, TableHeaders.PRICE.value] 
 
     # Remove nulls
+    raw_row_count = len(df)
     df.dropna(subset=na_columns_to_drop, inplace=True)
+    metrics.increment('rows_dropped', raw_row_count - len(df), reason='missing_values')
 
     return df
 
-def get_cleaned_df(raw_filepath: str, cleaned_filepath: str) -> pd.DataFrame:
+def get_cleaned_df(raw_filepath: str, cleaned_filepath: str, metrics: Metrics = None) -> pd.DataFrame:
     """
     Processes raw data from a file and saves the cleaned data to a new file.
 
     Args:
         raw_filepath (str): The path to the raw data file.
         cleaned_filepath (str): The path to save the cleaned data file.
+        metrics (Metrics): Stage timings of the run, defaults to metrics files named after the cleaned_filepath in data/metrics.
 
     Returns:
         pd.DataFrame: A DataFrame containing the cleaned data.
     """
-    cleaned_df = get_cleaned_data(get_raw_df(raw_filepath))
-    cleaned_df.to_excel(cleaned_filepath, index=False)
+    from history import ListingHistory, get_history_path
+    from rollups import RentCube, get_rollup_path
+
+    metrics = metrics or create_run_metrics(cleaned_filepath)
+
+    with metrics.time('raw_read'):
+        raw_df = get_raw_df(raw_filepath)
+    cleaned_df = get_cleaned_data(raw_df, metrics)
+    with metrics.time('cleaned_write'):
+        write_cleaned_data(cleaned_df, cleaned_filepath)
+    # Add the month to the multi-month history, replacing it if the month was cleaned before
+    with metrics.time('history_append'):
+        ListingHistory(get_history_path(cleaned_filepath)).append(cleaned_df)
+    # Replace the month's rollup cells, reports read the rollups instead of unit rows
+    with metrics.time('rollup_update'):
+        RentCube(get_rollup_path(cleaned_filepath)).update(cleaned_df)
+    metrics.close()
     return cleaned_df
\ No newline at end of file
@@ -0,0 +1,291 @@
+import os
+import re
+import glob
+import shutil
+import argparse
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from urllib.parse import quote
+
+from constants import (
+    TableHeaders, UnitAmenitiesDict, BuildingAmenitiesDict
+)
+from buildings import BuildingIndex, BUILDING_ID_COLUMN, get_building_index_path
+
+#################################### High Level Comments ###################################
+# Multi-month store of cleaned listings so trends can be read without loading every monthly workbook
+# Partitioned by City and scrape month e.g. data/history/City=Toronto/Month=2024-05/listings.parquet
+# A month is replaced whole when it is written again, so re-cleaning a month never duplicates rows
+#   partitions of cities missing from the new data are removed with their index rows, after the new index is written
+# Every row gets a stable Building Id from the building index (see buildings.py) as it is appended
+# Rows in a partition are sorted by Building Id then Url, so Parquet row group statistics skip unrelated rows
+# _index.parquet maps every Url / Building / Building Id to the partitions holding it
+#   one building's history or one url's history only opens the partitions listed in the index
+# Every partition shares HISTORY_SCHEMA, missing amenity columns from older months are stored as 0
+
+PARTITION_FILENAME = 'listings.parquet'
+INDEX_FILENAME = '_index.parquet'
+MONTH_COLUMN = 'Month'
+PARTITION_COLUMN = 'Partition'
+
+CLEANED_FLOAT_COLUMNS = [
+    TableHeaders.BED.value, TableHeaders.BATH.value, TableHeaders.SQFT.value,
+    'Min Price', 'Max Price', TableHeaders.PRICE.value,
+    TableHeaders.LAT.value, TableHeaders.LON.value
+]
+CLEANED_FLAG_COLUMNS = [TableHeaders.PETS.value] + list(BuildingAmenitiesDict) + list(UnitAmenitiesDict)
+CLEANED_TEXT_COLUMNS = [
+    TableHeaders.BUILDING.value, TableHeaders.NEIGHBOURHOOD.value, TableHeaders.ADDRESS.value,
+    TableHeaders.CITY.value, TableHeaders.LISTING.value, TableHeaders.DATE.value, TableHeaders.URL.value,
+    BUILDING_ID_COLUMN
+]
+
+HISTORY_SCHEMA = pa.schema(
+    [(column, pa.string()) for column in CLEANED_TEXT_COLUMNS]
+    + [(column, pa.float64()) for column in CLEANED_FLOAT_COLUMNS]
+    + [(column, pa.int8()) for column in CLEANED_FLAG_COLUMNS]
+    + [(MONTH_COLUMN, pa.string())]
+)
+
+INDEX_SCHEMA = pa.schema([
+    (TableHeaders.URL.value, pa.string()),
+    (TableHeaders.BUILDING.value, pa.string()),
+    (BUILDING_ID_COLUMN, pa.string()),
+    (TableHeaders.CITY.value, pa.string()),
+    (MONTH_COLUMN, pa.string()),
+    (PARTITION_COLUMN, pa.string())
+])
+
+# Cleaned files are named MM-YYYY_cleaned_listings.xlsx, early runs used DD-MM-YYYY
+CLEANED_FILENAME_PATTERN = re.compile(r'^(?:(\d{2})-)?(\d{2})-(\d{4})_')
+
+def get_history_path(cleaned_filepath: str) -> str:
+    """
+    Returns the history directory shared by every cleaned file in a data directory.
+
+    Args:
+        cleaned_filepath (str): Path of a cleaned Excel file e.g. data/cleaned_data/06-2024_cleaned_listings.xlsx.
+
+    Returns:
+        str: The history directory e.g. data/history.
+    """
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(cleaned_filepath))), 'history')
+
+def get_scrape_month(dates: pd.Series, default_month: str = None) -> pd.Series:
+    """
+    Converts cleaned Date values (e.g. 'Jun 2024') into partition months (e.g. '2024-06').
+
+    Args:
+        dates (pd.Series): The cleaned Date column.
+        default_month (str): Month used for dates that cannot be parsed.
+
+    Returns:
+        pd.Series: The scrape month of each row.
+    """
+    months = pd.to_datetime(dates, format='%b %Y', errors='coerce').dt.strftime('%Y-%m')
+    return months.fillna(default_month) if default_month else months
+
+class ListingHistory():
+    """
+    Parquet store of cleaned listings partitioned by City and scrape month.
+
+    Attributes:
+        history_path (str): Directory holding the partitions and the index.
+        building_index (BuildingIndex): Stable ids of the stored buildings, kept in the same directory.
+    """
+    def __init__(self, history_path: str, building_index: BuildingIndex = None):
+        self.history_path = history_path
+        self.building_index = building_index or BuildingIndex(get_building_index_path(history_path))
+
+    def append(self, cleaned_df: pd.DataFrame, default_month: str = None):
+        """
+        Writes cleaned listings, replacing every partition of the months they cover.
+
+        Args:
+            cleaned_df (pd.DataFrame): Output of get_cleaned_data.
+            default_month (str): Month (YYYY-MM) used for rows whose Date cannot be parsed.
+        """
+        history_df = self._to_history_df(cleaned_df, default_month)
+        if history_df.empty:
+            return
+
+        history_df[BUILDING_ID_COLUMN] = self.building_index.assign_building_ids(history_df, history_df[MONTH_COLUMN])
+        self.building_index.save()
+
+        index_frames = []
+        for (city, month), partition_df in history_df.groupby([TableHeaders.CITY.value, MONTH_COLUMN], sort=False):
+            partition = self._partition(city, month)
+            partition_df = partition_df.sort_values([BUILDING_ID_COLUMN, TableHeaders.URL.value], kind='stable')
+            self._write_table(
+                pa.Table.from_pandas(partition_df, schema=HISTORY_SCHEMA, preserve_index=False),
+                os.path.join(self.history_path, partition, PARTITION_FILENAME)
+            )
+
+            index_df = partition_df[[TableHeaders.URL.value, TableHeaders.BUILDING.value, BUILDING_ID_COLUMN, TableHeaders.CITY.value, MONTH_COLUMN]].drop_duplicates()
+            index_frames.append(index_df.assign(**{PARTITION_COLUMN: partition}))
+            print(f"Stored {len(partition_df)} listings for {city} {month} in history")
+
+        new_index_df = pd.concat(index_frames, ignore_index=True)
+        months = new_index_df[MONTH_COLUMN].unique()
+        index_df = self._read_index()
+        index_df = index_df[~index_df[MONTH_COLUMN].isin(months)]
+        self._write_table(
+            pa.Table.from_pandas(pd.concat([index_df, new_index_df], ignore_index=True), schema=INDEX_SCHEMA, preserve_index=False),
+            os.path.join(self.history_path, INDEX_FILENAME)
+        )
+
+        # The index no longer points at them, a crash before this only leaves unread directories behind
+        for stale_partition in self._month_partitions(months) - set(new_index_df[PARTITION_COLUMN]):
+            shutil.rmtree(os.path.join(self.history_path, stale_partition))
+            print(f"Removed {stale_partition} from history, its city is not in the new data")
+
+    def read(self, cities: list[str] = None, months: list[str] = None) -> pd.DataFrame:
+        """
+        Reads listings for the given cities and months, only opening the matching partitions.
+
+        Args:
+            cities (list[str]): Cities to read, every city if None.
+            months (list[str]): Months (YYYY-MM) to read, every month if None.
+
+        Returns:
+            pd.DataFrame: The stored listings.
+        """
+        index_df = self._read_index()
+        if cities is not None:
+            index_df = index_df[index_df[TableHeaders.CITY.value].isin(cities)]
+        if months is not None:
+            index_df = index_df[index_df[MONTH_COLUMN].isin(months)]
+        return self._read_partitions(index_df[PARTITION_COLUMN].unique())
+
+    def read_building(self, building: str) -> pd.DataFrame:
+        """
+        Reads every stored month of one building.
+
+        Args:
+            building (str): The building name.
+
+        Returns:
+            pd.DataFrame: The building's listings across months.
+        """
+        return self._read_indexed(TableHeaders.BUILDING.value, building)
+
+    def read_building_id(self, building_id: str) -> pd.DataFrame:
+        """
+        Reads every stored month of one building across name, url and address changes.
+
+        Args:
+            building_id (str): The building's id in the building index.
+
+        Returns:
+            pd.DataFrame: The building's listings across months.
+        """
+        return self._read_indexed(BUILDING_ID_COLUMN, building_id)
+
+    def read_address(self, address: str, latitude=None, longitude=None) -> pd.DataFrame:
+        """
+        Reads every stored month of the building at an address, however the address was spelled.
+
+        Args:
+            address (str): Listing address.
+            latitude: Listing latitude, used if the address spelling was never stored.
+            longitude: Listing longitude.
+
+        Returns:
+            pd.DataFrame: The building's listings across months, empty if the building is not indexed.
+        """
+        building_id = self.building_index.find(address, latitude, longitude)
+        return self.read_building_id(building_id) if building_id else self._read_partitions([])
+
+    def read_url(self, url: str) -> pd.DataFrame:
+        """
+        Reads every stored month of one listing url.
+
+        Args:
+            url (str): The listing URL.
+
+        Returns:
+            pd.DataFrame: The listing's units across months.
+        """
+        return self._read_indexed(TableHeaders.URL.value, url)
+
+    def import_excel_files(self, cleaned_filepaths: list[str]):
+        """
+        Imports cleaned monthly workbooks written before the history store existed.
+
+        Files are imported oldest scrape first, so a later scrape of the same month replaces an earlier one.
+
+        Args:
+            cleaned_filepaths (list[str]): Paths of cleaned Excel files.
+        """
+        def scrape_date(cleaned_filepath: str) -> tuple:
+            match = CLEANED_FILENAME_PATTERN.match(os.path.basename(cleaned_filepath))
+            if not match:
+                return (0, 0, 0)
+            day, month, year = match.groups()
+            return (int(year), int(month), int(day or 0))
+
+        for cleaned_filepath in sorted(cleaned_filepaths, key=scrape_date):
+            year, month, _ = scrape_date(cleaned_filepath)
+            print(f"Importing {cleaned_filepath} into history")
+            self.append(pd.read_excel(cleaned_filepath), default_month=f"{year:04d}-{month:02d}" if year else None)
+
+    def _to_history_df(self, cleaned_df: pd.DataFrame, default_month: str) -> pd.DataFrame:
+        # Older months are missing amenities nobody had that month and stored flags as int64
+        history_df = cleaned_df.reindex(columns=CLEANED_TEXT_COLUMNS + CLEANED_FLOAT_COLUMNS + CLEANED_FLAG_COLUMNS)
+        for column in CLEANED_TEXT_COLUMNS:
+            history_df[column] = history_df[column].map(lambda x: None if pd.isna(x) else str(x))
+        for column in CLEANED_FLOAT_COLUMNS:
+            history_df[column] = pd.to_numeric(history_df[column], errors='coerce').astype('float64')
+        for column in CLEANED_FLAG_COLUMNS:
+            history_df[column] = history_df[column].fillna(0).astype('int8')
+        history_df[MONTH_COLUMN] = get_scrape_month(history_df[TableHeaders.DATE.value], default_month)
+        return history_df.dropna(subset=[TableHeaders.CITY.value, MONTH_COLUMN])
+
+    def _partition(self, city: str, month: str) -> str:
+        return os.path.join(f"City={quote(city, safe='')}", f"Month={month}")
+
+    def _month_partitions(self, months: list[str]) -> set:
+        # Every city's partition directory of the months, whether or not the index lists it
+        return {
+            os.path.relpath(partition_path, self.history_path)
+            for month in months
+            for partition_path in glob.glob(os.path.join(glob.escape(self.history_path), 'City=*', f'Month={month}'))
+            if os.path.isdir(partition_path)
+        }
+
+    def _read_index(self) -> pd.DataFrame:
+        index_path = os.path.join(self.history_path, INDEX_FILENAME)
+        if not os.path.exists(index_path):
+            return INDEX_SCHEMA.empty_table().to_pandas()
+        return pq.read_table(index_path, schema=INDEX_SCHEMA).to_pandas()
+
+    def _read_indexed(self, column: str, value: str) -> pd.DataFrame:
+        index_path = os.path.join(self.history_path, INDEX_FILENAME)
+        if not os.path.exists(index_path):
+            return self._read_partitions([])
+        partitions = pq.read_table(index_path, columns=[PARTITION_COLUMN], filters=[(column, '=', value)]).column(PARTITION_COLUMN).unique()
+        return self._read_partitions(partitions.to_pylist(), filters=[(column, '=', value)])
+
+    def _read_partitions(self, partitions: list[str], filters: list = None) -> pd.DataFrame:
+        tables = [
+            pq.read_table(os.path.join(self.history_path, partition, PARTITION_FILENAME), schema=HISTORY_SCHEMA, filters=filters)
+            for partition in sorted(partitions)
+        ]
+        if not tables:
+            return HISTORY_SCHEMA.empty_table().to_pandas()
+        return pa.concat_tables(tables).to_pandas()
+
+    def _write_table(self, table: pa.Table, path: str):
+        # Write to a temporary file first so a crash never leaves a truncated partition or index behind
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pq.write_table(table, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import cleaned monthly workbooks into the listing history store.')
+    parser.add_argument('--cleaned-dir', default=os.path.join('data', 'cleaned_data'), help='Directory holding *_cleaned_listings.xlsx files')
+    parser.add_argument('--history-dir', default=os.path.join('data', 'history'), help='History store directory')
+    args = parser.parse_args()
+
+    ListingHistory(args.history_dir).import_excel_files(glob.glob(os.path.join(args.cleaned_dir, '*.xlsx')))
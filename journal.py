@@ -0,0 +1,123 @@
+import json
+import os
+import struct
+import threading
+import zlib
+
+#################################### High Level Comments ###################################
+# Append-only scrape journal used to resume a run after a crash
+# Each record is framed as: 4 byte payload length | 4 byte crc32 of payload | utf-8 JSON payload
+# Records are only appended, so the cost of writing a listing does not grow with the size of the run
+# Records are fsync'd in batches of FSYNC_BATCH_SIZE - a crash loses at most one batch of listings
+# On open, the journal is replayed and a torn / corrupt tail (from a crash mid-write) is truncated
+# Two record types:
+#   landing - the listing urls (and their tile summaries) discovered on a landing page, so discovery is skipped on resume
+#   listing - the units extracted from a listing url, so the url is skipped on resume
+
+FSYNC_BATCH_SIZE = 20
+
+RECORD_HEADER = struct.Struct('>II')
+
+class ScrapeJournal():
+    """
+    Append-only journal of landing pages discovered and listing urls scraped during a run.
+
+    Attributes:
+        filepath (str): Path of the journal file.
+        landing_pages (dict): Landing page url -> listing urls discovered on it.
+        tile_summaries (dict): Listing url -> summary shown on its landing page tile.
+        completed_listings (dict): Listing url -> rental unit data dictionaries extracted from it.
+    """
+    def __init__(self, filepath: str, fsync_batch_size: int = FSYNC_BATCH_SIZE):
+        self.filepath = filepath
+        self.fsync_batch_size = fsync_batch_size
+        self.landing_pages = {}
+        self.tile_summaries = {}
+        self.completed_listings = {}
+        self._unsynced_records = 0
+        self._lock = threading.Lock()
+
+        valid_length = self._replay()
+        self._file = open(self.filepath, 'ab')
+        # Drop a partially written tail so new records start on a frame boundary
+        self._file.truncate(valid_length)
+
+        if self.completed_listings:
+            print(f"Resuming from journal {self.filepath}: {len(self.landing_pages)} landing pages, {len(self.completed_listings)} listings already scraped")
+
+    def _replay(self) -> int:
+        """
+        Loads every intact record from the journal file.
+
+        Returns:
+            int: Length in bytes of the intact prefix of the file.
+        """
+        if not os.path.exists(self.filepath):
+            return 0
+
+        valid_length = 0
+        with open(self.filepath, 'rb') as file:
+            while True:
+                header = file.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                payload_length, checksum = RECORD_HEADER.unpack(header)
+                payload = file.read(payload_length)
+                if len(payload) < payload_length or zlib.crc32(payload) != checksum:
+                    print(f"Journal {self.filepath} has a corrupt record at byte {valid_length}, ignoring the rest")
+                    break
+                self._apply(json.loads(payload.decode('utf-8')))
+                valid_length += RECORD_HEADER.size + payload_length
+        return valid_length
+
+    def _apply(self, record: dict):
+        if record['type'] == 'landing':
+            self.landing_pages[record['landing_page_url']] = record['urls']
+            self.tile_summaries.update(record.get('tiles', {}))
+        elif record['type'] == 'listing':
+            self.completed_listings[record['url']] = record['units']
+
+    def _append(self, record: dict):
+        payload = json.dumps(record, default=str).encode('utf-8')
+        with self._lock:
+            self._file.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            self._apply(record)
+            self._unsynced_records += 1
+            if self._unsynced_records >= self.fsync_batch_size:
+                self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced_records = 0
+
+    def record_landing_page(self, landing_page_url: str, urls: list[str], tile_summaries: dict = None):
+        """
+        Records the listing urls discovered on a landing page.
+
+        Args:
+            landing_page_url (str): The regional landing page URL.
+            urls (list[str]): Listing URLs extracted from it.
+            tile_summaries (dict): Listing url -> summary shown on its landing page tile.
+        """
+        self._append({'type': 'landing', 'landing_page_url': landing_page_url, 'urls': urls, 'tiles': tile_summaries or {}})
+        # Discovery is expensive, make sure it is on disk before scraping starts
+        self.flush()
+
+    def record_listing(self, url: str, units: list[dict]):
+        """
+        Records the units extracted from a listing url.
+
+        Args:
+            url (str): URL of the listing page.
+            units (list[dict]): Rental unit data dictionaries extracted from the listing.
+        """
+        self._append({'type': 'listing', 'url': url, 'units': units})
+
+    def flush(self):
+        with self._lock:
+            self._sync()
+
+    def close(self):
+        self.flush()
+        self._file.close()
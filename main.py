@@ -3,6 +3,9 @@ from functions import (
     get_cleaned_df
 )
 
+from constants import DEFAULT_SCRAPE_WORKERS, LANDING_PAGE_URLS
+from metrics import create_run_metrics
+
 import os
 from datetime import datetime
 
@@ -15,22 +18,21 @@ cleaned_data_files = os.listdir(os.path.join('data', 'cleaned_data'))
 raw_filepath = f"{current_dir}/data/raw_data/{current_timestamp}_raw_listings.xlsx"
 cleaned_filepath = f"{current_dir}/data/cleaned_data/{current_timestamp}_cleaned_listings.xlsx"
 
-try:
-    extract_raw_data(
-        filepath=raw_filepath,
-        landing_page_urls=[
-            "https://www.padmapper.com/apartments/vancouver-bc",
-            "https://www.padmapper.com/apartments/winnipeg-mb",
-            "https://www.padmapper.com/apartments/toronto-on",
-            "https://www.padmapper.com/apartments/ottawa-on",
-            "https://www.padmapper.com/apartments/montreal-qc",
-            "https://www.padmapper.com/apartments/edmonton-ab",
-        ]
-    )
-
-    cleaned_data_df = get_cleaned_df(
-        raw_filepath=raw_filepath, cleaned_filepath=cleaned_filepath
-    )
-except Exception as e:
-    print("An error occurred while extracting data:", e)
-    exit()
\ No newline at end of file
+# Listing pages are parsed in worker processes, which re-import this module when processes are spawned (e.g. on Windows)
+if __name__ == '__main__':
+    # Scraping and cleaning share one set of metrics files for the month
+    run_metrics = create_run_metrics(raw_filepath)
+    try:
+        extract_raw_data(
+            filepath=raw_filepath,
+            landing_page_urls=LANDING_PAGE_URLS,
+            num_workers=DEFAULT_SCRAPE_WORKERS,
+            metrics=run_metrics
+        )
+
+        cleaned_data_df = get_cleaned_df(
+            raw_filepath=raw_filepath, cleaned_filepath=cleaned_filepath, metrics=run_metrics
+        )
+    except Exception as e:
+        print("An error occurred while extracting data:", e)
+        exit()
\ No newline at end of file
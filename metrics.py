@@ -0,0 +1,233 @@
+from contextlib import contextmanager
+from datetime import datetime
+import threading
+import json
+import time
+import os
+
+#################################### High Level Comments ###################################
+# Stage timings and counters for the hot paths of a run (scraper, extract_raw_data, get_cleaned_data)
+# Every observation is appended to a JSON lines file as it happens, so a crashed run still shows where its time went
+#   e.g. {"time": "...", "run": "06-2024_raw_listings", "type": "timing", "name": "page_load", "labels": {}, "value": 2.41}
+# Totals per stage / counter are written to a Prometheus textfile (node_exporter textfile collector format)
+#   every EXPORT_INTERVAL seconds and when the run ends, replaced atomically so a scrape never reads half a file
+# Both files are named after the run's output file, in data/metrics next to the raw / cleaned data directories
+# A Metrics created without file paths only aggregates in memory, so library callers pay nothing for files
+
+METRIC_PREFIX = 'padmapper'
+EXPORT_INTERVAL = 30
+
+def get_metrics_path(filepath: str) -> str:
+    """
+    Returns the directory run metrics are written to, next to the raw / cleaned data directories.
+
+    Args:
+        filepath (str): Path of a raw data Excel file e.g. data/raw_data/06-2024_raw_listings.xlsx.
+
+    Returns:
+        str: The metrics directory e.g. data/metrics.
+    """
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(filepath))), 'metrics')
+
+def create_run_metrics(filepath: str, metrics_path: str = None, worker_id: str = None) -> 'Metrics':
+    """
+    Creates the metrics of a run, writing <run>.jsonl and <run>.prom.
+
+    Args:
+        filepath (str): Path of the run's raw or cleaned data Excel file, the run is named after it.
+        metrics_path (str): Directory the metrics files are written to, defaults to data/metrics.
+        worker_id (str): Worker of a run drained by several workers, each worker writes its own <run>-<worker>.* files.
+
+    Returns:
+        Metrics: Metrics streaming to the run's files.
+    """
+    run_name = os.path.splitext(os.path.basename(filepath))[0]
+    file_name = f"{run_name}-{worker_id}" if worker_id else run_name
+    metrics_path = metrics_path or get_metrics_path(filepath)
+    return Metrics(run_name, os.path.join(metrics_path, f"{file_name}.jsonl"), os.path.join(metrics_path, f"{file_name}.prom"))
+
+class StageTiming():
+    """
+    Aggregated durations of one stage and label set.
+
+    Attributes:
+        count (int): Number of observations.
+        total (float): Sum of the observed durations, in seconds.
+        max (float): Longest observed duration, in seconds.
+    """
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+class Metrics():
+    """
+    Thread safe stage timings and counters shared by every worker of a run.
+
+    Attributes:
+        run_name (str): Name of the run, added as a label to every exported metric.
+        jsonl_filepath (str): JSON lines file each observation is appended to, None to keep them in memory only.
+        prometheus_filepath (str): Prometheus textfile the totals are written to, None to skip it.
+    """
+    def __init__(self, run_name: str = '', jsonl_filepath: str = None, prometheus_filepath: str = None):
+        self.run_name = run_name
+        self.jsonl_filepath = jsonl_filepath
+        self.prometheus_filepath = prometheus_filepath
+        self._timings = {}
+        self._counters = {}
+        self._jsonl_file = None
+        self._last_export = time.monotonic()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def time(self, stage: str, **labels):
+        """
+        Times the body of a with block as one observation of the stage, whether or not it raises.
+
+        Args:
+            stage (str): Name of the stage e.g. page_load.
+            **labels: Extra labels e.g. city='toronto-on'.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started, **labels)
+
+    def observe(self, stage: str, seconds: float, **labels):
+        """
+        Records a duration measured by the caller, e.g. in a worker process.
+
+        Args:
+            stage (str): Name of the stage.
+            seconds (float): Duration of the stage.
+            **labels: Extra labels.
+        """
+        key = (stage, self._label_key(labels))
+        with self._lock:
+            self._timings.setdefault(key, StageTiming()).add(seconds)
+            self._write_event('timing', stage, labels, seconds)
+
+    def increment(self, counter: str, amount: int = 1, **labels):
+        """
+        Adds to a counter.
+
+        Args:
+            counter (str): Name of the counter e.g. retries.
+            amount (int): Amount added.
+            **labels: Extra labels e.g. reason='timeout'.
+        """
+        key = (counter, self._label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+            self._write_event('counter', counter, labels, amount)
+
+    def get_summary(self) -> dict:
+        """
+        Returns the totals recorded so far.
+
+        Returns:
+            dict: 'timings' maps (stage, labels) to count / total / max seconds, 'counters' maps (counter, labels) to its value.
+        """
+        with self._lock:
+            return {
+                'timings': {key: {'count': timing.count, 'total': round(timing.total, 3), 'max': round(timing.max, 3)} for key, timing in self._timings.items()},
+                'counters': dict(self._counters),
+            }
+
+    def print_summary(self):
+        summary = self.get_summary()
+        print(f"{'Stage':<48}{'Count':>8}{'Total (s)':>12}{'Mean (ms)':>12}{'Max (ms)':>12}")
+        for (stage, labels), timing in sorted(summary['timings'].items(), key=lambda item: -item[1]['total']):
+            label = f"{stage}{self._format_labels(dict(labels))}"
+            print(f"{label:<48}{timing['count']:>8}{timing['total']:>12.1f}{timing['total'] / timing['count'] * 1000:>12.1f}{timing['max'] * 1000:>12.1f}")
+        for (counter, labels), value in sorted(summary['counters'].items()):
+            print(f"{counter}{self._format_labels(dict(labels))}: {value}")
+
+    def export(self):
+        """
+        Flushes the JSON lines file and rewrites the Prometheus textfile with the current totals.
+        """
+        with self._lock:
+            if self._jsonl_file is not None:
+                self._jsonl_file.flush()
+            if self.prometheus_filepath:
+                self._write_prometheus()
+            self._last_export = time.monotonic()
+
+    def close(self):
+        """
+        Exports the totals and closes the JSON lines file, later observations reopen it in append mode.
+        """
+        self.export()
+        with self._lock:
+            if self._jsonl_file is not None:
+                self._jsonl_file.close()
+                self._jsonl_file = None
+
+    def _label_key(self, labels: dict) -> tuple:
+        # Hashable and independent of keyword order
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    def _write_event(self, event_type: str, name: str, labels: dict, value):
+        # Called with the lock held
+        if self.jsonl_filepath:
+            if self._jsonl_file is None:
+                os.makedirs(os.path.dirname(self.jsonl_filepath), exist_ok=True)
+                self._jsonl_file = open(self.jsonl_filepath, 'a', encoding='utf-8')
+            self._jsonl_file.write(json.dumps({
+                'time': datetime.now().isoformat(timespec='milliseconds'),
+                'run': self.run_name,
+                'type': event_type,
+                'name': name,
+                'labels': {label: str(label_value) for label, label_value in labels.items()},
+                'value': round(value, 6) if isinstance(value, float) else value,
+            }) + '\n')
+        if self.prometheus_filepath and time.monotonic() - self._last_export > EXPORT_INTERVAL:
+            if self._jsonl_file is not None:
+                self._jsonl_file.flush()
+            self._write_prometheus()
+            self._last_export = time.monotonic()
+
+    def _write_prometheus(self):
+        # Called with the lock held
+        duration_metric = f"{METRIC_PREFIX}_stage_duration_seconds"
+        lines = [
+            f"# HELP {duration_metric} Time spent in each stage of a scraping / cleaning run.",
+            f"# TYPE {duration_metric} summary",
+        ]
+        for (stage, labels), timing in sorted(self._timings.items()):
+            metric_labels = self._format_labels({'run': self.run_name, 'stage': stage, **dict(labels)})
+            lines.append(f"{duration_metric}_sum{metric_labels} {timing.total:.6f}")
+            lines.append(f"{duration_metric}_count{metric_labels} {timing.count}")
+        lines += [
+            f"# HELP {duration_metric}_max Longest single observation of each stage.",
+            f"# TYPE {duration_metric}_max gauge",
+        ]
+        for (stage, labels), timing in sorted(self._timings.items()):
+            lines.append(f"{duration_metric}_max{self._format_labels({'run': self.run_name, 'stage': stage, **dict(labels)})} {timing.max:.6f}")
+
+        counter_names = sorted({counter for counter, _ in self._counters})
+        for counter in counter_names:
+            counter_metric = f"{METRIC_PREFIX}_{counter}_total"
+            lines.append(f"# TYPE {counter_metric} counter")
+            for (name, labels), value in sorted(self._counters.items()):
+                if name == counter:
+                    lines.append(f"{counter_metric}{self._format_labels({'run': self.run_name, **dict(labels)})} {value}")
+
+        os.makedirs(os.path.dirname(self.prometheus_filepath), exist_ok=True)
+        # Written to a temporary file first, the textfile collector must never read a partial file
+        with open(f"{self.prometheus_filepath}.tmp", 'w', encoding='utf-8') as prometheus_file:
+            prometheus_file.write('\n'.join(lines) + '\n')
+        os.replace(f"{self.prometheus_filepath}.tmp", self.prometheus_filepath)
+
+    def _format_labels(self, labels: dict) -> str:
+        if not labels:
+            return ''
+        escaped = {name: str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for name, value in labels.items()}
+        return '{' + ','.join(f'{name}="{value}"' for name, value in escaped.items()) + '}'
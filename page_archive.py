@@ -0,0 +1,239 @@
+import os
+import glob
+import json
+import hashlib
+import argparse
+import zstandard
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from constants import TableHeaders
+
+#################################### High Level Comments ###################################
+# Every listing page fetched during a run is archived so listings can be re-extracted without a browser
+# Pages are content addressed: stored once under the sha256 of their bytes, zstd compressed
+#   e.g. data/page_archive/objects/3f/3fa4...e1.html.zst - identical pages (unchanged listings, retries) share one object
+# Each run appends one JSON line per archived page to its own index, named after the raw output file
+#   e.g. data/page_archive/index/06-2024_raw_listings.jsonl - url, scrape time, digest and how the page was fetched
+# Workers draining a shared frontier each append to their own <run>-<worker>.jsonl index, so no file has two writers
+#   reading a run merges every index of the run, the latest scrape of a url wins (scrape times are kept to the microsecond)
+# When a DataExtractor selector breaks, fix it and re-extract the run from the archive across cores:
+#   python page_archive.py data/raw_data/06-2024_raw_listings.xlsx
+# Listings without an archived page in the run (resumed from an older journal or carried forward as unchanged)
+#   keep their existing raw rows
+
+OBJECTS_DIRNAME = 'objects'
+INDEX_DIRNAME = 'index'
+OBJECT_EXTENSION = '.html.zst'
+COMPRESSION_LEVEL = 10
+
+def get_archive_path(filepath: str) -> str:
+    """
+    Returns the page archive shared by every run, next to the raw / cleaned data directories.
+
+    Args:
+        filepath (str): Path of a raw data Excel file e.g. data/raw_data/06-2024_raw_listings.xlsx.
+
+    Returns:
+        str: The archive directory e.g. data/page_archive.
+    """
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(filepath))), 'page_archive')
+
+def get_run_name(filepath: str) -> str:
+    # Runs are named after their raw output file e.g. 06-2024_raw_listings
+    return os.path.splitext(os.path.basename(filepath))[0]
+
+class PageArchive():
+    """
+    Content addressed, zstd compressed archive of fetched listing pages.
+
+    Attributes:
+        archive_path (str): Directory holding the objects and the run indexes.
+        run_name (str): Name of the run pages are indexed under.
+        worker_id (str): Worker of a run drained by several workers, each worker writes its own <run>-<worker>.jsonl index.
+    """
+    def __init__(self, archive_path: str, run_name: str, worker_id: str = None):
+        self.archive_path = archive_path
+        self.run_name = run_name
+        self.worker_id = worker_id
+        self._index_file = None
+        self._compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL)
+
+    @property
+    def index_filepath(self) -> str:
+        file_name = f"{self.run_name}-{self.worker_id}" if self.worker_id else self.run_name
+        return os.path.join(self.archive_path, INDEX_DIRNAME, f"{file_name}.jsonl")
+
+    @property
+    def run_index_filepaths(self) -> list:
+        # The run's own index and the index of every worker that drained it
+        index_path = os.path.join(self.archive_path, INDEX_DIRNAME)
+        run_index_filepath = os.path.join(index_path, f"{self.run_name}.jsonl")
+        worker_index_filepaths = glob.glob(os.path.join(glob.escape(index_path), f"{glob.escape(self.run_name)}-*.jsonl"))
+        return ([run_index_filepath] if os.path.exists(run_index_filepath) else []) + sorted(worker_index_filepaths)
+
+    def add_page(self, url: str, page_content, is_single_unit: bool, from_http: bool, city_index: int, position: int) -> str:
+        """
+        Stores a fetched page, unless an identical page is already archived, and indexes it under the run.
+
+        Args:
+            url (str): URL of the listing page.
+            page_content (str | bytes): The page source from the browser, or the raw bytes fetched over HTTP.
+            is_single_unit (bool): Whether the listing is a single unit listing.
+            from_http (bool): Whether the page is server-rendered HTML fetched without a browser.
+            city_index (int): Position of the city's landing page in the run.
+            position (int): Position of the url among the city's listing urls.
+
+        Returns:
+            str: The digest the page is stored under.
+        """
+        # Browser page sources are text, http pages keep their raw bytes so the document's own charset is used
+        is_text = isinstance(page_content, str)
+        page_bytes = page_content.encode('utf-8') if is_text else page_content
+        digest = hashlib.sha256(page_bytes).hexdigest()
+
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            # Write to a temporary file first so a crash never leaves a truncated object behind
+            # named per process, workers archiving the same page at once each replace the object with identical bytes
+            temporary_path = f"{object_path}.{os.getpid()}.tmp"
+            with open(temporary_path, 'wb') as object_file:
+                object_file.write(self._compressor.compress(page_bytes))
+            os.replace(temporary_path, object_path)
+
+        if self._index_file is None:
+            os.makedirs(os.path.dirname(self.index_filepath), exist_ok=True)
+            self._index_file = open(self.index_filepath, 'a', encoding='utf-8')
+        self._index_file.write(json.dumps({
+            'url': url,
+            'scraped_at': datetime.now().isoformat(timespec='microseconds'),
+            'digest': digest,
+            'is_text': is_text,
+            'is_single_unit': is_single_unit,
+            'from_http': from_http,
+            'city_index': city_index,
+            'position': position,
+        }) + '\n')
+        self._index_file.flush()
+        return digest
+
+    def read_page(self, entry: dict):
+        """
+        Reads an archived page back.
+
+        Args:
+            entry (dict): An index entry returned by read_index().
+
+        Returns:
+            str | bytes: The page as it was fetched.
+        """
+        with open(self._object_path(entry['digest']), 'rb') as object_file:
+            page_bytes = zstandard.ZstdDecompressor().decompress(object_file.read())
+        return page_bytes.decode('utf-8') if entry['is_text'] else page_bytes
+
+    def read_index(self) -> list:
+        """
+        Reads every index of the run, keeping the last archived page of each url (e.g. the successful retry).
+
+        Returns:
+            List[dict]: One index entry per url, in city then url order.
+        """
+        latest_entries = {}
+        for index_filepath in self.run_index_filepaths:
+            with open(index_filepath, encoding='utf-8') as index_file:
+                for line in index_file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Torn last line from a crash mid-write
+                        continue
+                    # Later lines of one index win, across indexes the later scrape wins
+                    if entry['url'] not in latest_entries or entry['scraped_at'] >= latest_entries[entry['url']]['scraped_at']:
+                        latest_entries[entry['url']] = entry
+        return sorted(latest_entries.values(), key=lambda entry: (entry['city_index'], entry['position']))
+
+    def close(self):
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.archive_path, OBJECTS_DIRNAME, digest[:2], f"{digest}{OBJECT_EXTENSION}")
+
+def reextract_page(archive_path: str, run_name: str, entry: dict) -> list:
+    """
+    Re-extracts the units of an archived page, run in a worker process.
+
+    Args:
+        archive_path (str): Directory of the page archive.
+        run_name (str): Name of the run the page is indexed under.
+        entry (dict): The page's index entry.
+
+    Returns:
+        list: Rental unit data dictionaries, dated with the time the page was scraped.
+    """
+    from scraper import extract_listing_units
+
+    page_content = PageArchive(archive_path, run_name).read_page(entry)
+    try:
+        rental_listing_units = extract_listing_units(page_content, entry['is_single_unit'], entry['url'], entry['from_http']) or []
+    except ValueError as e:
+        # A partly rendered page fails like it did when scraped, the rest of the run is still re-extracted
+        print(f"ERROR: Failed to re-extract {entry['url']}: {e}")
+        rental_listing_units = []
+    for unit in rental_listing_units:
+        unit[TableHeaders.DATE.value] = entry['scraped_at']
+    return rental_listing_units
+
+def reextract_raw_data(filepath: str, archive_path: str = None, processes: int = None):
+    """
+    Rebuilds a run's raw listings from its archived pages, without a browser, and exports them to Excel.
+
+    Args:
+        filepath (str): Path of the run's raw data Excel file, its Parquet dataset is rebuilt alongside it.
+        archive_path (str): Directory of the page archive, defaults to data/page_archive.
+        processes (int): Number of processes parsing pages, defaults to the cpu count.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing the rebuilt raw data.
+    """
+    import pandas as pd
+    from functions import get_raw_df
+    from storage import RawDataset, get_dataset_path
+
+    archive_path = archive_path or get_archive_path(filepath)
+    run_name = get_run_name(filepath)
+    entries = PageArchive(archive_path, run_name).read_index()
+    print(f"********** Re-extracting {len(entries)} archived pages of {run_name} **********")
+
+    # Rows of listings that have no archived page are kept as they are
+    archived_urls = {entry['url'] for entry in entries}
+    existing_raw_df = get_raw_df(filepath) if os.path.exists(filepath) or os.path.isdir(get_dataset_path(filepath)) else pd.DataFrame()
+    kept_raw_df = existing_raw_df[~existing_raw_df[TableHeaders.URL.value].isin(archived_urls)] if not existing_raw_df.empty else existing_raw_df
+
+    units_by_city = {}
+    with ProcessPoolExecutor(max_workers=processes) as parse_executor:
+        page_units = parse_executor.map(reextract_page, [archive_path] * len(entries), [run_name] * len(entries), entries, chunksize=16)
+        for entry, rental_listing_units in zip(entries, page_units):
+            units_by_city.setdefault(entry['city_index'], []).extend(rental_listing_units)
+
+    raw_dataset = RawDataset(get_dataset_path(filepath))
+    raw_dataset.reset()
+    for city_index, city_units in sorted(units_by_city.items()):
+        raw_dataset.commit_city(city_units, city_index)
+    raw_dataset.commit_city(kept_raw_df.to_dict('records'), max(units_by_city, default=-1) + 1)
+
+    rebuilt_raw_df = raw_dataset.read()
+    rebuilt_raw_df.to_excel(filepath, index=False)
+    print(f"********** Rebuilt {len(rebuilt_raw_df)} units, {len(kept_raw_df)} kept from listings without an archived page **********")
+    return rebuilt_raw_df
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Re-extract a run\'s raw listings from its archived listing pages.')
+    parser.add_argument('filepath', help='Raw data Excel file of the run e.g. data/raw_data/06-2024_raw_listings.xlsx')
+    parser.add_argument('--archive-dir', default=None, help='Page archive directory, defaults to data/page_archive')
+    parser.add_argument('--processes', type=int, default=None, help='Number of parse processes, defaults to the cpu count')
+    args = parser.parse_args()
+
+    reextract_raw_data(args.filepath, args.archive_dir, args.processes)
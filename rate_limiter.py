@@ -0,0 +1,149 @@
+from urllib.parse import urlparse
+from enum import Enum
+import threading
+import time
+
+#################################### High Level Comments ###################################
+# Every request the scraper makes (page loads, http fetches, search API replays, floorplan clicks) takes a token first
+# Tokens refill per host at an adaptive rate shared by every worker, instead of a blind random sleep per request
+# The rate follows AIMD: it grows by RATE_INCREASE after each fast, successful response
+#   and is multiplied by RATE_DECREASE_FACTOR on a timeout, a block signal or a response much slower than usual
+# Decreases are applied at most once per DECREASE_INTERVAL so a burst of concurrent failures does not collapse the rate
+# Block signals (429 / 403, or a block page in the browser) also pause the host for BLOCK_COOLDOWN seconds
+#   (or the Retry-After the site sent) before any further request
+# Tokens do not refill during a cooldown, refilling resumes from its end at the reduced rate
+#   so callers queued during the cooldown leave it one token interval apart instead of as a burst
+
+INITIAL_RATE = 0.5
+MIN_RATE = 0.05
+MAX_RATE = 2.0
+BURST_SIZE = 2
+RATE_INCREASE = 0.05
+RATE_DECREASE_FACTOR = 0.5
+DECREASE_INTERVAL = 5
+SLOW_RESPONSE_FACTOR = 3
+LATENCY_SMOOTHING = 0.2
+BLOCK_COOLDOWN = 60
+
+class RequestOutcome(Enum):
+    OK = 'ok'
+    TIMEOUT = 'timeout'
+    BLOCKED = 'blocked'
+
+class HostBucket():
+    """
+    Token bucket and AIMD state of a single host.
+
+    Attributes:
+        rate (float): Requests per second currently allowed.
+        tokens (float): Tokens available, negative while requests are queued for a token.
+        last_refill (float): Monotonic time tokens were last added, the end of the cooldown while the host is blocked.
+        smoothed_latency (float): Moving average latency of successful responses, None until the first one.
+        blocked_until (float): Monotonic time before which no request is sent.
+        last_decrease (float): Monotonic time the rate was last decreased.
+    """
+    def __init__(self, rate: float, burst_size: int):
+        self.rate = rate
+        self.tokens = float(burst_size)
+        self.last_refill = time.monotonic()
+        self.smoothed_latency = None
+        self.blocked_until = 0.0
+        self.last_decrease = float('-inf')
+
+class RateLimiter():
+    """
+    Adaptive per-host rate limiter shared by every scraper path and worker.
+
+    Attributes:
+        min_rate (float): Lowest rate the AIMD backoff can reach, in requests per second.
+        max_rate (float): Highest rate the site is allowed to reach, in requests per second.
+        outcome_counts (dict): Number of responses recorded per outcome.
+    """
+    def __init__(self, initial_rate: float = INITIAL_RATE, min_rate: float = MIN_RATE, max_rate: float = MAX_RATE, burst_size: int = BURST_SIZE):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst_size = burst_size
+        self.outcome_counts = {outcome.value: 0 for outcome in RequestOutcome}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url: str):
+        """
+        Blocks until a request to the url's host is allowed.
+
+        Args:
+            url (str): URL about to be requested.
+        """
+        with self._lock:
+            bucket = self._get_bucket(url)
+            now = time.monotonic()
+            self._refill(bucket, now)
+            # Take the token now, waiting for it to refill if the bucket is empty, so waiting callers queue in order
+            bucket.tokens -= 1
+            wait_time = max(bucket.blocked_until - now, 0.0) + (-bucket.tokens / bucket.rate if bucket.tokens < 0 else 0.0)
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+    def record(self, url: str, outcome: RequestOutcome, latency: float = None, retry_after: float = None):
+        """
+        Adjusts the host's rate from the outcome of a request.
+
+        Args:
+            url (str): URL that was requested.
+            outcome (RequestOutcome): Whether the request succeeded, timed out or was blocked.
+            latency (float): Seconds the response took, if known.
+            retry_after (float): Seconds the site asked to wait before the next request, if it sent one.
+        """
+        with self._lock:
+            bucket = self._get_bucket(url)
+            now = time.monotonic()
+            self._refill(bucket, now)
+            self.outcome_counts[outcome.value] += 1
+
+            if outcome == RequestOutcome.BLOCKED:
+                bucket.blocked_until = max(bucket.blocked_until, now + (retry_after if retry_after is not None else BLOCK_COOLDOWN))
+                # No saved up burst survives a block, tokens start refilling when the cooldown ends
+                bucket.tokens = min(bucket.tokens, 0.0)
+                bucket.last_refill = max(bucket.last_refill, bucket.blocked_until)
+                self._decrease(bucket, now)
+            elif outcome == RequestOutcome.TIMEOUT:
+                self._decrease(bucket, now)
+            elif latency is not None and bucket.smoothed_latency is not None and latency > SLOW_RESPONSE_FACTOR * bucket.smoothed_latency:
+                # Much slower than usual, the site is struggling - slow down but keep the outlier out of the average
+                self._decrease(bucket, now)
+            else:
+                bucket.rate = min(self.max_rate, bucket.rate + RATE_INCREASE)
+                if latency is not None:
+                    bucket.smoothed_latency = latency if bucket.smoothed_latency is None else (
+                        LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * bucket.smoothed_latency
+                    )
+
+    def get_rates(self) -> dict:
+        """
+        Returns the current rate of every host seen so far.
+
+        Returns:
+            dict: Mapping of host to requests per second.
+        """
+        with self._lock:
+            return {host: round(bucket.rate, 3) for host, bucket in self._buckets.items()}
+
+    def _get_bucket(self, url: str) -> HostBucket:
+        host = urlparse(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = HostBucket(self.initial_rate, self.burst_size)
+        return self._buckets[host]
+
+    def _refill(self, bucket: HostBucket, now: float):
+        # last_refill is the end of the cooldown while the host is blocked
+        if now <= bucket.last_refill:
+            return
+        bucket.tokens = min(float(self.burst_size), bucket.tokens + (now - bucket.last_refill) * bucket.rate)
+        bucket.last_refill = now
+
+    def _decrease(self, bucket: HostBucket, now: float):
+        if now - bucket.last_decrease < DECREASE_INTERVAL:
+            return
+        bucket.rate = max(self.min_rate, bucket.rate * RATE_DECREASE_FACTOR)
+        bucket.last_decrease = now
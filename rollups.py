@@ -0,0 +1,294 @@
+import os
+import glob
+import math
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from constants import (
+    TableHeaders, UnitAmenitiesDict, BuildingAmenitiesDict
+)
+from history import ListingHistory, get_scrape_month, MONTH_COLUMN
+
+#################################### High Level Comments ###################################
+# Materialized rent rollups so reports and dashboards never re-aggregate unit level rows
+# One cell per City x Neighbourhood x Bed x scrape month, holding mergeable aggregates of the cell's units
+#   count, price sum / min / max, price per sqft sum / count, units and price sum with each amenity
+#   and a quantile sketch of the price (log spaced buckets, SKETCH_RELATIVE_ACCURACY relative error on any quantile)
+# Every aggregate merges by summing (or min / max), so any roll up (e.g. a city's 1 beds over a year) is computed from cells
+# Stored per month e.g. data/rollups/Month=2024-06/cells.parquet, get_cleaned_df replaces the month it cleans
+# RentCube loads every month's cells once (a few thousand rows) and answers queries from memory
+# An amenity premium is the average price with the amenity minus the average price without it, within the same cells
+# Months cleaned before the rollups existed can be built from the history store with:
+#   python rollups.py build --history-dir data/history
+# Usage: python rollups.py query --city Toronto --bed 1 --group-by Neighbourhood Month
+
+CELLS_FILENAME = 'cells.parquet'
+CUBE_DIMENSIONS = [TableHeaders.CITY.value, TableHeaders.NEIGHBOURHOOD.value, TableHeaders.BED.value, MONTH_COLUMN]
+AMENITY_COLUMNS = list(BuildingAmenitiesDict) + list(UnitAmenitiesDict)
+PRICE_PER_SQFT = 'Price Per SqFt'
+
+SKETCH_RELATIVE_ACCURACY = 0.01
+SKETCH_GAMMA = (1 + SKETCH_RELATIVE_ACCURACY) / (1 - SKETCH_RELATIVE_ACCURACY)
+SKETCH_KEYS = 'Price Sketch Keys'
+SKETCH_COUNTS = 'Price Sketch Counts'
+DEFAULT_QUANTILES = [0.25, 0.5, 0.75]
+
+SUM_COLUMNS = ['Count', 'Price Sum', 'Price Per SqFt Sum', 'Price Per SqFt Count'] + [
+    f"{amenity} {aggregate}" for amenity in AMENITY_COLUMNS for aggregate in ('Count', 'Price Sum')
+]
+
+CELLS_SCHEMA = pa.schema(
+    [
+        (TableHeaders.CITY.value, pa.string()),
+        (TableHeaders.NEIGHBOURHOOD.value, pa.string()),
+        (TableHeaders.BED.value, pa.float64()),
+        (MONTH_COLUMN, pa.string()),
+        ('Price Min', pa.float64()),
+        ('Price Max', pa.float64()),
+        (SKETCH_KEYS, pa.list_(pa.int32())),
+        (SKETCH_COUNTS, pa.list_(pa.int64())),
+    ]
+    + [(column, pa.float64() if 'Sum' in column and 'Count' not in column else pa.int64()) for column in SUM_COLUMNS]
+)
+
+def get_rollup_path(cleaned_filepath: str) -> str:
+    """
+    Returns the rollup directory shared by every cleaned file in a data directory.
+
+    Args:
+        cleaned_filepath (str): Path of a cleaned Excel file e.g. data/cleaned_data/06-2024_cleaned_listings.xlsx.
+
+    Returns:
+        str: The rollup directory e.g. data/rollups.
+    """
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(cleaned_filepath))), 'rollups')
+
+def get_sketch_keys(prices: pd.Series) -> pd.Series:
+    # Bucket k holds prices in (gamma^(k-1), gamma^k]
+    return np.ceil(np.log(prices) / math.log(SKETCH_GAMMA)).astype('int32')
+
+def get_sketch_quantile(keys: np.ndarray, counts: np.ndarray, quantile: float) -> float:
+    """
+    Estimates a quantile from a merged price sketch.
+
+    Args:
+        keys (np.ndarray): Bucket keys, sorted.
+        counts (np.ndarray): Units in each bucket.
+        quantile (float): Quantile between 0 and 1.
+
+    Returns:
+        float: The estimated price, NaN for an empty sketch.
+    """
+    total = counts.sum()
+    if total == 0:
+        return np.nan
+    bucket = min(np.searchsorted(np.cumsum(counts), quantile * (total - 1), side='right'), len(keys) - 1)
+    # Midpoint of the bucket in relative terms, within SKETCH_RELATIVE_ACCURACY of every price in it
+    return 2 * SKETCH_GAMMA ** keys[bucket] / (SKETCH_GAMMA + 1)
+
+def build_cells(cleaned_df: pd.DataFrame, default_month: str = None) -> pd.DataFrame:
+    """
+    Aggregates cleaned units into rollup cells.
+
+    Args:
+        cleaned_df (pd.DataFrame): Output of get_cleaned_data, or history rows which already have a Month.
+        default_month (str): Month (YYYY-MM) used for rows whose Date cannot be parsed.
+
+    Returns:
+        pd.DataFrame: One row per City x Neighbourhood x Bed x Month with the columns of CELLS_SCHEMA.
+    """
+    units_df = pd.DataFrame({
+        TableHeaders.CITY.value: cleaned_df[TableHeaders.CITY.value],
+        TableHeaders.NEIGHBOURHOOD.value: cleaned_df[TableHeaders.NEIGHBOURHOOD.value].fillna(''),
+        TableHeaders.BED.value: pd.to_numeric(cleaned_df[TableHeaders.BED.value], errors='coerce'),
+        MONTH_COLUMN: cleaned_df[MONTH_COLUMN] if MONTH_COLUMN in cleaned_df.columns else get_scrape_month(cleaned_df[TableHeaders.DATE.value], default_month),
+        'Price': pd.to_numeric(cleaned_df[TableHeaders.PRICE.value], errors='coerce'),
+    })
+    sqft = pd.to_numeric(cleaned_df[TableHeaders.SQFT.value], errors='coerce')
+    units_df = units_df.dropna(subset=[TableHeaders.CITY.value, TableHeaders.BED.value, MONTH_COLUMN, 'Price'])
+    units_df = units_df[units_df['Price'] > 0]
+    if units_df.empty:
+        return CELLS_SCHEMA.empty_table().to_pandas()
+
+    # Per unit contributions to the summed aggregates
+    price_per_sqft = (units_df['Price'] / sqft.reindex(units_df.index)).where(sqft.reindex(units_df.index) > 0)
+    units_df['Count'] = 1
+    units_df['Price Sum'] = units_df['Price']
+    units_df['Price Per SqFt Sum'] = price_per_sqft.fillna(0)
+    units_df['Price Per SqFt Count'] = price_per_sqft.notna().astype('int64')
+    for amenity in AMENITY_COLUMNS:
+        has_amenity = cleaned_df[amenity].reindex(units_df.index).fillna(0).astype('int64') if amenity in cleaned_df.columns else 0
+        units_df[f"{amenity} Count"] = has_amenity
+        units_df[f"{amenity} Price Sum"] = units_df['Price'] * has_amenity
+
+    grouped = units_df.groupby(CUBE_DIMENSIONS, sort=True)
+    cells_df = grouped[SUM_COLUMNS].sum()
+    cells_df['Price Min'] = grouped['Price'].min()
+    cells_df['Price Max'] = grouped['Price'].max()
+
+    # Sparse sketch: bucket key -> units, one list pair per cell
+    units_df['Sketch Key'] = get_sketch_keys(units_df['Price'])
+    sketch_df = units_df.groupby(CUBE_DIMENSIONS + ['Sketch Key'], sort=True).size().reset_index(name='Sketch Count')
+    sketches = sketch_df.groupby(CUBE_DIMENSIONS, sort=True).agg(**{SKETCH_KEYS: ('Sketch Key', list), SKETCH_COUNTS: ('Sketch Count', list)})
+    cells_df = cells_df.join(sketches).reset_index()
+    return cells_df[CELLS_SCHEMA.names]
+
+class RentCube():
+    """
+    Rollup cells of every cleaned month, queried from memory.
+
+    Attributes:
+        rollup_path (str): Directory holding one cells file per month.
+    """
+    def __init__(self, rollup_path: str):
+        self.rollup_path = rollup_path
+        self._cells_df = None
+
+    def update(self, cleaned_df: pd.DataFrame, default_month: str = None):
+        """
+        Replaces the cells of the months covered by newly cleaned data.
+
+        Args:
+            cleaned_df (pd.DataFrame): Output of get_cleaned_data.
+            default_month (str): Month (YYYY-MM) used for rows whose Date cannot be parsed.
+        """
+        cells_df = build_cells(cleaned_df, default_month)
+        for month, month_cells_df in cells_df.groupby(MONTH_COLUMN, sort=False):
+            self._write_table(
+                pa.Table.from_pandas(month_cells_df, schema=CELLS_SCHEMA, preserve_index=False),
+                os.path.join(self.rollup_path, f"{MONTH_COLUMN}={month}", CELLS_FILENAME)
+            )
+            print(f"Stored {len(month_cells_df)} rollup cells for {month}")
+        self._cells_df = None
+
+    def rebuild_from_history(self, listing_history: ListingHistory):
+        """
+        Rebuilds the cells of every month in the history store, e.g. for months cleaned before the rollups existed.
+
+        Args:
+            listing_history (ListingHistory): The multi-month history store.
+        """
+        self.update(listing_history.read())
+
+    def get_cells(self) -> pd.DataFrame:
+        """
+        Returns every stored cell, read from disk on first use.
+
+        Returns:
+            pd.DataFrame: Cells of every month with the columns of CELLS_SCHEMA.
+        """
+        if self._cells_df is None:
+            cells_filepaths = sorted(glob.glob(os.path.join(self.rollup_path, f"{MONTH_COLUMN}=*", CELLS_FILENAME)))
+            tables = [pq.read_table(cells_filepath, schema=CELLS_SCHEMA) for cells_filepath in cells_filepaths]
+            self._cells_df = pa.concat_tables(tables).to_pandas() if tables else CELLS_SCHEMA.empty_table().to_pandas()
+        return self._cells_df
+
+    def query(self, cities: list[str] = None, neighbourhoods: list[str] = None, beds: list[float] = None, months: list[str] = None, group_by: list[str] = None, quantiles: list[float] = None) -> pd.DataFrame:
+        """
+        Rolls the matching cells up to the requested dimensions.
+
+        Args:
+            cities (list[str]): Cities to keep, every city if None.
+            neighbourhoods (list[str]): Neighbourhoods to keep, every neighbourhood if None.
+            beds (list[float]): Bedroom counts to keep, every count if None.
+            months (list[str]): Months (YYYY-MM) to keep, every month if None.
+            group_by (list[str]): Dimensions of the result among City, Neighbourhood, Bed and Month, defaults to all four.
+            quantiles (list[float]): Price quantiles estimated from the sketches, defaults to the quartiles.
+
+        Returns:
+            pd.DataFrame: One row per group with Units, Avg / Min / Max Price, price quantiles, Avg Price Per SqFt
+            and the premium of each amenity.
+        """
+        group_by = CUBE_DIMENSIONS if group_by is None else group_by
+        quantiles = DEFAULT_QUANTILES if quantiles is None else quantiles
+
+        cells_df = self.get_cells()
+        for column, values in [(TableHeaders.CITY.value, cities), (TableHeaders.NEIGHBOURHOOD.value, neighbourhoods), (TableHeaders.BED.value, beds), (MONTH_COLUMN, months)]:
+            if values is not None:
+                cells_df = cells_df[cells_df[column].isin(values)]
+
+        if group_by:
+            grouped = cells_df.groupby(group_by, sort=True)
+            merged_df = grouped[SUM_COLUMNS].sum()
+            merged_df['Price Min'] = grouped['Price Min'].min()
+            merged_df['Price Max'] = grouped['Price Max'].max()
+            merged_df = merged_df.reset_index()
+            group_labels = cells_df.groupby(group_by, sort=True).ngroup()
+        else:
+            merged_df = cells_df[SUM_COLUMNS].sum().to_frame().T
+            merged_df['Price Min'] = cells_df['Price Min'].min()
+            merged_df['Price Max'] = cells_df['Price Max'].max()
+            group_labels = pd.Series(0, index=cells_df.index)
+
+        result_df = merged_df[group_by].copy()
+        result_df['Units'] = merged_df['Count'].astype('int64')
+        result_df['Avg Price'] = merged_df['Price Sum'] / merged_df['Count']
+        result_df['Min Price'] = merged_df['Price Min']
+        result_df['Max Price'] = merged_df['Price Max']
+        for quantile, values in zip(quantiles, self._merge_sketch_quantiles(cells_df, group_labels, len(merged_df), quantiles)):
+            result_df[f"P{round(quantile * 100)} Price"] = values
+        result_df[f"Avg {PRICE_PER_SQFT}"] = merged_df['Price Per SqFt Sum'] / merged_df['Price Per SqFt Count'].replace(0, np.nan)
+        for amenity in AMENITY_COLUMNS:
+            with_count = merged_df[f"{amenity} Count"]
+            without_count = (merged_df['Count'] - with_count).replace(0, np.nan)
+            average_with = merged_df[f"{amenity} Price Sum"] / with_count.replace(0, np.nan)
+            average_without = (merged_df['Price Sum'] - merged_df[f"{amenity} Price Sum"]) / without_count
+            result_df[f"{amenity} Premium"] = average_with - average_without
+        return result_df
+
+    def _merge_sketch_quantiles(self, cells_df: pd.DataFrame, group_labels: pd.Series, group_count: int, quantiles: list[float]) -> list:
+        """
+        Merges the price sketches of each group and estimates its quantiles.
+
+        Args:
+            cells_df (pd.DataFrame): The queried cells.
+            group_labels (pd.Series): Result row of each cell.
+            group_count (int): Number of result rows.
+            quantiles (list[float]): Quantiles to estimate.
+
+        Returns:
+            list: One array of estimates (one per group) per quantile.
+        """
+        estimates = [np.full(group_count, np.nan) for _ in quantiles]
+        if cells_df.empty:
+            return estimates
+        sketch_df = pd.DataFrame({
+            'group': np.repeat(group_labels.to_numpy(), cells_df[SKETCH_KEYS].map(len).to_numpy()),
+            'key': np.concatenate(cells_df[SKETCH_KEYS].to_numpy()),
+            'count': np.concatenate(cells_df[SKETCH_COUNTS].to_numpy()),
+        })
+        merged_sketches = sketch_df.groupby(['group', 'key'], sort=True)['count'].sum().reset_index()
+        cumulative_counts = merged_sketches.groupby('group', sort=False)['count'].cumsum()
+        group_totals = merged_sketches.groupby('group', sort=False)['count'].transform('sum')
+        for quantile_index, quantile in enumerate(quantiles):
+            # First bucket of each group whose cumulative count passes the quantile's rank, see get_sketch_quantile
+            reached = merged_sketches[cumulative_counts > quantile * (group_totals - 1)].groupby('group', sort=False)['key'].first()
+            estimates[quantile_index][reached.index.to_numpy()] = 2 * SKETCH_GAMMA ** reached.to_numpy(dtype=float) / (SKETCH_GAMMA + 1)
+        return estimates
+
+    def _write_table(self, table: pa.Table, path: str):
+        # Write to a temporary file first so a crash never leaves a truncated month behind
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pq.write_table(table, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build or query the rent rollup cube.')
+    parser.add_argument('command', choices=['build', 'query'], help='build: rebuild every month from the history store, query: print a rollup')
+    parser.add_argument('--rollup-dir', default=os.path.join('data', 'rollups'), help='Rollup store directory')
+    parser.add_argument('--history-dir', default=os.path.join('data', 'history'), help='History store directory, read by build')
+    parser.add_argument('--city', nargs='*', default=None, help='Cities to keep')
+    parser.add_argument('--neighbourhood', nargs='*', default=None, help='Neighbourhoods to keep')
+    parser.add_argument('--bed', nargs='*', type=float, default=None, help='Bedroom counts to keep')
+    parser.add_argument('--month', nargs='*', default=None, help='Months (YYYY-MM) to keep')
+    parser.add_argument('--group-by', nargs='*', default=None, choices=CUBE_DIMENSIONS, help='Dimensions of the result, all four if omitted')
+    args = parser.parse_args()
+
+    rent_cube = RentCube(args.rollup_dir)
+    if args.command == 'build':
+        rent_cube.rebuild_from_history(ListingHistory(args.history_dir))
+    else:
+        print(rent_cube.query(args.city, args.neighbourhood, args.bed, args.month, args.group_by).to_string(index=False))
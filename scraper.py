@@ -1,17 +1,19 @@
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 from selenium.webdriver.chrome.webdriver import WebDriver
-import pickle
-import random
+import json
+import threading
 import func_timeout
+import requests
 
 from bs4 import BeautifulSoup
 from constants import TableHeaders
+from rate_limiter import RateLimiter, RequestOutcome
+from metrics import Metrics
 from utils import (
     get_absolute_url, 
-    generate_time_gap, 
     match_address, 
     match_pets,
     match_bed,
@@ -33,6 +35,121 @@ import time
 # Wanted to minimize the number of HTTPS requests to avoid detection / blocking by website.
 # Ensure the scraper operates stealthily before increasing the request frequency.
 # TODO: Improve scraper speed and robustness to reliably handle single unit listings
+# Discovery can read the listing search API responses the landing page fetches itself (chrome performance log / CDP)
+#   instead of scrolling the whole page - the API already returns urls, floorplan counts, prices and coordinates
+#   further result pages are requested by replaying the captured API request from inside the page with a new offset
+#   if no API response is captured, or the listables yield no or too few urls (e.g. the API changed), discovery falls back to scrolling
+#   network discovery is off by default until the listable fields are checked against a captured Padmapper response
+# Scrolling discovery harvests tiles while scrolling instead of parsing one huge page_source at the end
+#   a MutationObserver queues each new ListItemTile_address link (with its floorplan count and price) as it is added
+#   the queue is drained after every scroll, so tiles a virtualized list evicts later are not lost
+#   scrolling stops once the observer sees no new tile links within TILE_IDLE_TIMEOUT
+
+# Every request is paced by a RateLimiter shared by all workers, see rate_limiter.py
+#   page loads, http fetches and search API replays report their latency / timeouts / block signals back to it
+# Callers running a page load under a time limit take its token first (acquire=False) and load it once per attempt,
+#   so rate limit waits and block cooldowns never count against the limit and abandoned loads take no tokens
+# Page loads, rate limit waits, the summary table wait, panel expansion and page source captures are timed
+#   into the Metrics shared by the run, along with timeout and block counters (see metrics.py)
+
+# Search API requests are recognised by url, listables are recognised by the first key found for each field
+LISTING_API_PATTERN = re.compile(r'/api/.*(listables|pins|search)', re.IGNORECASE)
+LISTABLE_FIELDS = {
+    'url': ('url', 'listing_url', 'pb_url'),
+    'floorplans': ('floorplan_count', 'num_floorplans', 'unit_count'),
+    'min_price': ('min_price', 'price_min'),
+    'max_price': ('max_price', 'price_max'),
+    'lat': ('lat', 'latitude'),
+    'lon': ('lng', 'lon', 'longitude'),
+}
+PAGINATION_FIELDS = ('offset', 'skip')
+# Scrolling takes over when the listables yield fewer urls than this share of them (e.g. the floorplan count field moved)
+MIN_LISTABLE_URL_FRACTION = 0.05
+NETWORK_CAPTURE_TIMEOUT = 20
+NETWORK_IDLE_TIME = 2
+MAX_API_PAGES = 500
+
+# Replays a request from inside the page so cookies and origin match the page's own requests
+REPLAY_REQUEST_SCRIPT = """
+const [url, method, headers, body, done] = arguments;
+fetch(url, {method: method, headers: headers, body: body, credentials: 'include'})
+    .then(response => response.ok ? response.text() : null)
+    .then(done)
+    .catch(() => done(null));
+"""
+
+# Tile text is read like BeautifulSoup's get_text(' ', strip=True) so summaries match the tile based fingerprints
+INSTALL_TILE_OBSERVER_SCRIPT = """
+if (window.__tileHarvest) { window.__tileHarvest.observer.disconnect(); }
+const TILE_LINK_SELECTOR = "a[class*='ListItemTile_address']";
+const harvest = {queue: [], seen: new Set(), newTiles: 0};
+const tileText = (element) => {
+    const walker = document.createTreeWalker(element, NodeFilter.SHOW_TEXT);
+    const parts = [];
+    while (walker.nextNode()) {
+        const text = walker.currentNode.nodeValue.trim();
+        if (text) { parts.push(text); }
+    }
+    return parts.join(' ');
+};
+const siblingDivs = (link, previous) => {
+    const divs = [];
+    let sibling = previous ? link.previousElementSibling : link.nextElementSibling;
+    while (sibling) {
+        if (sibling.tagName === 'DIV') { divs.push(sibling); }
+        sibling = previous ? sibling.previousElementSibling : sibling.nextElementSibling;
+    }
+    return divs;
+};
+const hasClass = (element, name) => Array.from(element.classList).some(cls => cls.includes(name));
+const harvestLink = (link) => {
+    const href = link.getAttribute('href');
+    if (!href || harvest.seen.has(href)) { return; }
+    const previousDivs = siblingDivs(link, true);
+    const bedBath = previousDivs.find(div => hasClass(div, 'ListItemTile_bedBath') && tileText(div).toLowerCase().includes('floorplan'));
+    if (!bedBath) { return; }
+    const price = previousDivs.concat(siblingDivs(link, false)).find(div => hasClass(div, 'ListItemTile_price'));
+    harvest.seen.add(href);
+    harvest.newTiles += 1;
+    harvest.queue.push({href: href, floorplans: tileText(bedBath), price: price ? tileText(price) : ''});
+};
+const harvestNode = (node) => {
+    if (node.nodeType !== Node.ELEMENT_NODE) { return; }
+    if (node.matches(TILE_LINK_SELECTOR)) { harvestLink(node); }
+    node.querySelectorAll(TILE_LINK_SELECTOR).forEach(harvestLink);
+};
+harvest.observer = new MutationObserver(mutations => {
+    for (const mutation of mutations) { mutation.addedNodes.forEach(harvestNode); }
+});
+harvest.observer.observe(document.body, {childList: true, subtree: true});
+window.__tileHarvest = harvest;
+harvestNode(document.body);
+"""
+
+# Hands the queued tiles over and resets the new tile count
+DRAIN_TILES_SCRIPT = """
+const harvest = window.__tileHarvest;
+const tiles = harvest.queue;
+harvest.queue = [];
+harvest.newTiles = 0;
+return tiles;
+"""
+
+TILE_IDLE_TIMEOUT = 5
+
+# Floorplan panels are collapsed on load, each expanded panel adds at least one unit container
+FLOORPLAN_PANEL_SELECTOR = "div[class*='Floorplan_floorplanPanel']"
+UNIT_CONTAINER_SELECTOR = "div[class*='Floorplan_floorplanDetailContainer_']"
+EXPAND_FLOORPLAN_PANELS_SCRIPT = """
+const panels = document.querySelectorAll(arguments[0]);
+panels.forEach(panel => panel.click());
+return panels.length;
+"""
+
+# HTTP statuses and browser page titles that mean the site is pushing back
+BLOCK_STATUS_CODES = {403, 429}
+SERVER_ERROR_STATUS_CODES = {500, 502, 503, 504}
+BLOCK_PAGE_PATTERN = re.compile(r'access denied|too many requests|captcha|are you a robot', re.IGNORECASE)
 
 class BaseScraper():
     """
@@ -42,11 +159,30 @@ class BaseScraper():
         base_url (str): Base URL of the site.
         urls (List[str]): List of URLs to scrape from.
         listings (List[dict]): All rental listings scraped.
+        tile_summaries (dict): Listing url -> floorplan count and price range shown on its landing page tile.
+        listing_locations (dict): Listing url -> (latitude, longitude) when discovered through the search API.
+        rate_limiter (RateLimiter): Paces every request made to the site, shared by all workers.
+        metrics (Metrics): Stage timings and counters of the run, shared by all workers.
     """
-    def __init__(self, base_url=""):
+    def __init__(self, base_url="", rate_limiter: RateLimiter = None, metrics: Metrics = None):
         self.base_url = base_url
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.metrics = metrics or Metrics()
         self.urls = []
         self.listings = []
+        self.tile_summaries = {}
+        self.listing_locations = {}
+
+    def acquire(self, url: str):
+        """
+        Waits for the rate limiter to allow a request to the url.
+
+        Args:
+            url (str): URL about to be requested.
+        """
+        # Time spent throttled is tracked separately from the requests themselves
+        with self.metrics.time('rate_limit_wait'):
+            self.rate_limiter.acquire(url)
       
 class PadmapperScraper(BaseScraper):
     """
@@ -54,59 +190,243 @@ class PadmapperScraper(BaseScraper):
 
     Inherits from BaseScraper and adds methods tailored for scraping Padmapper.
     """
-    def __init__(self, base_url=""):
-        super().__init__(base_url)
+    def __init__(self, base_url="", rate_limiter: RateLimiter = None, metrics: Metrics = None):
+        super().__init__(base_url, rate_limiter, metrics)
         self.MAX_RETRIES = 3
         self.PAGE_LOAD_TIMEOUT = 15
         self.SCROLL_WAIT_TIME = 1
         self.UNIT_COUNT_THRESHOLD = 2
+        # Listing pages may be scraped by several worker threads sharing this scraper
+        self._listings_lock = threading.Lock()
     
-    def fetch_rental_listing_urls(self, web_driver: WebDriver, landing_page_url: str):
+    def fetch_rental_listing_urls(self, web_driver: WebDriver, landing_page_url: str, use_network_capture: bool = False):
         """
         Retrieves and stores all the listing URLs from the landing page.
 
         Args:
             web_driver (WebDriver): The Selenium WebDriver to use for scraping.
             landing_page_url (str): The URL of the landing page to scrape.
+            use_network_capture (bool): Whether to read the search API responses first, the driver must be created with capture_network=True.
         """
         print(f'********** Accessing {landing_page_url} **********')
         try:
             if self._try_load_page(web_driver, landing_page_url):
                 self._click_tile_view_button(web_driver)
+                if use_network_capture:
+                    listables = self._capture_listables(web_driver)
+                    added_url_count = self._add_listables(listables)
+                    if listables and added_url_count >= max(1, MIN_LISTABLE_URL_FRACTION * len(listables)):
+                        print(f"Discovered {added_url_count} listings from {len(listables)} search API results")
+                        return
+                    print(f"Only {added_url_count} listing urls found in {len(listables)} search API results for {landing_page_url}, scrolling instead")
                 try:
-                    func_timeout.func_timeout(900, self._scroll_to_end_of_page, args=(web_driver,))
+                    func_timeout.func_timeout(900, self._harvest_urls_while_scrolling, args=(web_driver,))
                 except func_timeout.FunctionTimedOut:
                     print(f"Timeout reached when scrolling to bottom of {landing_page_url}")
-                self.urls.extend(self._extract_urls(web_driver))
         except NoSuchElementException:
             print(f"Encountered error while scrolling {landing_page_url}")
 
-    def _try_load_page(self, web_driver: WebDriver, url: str) -> bool:
+    def _capture_listables(self, web_driver: WebDriver) -> list:
+        """
+        Reads the listing search API responses the page fetched, then requests the remaining result pages.
+
+        Args:
+            web_driver (WebDriver): A driver created with capture_network=True, on the landing page.
+
+        Returns:
+            List[dict]: Listables returned by the search API, empty if no API response was captured.
+        """
+        api_requests = {}
+        finished_request_ids = []
+        listables = []
+        last_request = None
+
+        deadline = time.monotonic() + NETWORK_CAPTURE_TIMEOUT
+        last_activity = time.monotonic()
+        while time.monotonic() < deadline:
+            for entry in web_driver.get_log('performance'):
+                message = json.loads(entry['message'])['message']
+                params = message.get('params', {})
+                if message.get('method') == 'Network.requestWillBeSent' and LISTING_API_PATTERN.search(params['request']['url']):
+                    api_requests[params['requestId']] = params['request']
+                    last_activity = time.monotonic()
+                elif message.get('method') == 'Network.loadingFinished' and params.get('requestId') in api_requests:
+                    finished_request_ids.append(params['requestId'])
+
+            for request_id in finished_request_ids:
+                try:
+                    response_body = web_driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+                    listables.extend(self._find_listables(json.loads(response_body['body'])))
+                    last_request = api_requests[request_id]
+                except (WebDriverException, ValueError, KeyError):
+                    # Response evicted from the buffer or not JSON
+                    pass
+                del api_requests[request_id]
+            finished_request_ids = []
+
+            if listables and not api_requests and time.monotonic() - last_activity > NETWORK_IDLE_TIME:
+                break
+            time.sleep(0.25)
+
+        if last_request:
+            listables.extend(self._replay_remaining_pages(web_driver, last_request, len(listables)))
+        return listables
+
+    def _replay_remaining_pages(self, web_driver: WebDriver, api_request: dict, page_size: int) -> list:
+        """
+        Requests further search API result pages by replaying a captured request with an advanced offset.
+
+        Args:
+            web_driver (WebDriver): The driver on the landing page.
+            api_request (dict): The captured CDP request (url, method, headers, postData).
+            page_size (int): Number of listables the page received so far.
+
+        Returns:
+            List[dict]: Listables from the remaining result pages.
+        """
+        try:
+            request_body = json.loads(api_request.get('postData') or '')
+        except ValueError:
+            return []
+        pagination_field = next((field for field in PAGINATION_FIELDS if isinstance(request_body.get(field), int)), None) if isinstance(request_body, dict) else None
+        if pagination_field is None or page_size == 0:
+            return []
+
+        headers = {name: value for name, value in api_request.get('headers', {}).items() if not name.startswith(':')}
+        web_driver.set_script_timeout(self.PAGE_LOAD_TIMEOUT)
+
+        listables = []
+        seen_urls = set()
+        for _ in range(MAX_API_PAGES):
+            request_body[pagination_field] += page_size
+            self.acquire(api_request['url'])
+            started = time.monotonic()
+            try:
+                response_text = web_driver.execute_async_script(REPLAY_REQUEST_SCRIPT, api_request['url'], api_request.get('method', 'POST'), headers, json.dumps(request_body))
+            except TimeoutException:
+                self.rate_limiter.record(api_request['url'], RequestOutcome.TIMEOUT)
+                break
+            # The replay script returns null for failed / non 2xx responses
+            self.rate_limiter.record(api_request['url'], RequestOutcome.OK if response_text else RequestOutcome.TIMEOUT, time.monotonic() - started)
+            try:
+                page_listables = self._find_listables(json.loads(response_text or ''))
+            except ValueError:
+                break
+            page_urls = {self._get_listable_field(listable, 'url') for listable in page_listables}
+            # Stop at the last page, or if the API ignores the offset and keeps returning the same results
+            if not page_listables or page_urls <= seen_urls:
+                break
+            seen_urls |= page_urls
+            listables.extend(page_listables)
+        return listables
+
+    def _find_listables(self, api_response) -> list:
+        """
+        Finds every listing object in a search API response, wherever it is nested.
+
+        Args:
+            api_response: The decoded JSON response.
+
+        Returns:
+            List[dict]: Objects holding a listing url and a floorplan count or coordinates.
+        """
+        if isinstance(api_response, list):
+            return [listable for item in api_response for listable in self._find_listables(item)]
+        if not isinstance(api_response, dict):
+            return []
+        if self._get_listable_field(api_response, 'url') and (self._get_listable_field(api_response, 'floorplans') is not None or self._get_listable_field(api_response, 'lat') is not None):
+            return [api_response]
+        return [listable for value in api_response.values() for listable in self._find_listables(value)]
+
+    def _get_listable_field(self, listable: dict, field: str):
+        return next((listable[key] for key in LISTABLE_FIELDS[field] if listable.get(key) is not None), None)
+
+    def _add_listables(self, listables: list) -> int:
+        """
+        Stores listing urls, tile summaries and coordinates from search API listables.
+
+        Args:
+            listables (List[dict]): Listables returned by the search API.
+
+        Returns:
+            int: Number of listing urls added.
+        """
+        added_url_count = 0
+        for listable in listables:
+            listable_url = self._get_listable_field(listable, 'url')
+            if not listable_url:
+                continue
+            url = get_absolute_url(self.base_url, str(listable_url))
+            try:
+                unit_count = int(self._get_listable_field(listable, 'floorplans') or 1)
+            except (TypeError, ValueError):
+                continue
+            # Same threshold as tile based discovery
+            if unit_count < self.UNIT_COUNT_THRESHOLD or url in self.tile_summaries:
+                continue
+            self.urls.append(url)
+            added_url_count += 1
+            self.tile_summaries[url] = {
+                'floorplans': f"{unit_count} Floorplans",
+                'price': f"{self._get_listable_field(listable, 'min_price') or ''} - {self._get_listable_field(listable, 'max_price') or ''}"
+            }
+            lat, lon = self._get_listable_field(listable, 'lat'), self._get_listable_field(listable, 'lon')
+            if lat is not None and lon is not None:
+                self.listing_locations[url] = (lat, lon)
+        return added_url_count
+
+    def _try_load_page(self, web_driver: WebDriver, url: str, acquire: bool = True, max_attempts: int = None) -> bool:
         """
         Attempts to completely load the page and avoid perpetually loading state.
 
         Args:
             web_driver (WebDriver): The Selenium WebDriver to use for scraping.
             url (str): The URL of the page to load.
+            acquire (bool): Whether to wait for the rate limiter, False if the caller already took the token.
+            max_attempts (int): Number of loads to try, defaults to MAX_RETRIES.
 
         Returns:
             bool: True if the page loads successfully, False otherwise.
         """
-        for attempt in range(self.MAX_RETRIES):
+        max_attempts = max_attempts or self.MAX_RETRIES
+        for attempt in range(max_attempts):
+            # The first load uses the caller's token when it took one
+            if acquire or attempt > 0:
+                self.acquire(url)
+            started = time.monotonic()
             try:
-                web_driver.get(url)
-                WebDriverWait(web_driver, self.PAGE_LOAD_TIMEOUT).until(
-                    EC.presence_of_element_located((By.TAG_NAME, 'body'))
-                )
-                if web_driver.execute_script('return document.readyState') == 'complete':
-                    return True
-                else:
+                with self.metrics.time('page_load'):
+                    web_driver.get(url)
+                    WebDriverWait(web_driver, self.PAGE_LOAD_TIMEOUT).until(
+                        EC.presence_of_element_located((By.TAG_NAME, 'body'))
+                    )
+                    ready_state = web_driver.execute_script('return document.readyState')
+                if ready_state not in self._get_ready_states(web_driver):
                     print(f"ERROR: Page Load Timeout on {url}")
+                    self.rate_limiter.record(url, RequestOutcome.TIMEOUT)
+                    self.metrics.increment('timeouts', stage='page_load')
+                elif BLOCK_PAGE_PATTERN.search(web_driver.title or ''):
+                    print(f"ERROR: Blocked on {url}: {web_driver.title}")
+                    self.rate_limiter.record(url, RequestOutcome.BLOCKED)
+                    self.metrics.increment('blocks', path='browser')
+                else:
+                    self.rate_limiter.record(url, RequestOutcome.OK, time.monotonic() - started)
+                    return True
             except TimeoutException:
                 print(f"ERROR: Page Load Attempt {attempt + 1} failed for URL: {url}")
+                self.rate_limiter.record(url, RequestOutcome.TIMEOUT)
+                self.metrics.increment('timeouts', stage='page_load')
                 web_driver.refresh()  
+            if attempt < max_attempts - 1:
+                self.metrics.increment('retries', reason='page_load')
         return False
     
+    def _get_ready_states(self, web_driver: WebDriver) -> tuple:
+        # Drivers with the eager page load strategy (lean profile) return once the DOM is interactive
+        if web_driver.capabilities.get('pageLoadStrategy') == 'eager':
+            return ('interactive', 'complete')
+        return ('complete',)
+
     def _click_tile_view_button(self, web_driver: WebDriver):
         """
         Clicks tile view button to switch to tile view from default block view.
@@ -116,133 +436,431 @@ class PadmapperScraper(BaseScraper):
         """
         try:
             # Locate the button by class and aria-label attributes
-            button = web_driver.find_element(by=By.CSS_SELECTOR, value="button[aria-label*='Tile'][class*='list_gridOptionIconContainer']")
+            # Waited for since eager page loads can return before the page's scripts render it
+            button = WebDriverWait(web_driver, self.PAGE_LOAD_TIMEOUT).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "button[aria-label*='Tile'][class*='list_gridOptionIconContainer']"))
+            )
             web_driver.execute_script("arguments[0].click();", button)
             time.sleep(self.SCROLL_WAIT_TIME)
-        except NoSuchElementException:
+        except TimeoutException:
             print("Tile View button not found. Unable to continue")
-            raise
+            raise NoSuchElementException("Tile View button not found")
 
-    def _scroll_to_end_of_page(self, web_driver: WebDriver):
+    def _harvest_urls_while_scrolling(self, web_driver: WebDriver):
         """
-        Scrolls to the end of the page until no more content loads or a timeout is reached.
+        Scrolls to the end of the page, storing listing URLs as their tiles are added to the page.
 
         Args:
             web_driver (WebDriver): The Selenium WebDriver to use for scraping.
         """
-        last_height = web_driver.execute_script("return document.body.scrollHeight")
+        web_driver.execute_script(INSTALL_TILE_OBSERVER_SCRIPT)
+        self._add_harvested_tiles(web_driver.execute_script(DRAIN_TILES_SCRIPT))
 
         while True:
+            # Each scroll makes the page fetch the next batch of tiles
+            self.acquire(web_driver.current_url)
             web_driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(random.uniform(1, 2)) 
             try:
-                WebDriverWait(web_driver, 5).until(
-                    lambda driver: driver.execute_script("return document.body.scrollHeight") > last_height
+                # The observer counts tile links it has not seen before, evicted tiles were already drained
+                WebDriverWait(web_driver, TILE_IDLE_TIMEOUT, poll_frequency=0.25).until(
+                    lambda driver: driver.execute_script("return window.__tileHarvest.newTiles") > 0
                 )
-                last_height = web_driver.execute_script("return document.body.scrollHeight")
             except TimeoutException:
                 print("Reached the end of the page or no new content loaded.")
                 break
+            finally:
+                self._add_harvested_tiles(web_driver.execute_script(DRAIN_TILES_SCRIPT))
 
-    def _extract_urls(self, web_driver: WebDriver) -> list:
+    def _add_harvested_tiles(self, harvested_tiles: list) -> list:
         """
-        Extracts rental listing URLs from the home page.
+        Stores listing URLs and tile summaries of tiles drained from the page observer.
 
         Args:
-            web_driver (WebDriver): The Selenium WebDriver to use for scraping.
+            harvested_tiles (List[dict]): Tiles with the link href, floorplan count text and price text.
 
         Returns:
-            List[str]: List of extracted URLs.
+            List[str]: URLs of the tiles above the floorplan threshold.
         """
-        page_html_content = web_driver.page_source
-        soup = BeautifulSoup(page_html_content, 'html.parser')
-
         extracted_urls = []
-        # Get all rental listing URLs visible on the page
-        link_elements = soup.find_all('a', class_=lambda cls: cls and cls.startswith('ListItemTile_address'))
-        for link in link_elements:
-            # Find the number of floorplans for the listing by getting the relevant sibling div
-            for sibling in link.find_previous_siblings('div'):
-                if any("ListItemTile_bedBath" in cls for cls in sibling.get('class', [])) and 'floorplan' in sibling.get_text().lower():
-                    unit_count = int(sibling.get_text().split()[0])
-                    if unit_count >= self.UNIT_COUNT_THRESHOLD:
-                        # Extract the URL if number of floorplans is above threshold
-                        print(f"Extracted {sibling.get_text()} for {get_absolute_url(self.base_url, link.get('href'))}")
-                        extracted_urls.append(get_absolute_url(self.base_url, link.get('href')))
-                        break  # Move to the next link element after finding the correct div
+        for harvested_tile in harvested_tiles:
+            floorplans_text = harvested_tile['floorplans']
+            if 'floorplan' not in floorplans_text.lower():
+                continue
+            try:
+                unit_count = int(floorplans_text.split()[0])
+            except ValueError:
+                continue
+            url = get_absolute_url(self.base_url, harvested_tile['href'])
+            # Extract the URL if number of floorplans is above threshold
+            if unit_count >= self.UNIT_COUNT_THRESHOLD and url not in self.tile_summaries:
+                print(f"Extracted {floorplans_text} for {url}")
+                extracted_urls.append(url)
+                self.tile_summaries[url] = self._get_tile_summary(harvested_tile)
+        # Stored as they are drained so a scroll timeout keeps every url harvested so far
+        self.urls.extend(extracted_urls)
         return extracted_urls
 
-    def _process_floorplan_panels(self, web_driver: WebDriver) -> bool:
+    def _get_tile_summary(self, harvested_tile: dict) -> dict:
+        """
+        Collects what the landing page tile shows about a listing, used to detect listings that changed since the last run.
+
+        Args:
+            harvested_tile (dict): Tile drained from the page observer.
+
+        Returns:
+            dict: The floorplan count text and the visible price range text ('' if the tile shows no price).
+        """
+        return {'floorplans': harvested_tile['floorplans'], 'price': harvested_tile['price']}
+
+    def _process_floorplan_panels(self, web_driver: WebDriver, acquire: bool = True) -> bool:
         """
         Processes floorplan panels on the page if present.
 
         Args:
             web_driver (WebDriver): The Selenium WebDriver to use for scraping.
+            acquire (bool): Whether to wait for the rate limiter before expanding, False if the page's token covers it.
 
         Returns:
             bool: True if it's a single unit listing, False if multiple units are present.
         """
         try:
-            dropdown_divs = WebDriverWait(web_driver, 10).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div[class*='Floorplan_floorplanPanel']"))
-            )
-            for div in dropdown_divs:
-                web_driver.execute_script("arguments[0].scrollIntoView();", div)
-                web_driver.execute_script("arguments[0].click();", div)
-                generate_time_gap(2, 3)
-            return False
+            with self.metrics.time('floorplan_panel_wait'):
+                WebDriverWait(web_driver, 10).until(
+                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, FLOORPLAN_PANEL_SELECTOR))
+                )
         except TimeoutException:
             return True  # If floorplan panels are not found, assume it's a single unit
 
-    def get_rental_listing_data(self, web_driver: WebDriver, url: str) -> list:
+        # Every panel is expanded by one script, then a single wait covers all of them
+        if acquire:
+            self.acquire(web_driver.current_url)
+        with self.metrics.time('panel_expansion'):
+            panel_count = web_driver.execute_script(EXPAND_FLOORPLAN_PANELS_SCRIPT, FLOORPLAN_PANEL_SELECTOR)
+            try:
+                WebDriverWait(web_driver, self.PAGE_LOAD_TIMEOUT, poll_frequency=0.25).until(
+                    lambda driver: len(driver.find_elements(By.CSS_SELECTOR, UNIT_CONTAINER_SELECTOR)) >= panel_count
+                )
+            except TimeoutException:
+                # Extract whatever expanded, missing units surface as a short listing rather than a failed page
+                print(f"ERROR: Only some of {panel_count} floorplan panels expanded on {web_driver.current_url}")
+                self.metrics.increment('timeouts', stage='panel_expansion')
+        return False
+
+    def get_rental_listing_page(self, web_driver: WebDriver, url: str, acquire: bool = True, max_attempts: int = None):
         """
-        Iterates over all collected URLs and scrapes data from each link's page.
+        Loads a listing page, expands its floorplans and captures the HTML without parsing it.
 
         Args:
             web_driver (WebDriver): The Selenium WebDriver to use for scraping.
             url (str): URL of the listing page to scrape.
+            acquire (bool): Whether to wait for the rate limiter, False if the caller already took the page's token.
+            max_attempts (int): Number of page loads to try, defaults to MAX_RETRIES.
 
         Returns:
-            list: List of rental listing data dictionaries.
+            tuple or None: The page source and whether it's a single unit listing, or None if the page did not load.
         """
         try:
-            if not self._try_load_page(web_driver, url):
-                return []  # Skip processing this URL and continue with others
+            if not self._try_load_page(web_driver, url, acquire, max_attempts):
+                return None  # Skip processing this URL and continue with others
             
             # Wait for a summary table before proceeding
-            WebDriverWait(web_driver, 5).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div[class*='SummaryTable_']"))
-            )
+            with self.metrics.time('summary_table_wait'):
+                WebDriverWait(web_driver, 5).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "div[class*='SummaryTable_']"))
+                )
             
-            is_single_unit = self._process_floorplan_panels(web_driver)
-            link_html_content = web_driver.page_source
-            print(f"Processing listing: {url}")
-            return self._get_rental_units_data_by_listing(link_html_content, is_single_unit, url)
+            is_single_unit = self._process_floorplan_panels(web_driver, acquire)
+            with self.metrics.time('page_source'):
+                page_source = web_driver.page_source
+            return page_source, is_single_unit
         
         except Exception as e:
             print(f"Error encountered on page {url}: {e}")
             raise
+
+    def get_rental_listing_page_http(self, http_session: requests.Session, url: str):
+        """
+        Fetches a listing page's server-rendered HTML without a browser.
+
+        Args:
+            http_session (requests.Session): Pooled HTTP session used to fetch the page.
+            url (str): URL of the listing page to scrape.
+
+        Returns:
+            bytes or None: The raw page, or None if the request failed.
+        """
+        self.acquire(url)
+        started = time.monotonic()
+        try:
+            with self.metrics.time('http_fetch'):
+                response = http_session.get(url, timeout=self.PAGE_LOAD_TIMEOUT)
+        except requests.RequestException as e:
+            print(f"ERROR: HTTP fetch failed for {url}: {e}")
+            self.rate_limiter.record(url, RequestOutcome.TIMEOUT)
+            self.metrics.increment('timeouts', stage='http_fetch')
+            return None
+
+        if response.status_code in BLOCK_STATUS_CODES:
+            self.rate_limiter.record(url, RequestOutcome.BLOCKED, retry_after=self._get_retry_after(response))
+            self.metrics.increment('blocks', path='http')
+        elif response.status_code in SERVER_ERROR_STATUS_CODES:
+            self.rate_limiter.record(url, RequestOutcome.TIMEOUT)
+        else:
+            self.rate_limiter.record(url, RequestOutcome.OK, time.monotonic() - started)
+
+        if response.status_code != 200:
+            print(f"ERROR: HTTP fetch returned {response.status_code} for {url}")
+            return None
+
+        # Raw bytes so the document's own charset is used rather than requests' guess
+        return response.content
+
+    def get_rental_listing_data(self, web_driver: WebDriver, url: str) -> list:
+        """
+        Loads and parses a single listing page on the calling thread.
+
+        Args:
+            web_driver (WebDriver): The Selenium WebDriver to use for scraping.
+            url (str): URL of the listing page to scrape.
+
+        Returns:
+            list: List of rental listing data dictionaries.
+        """
+        listing_page = self.get_rental_listing_page(web_driver, url)
+        if listing_page is None:
+            return []
+        link_html_content, is_single_unit = listing_page
+        print(f"Processing listing: {url}")
+        return self.add_listing_units(extract_listing_units(link_html_content, is_single_unit, url))
     
-    def _get_rental_units_data_by_listing(self, link_html_content: str, is_single_unit: bool, url: str) -> list:
+    def get_rental_listing_data_http(self, http_session: requests.Session, url: str):
         """
-        Extracts relevant data for each rental unit on listing (can be single unit).
+        Scrapes a listing page from its server-rendered HTML without a browser, parsing it on the calling thread.
 
         Args:
-            link_html_content (str): The HTML content of the page to be scraped.
+            http_session (requests.Session): Pooled HTTP session used to fetch the page.
+            url (str): URL of the listing page to scrape.
+
+        Returns:
+            list or None: List of rental listing data dictionaries, or None if the page
+            must be scraped with the browser (request failed, summary table or floorplans missing).
+        """
+        page_content = self.get_rental_listing_page_http(http_session, url)
+        if page_content is None:
+            return None
+        rental_listing_units = extract_listing_units(page_content, False, url, from_http=True)
+        if rental_listing_units is None:
+            return None
+        print(f"Processing listing (http): {url}")
+        return self.add_listing_units(rental_listing_units)
+
+    def _get_retry_after(self, response: requests.Response):
+        # Only the delay-seconds form of Retry-After is honoured, an HTTP date falls back to the default cooldown
+        try:
+            return float(response.headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            return None
+
+    def add_listing_units(self, rental_listing_units: list) -> list:
+        """
+        Stores the units extracted from a listing page.
+
+        Args:
+            rental_listing_units (list): Rental unit data dictionaries of one listing.
+
+        Returns:
+            list: The same units.
+        """
+        city_text = rental_listing_units[0][TableHeaders.CITY.value] if rental_listing_units else ""
+        with self._listings_lock:
+            self.listings += rental_listing_units
+            print(f"Extracted {len(rental_listing_units)} units in {city_text}")
+            print(f"Total units: {len(self.listings)}")
+        return rental_listing_units
+
+def extract_listing_units(html_content, is_single_unit: bool, url: str, from_http: bool = False):
+    """
+    Parses a listing page into its rental units.
+
+    Module level and free of scraper state so it can run in a worker process.
+
+    Args:
+        html_content (str | bytes): The HTML content of the listing page.
+        is_single_unit (bool): Whether the listing is a single unit or has multiple units.
+        url (str): URL of the listing page.
+        from_http (bool): Whether the page is server-rendered HTML fetched without a browser.
+
+    Returns:
+        list or None: A list of dictionaries, each containing data for a rental unit,
+        or None if a server-rendered page lacks the summary table or floorplans, or has partly rendered units, and must be scraped with the browser.
+
+    Raises:
+        ValueError: If a browser page has a partly rendered unit container, so the page is fetched again.
+    """
+    soup = DataExtractor.parse_html(html_content)
+    page_index = DataExtractor.index_page(soup)
+
+    # Collapsed floorplan panels or client-side rendering leave these out, only the browser can expand them
+    if from_http and not DataExtractor.has_listing_content(page_index):
+        return None
+
+    try:
+        return DataExtractor.extract_listing_units(soup, is_single_unit, url, page_index)
+    except ValueError:
+        if from_http:
+            return None
+        raise
+        
+# Parser backend used to build the tree for DataExtractor - any BeautifulSoup tree builder name works
+# lxml builds the tree several times faster than the pure python html.parser
+# Extraction matches the original html.parser / find based extractor field for field (tests/test_extractor_equivalence.py)
+#   except that a page without a summary table or neighbourhood divider gives '' for those fields instead of raising
+#   a unit container without its sqft or bath element still fails the page (ValueError) like the original did
+PARSER_BACKEND = 'lxml'
+
+# Selector table compiled once at import: field -> (tag name, compiled class substring pattern)
+# A tag matches when its name equals the tag name and any of its classes contains the substring
+SELECTORS = {
+    field: (tag_name, re.compile(re.escape(class_substring)))
+    for field, (tag_name, class_substring) in {
+        'building_title': ('h1', 'FullDetail_street_'),
+        'neighbourhood_divider': ('span', 'FullDetail_cityStateDivider_'),
+        'neighbourhood_link': ('a', 'FullDetail_cityStateLink_'),
+        'summary_table': ('div', 'SummaryTable_summaryTable_'),
+        'amenities_header': ('div', 'Amenities_header_'),
+        'amenities_text': ('div', 'Amenities_text_'),
+        'floorplans_container': ('div', 'Floorplan_floorplansContainer_'),
+        'floorplan_title': ('div', 'Floorplan_title_'),
+        'unit_container': ('div', 'Floorplan_floorplanDetailContainer_'),
+        'unit_title': ('div', 'Floorplan_floorplanTitle'),
+        'unit_price': ('div', 'Floorplan_floorplanPrice'),
+        'unit_sqft': ('div', 'Floorplan_sqft'),
+        'unit_bath': ('div', 'Floorplan_bath'),
+    }.items()
+}
+
+# Meta tags holding the listing location, keyed by their name attribute
+META_FIELDS = {
+    'place:location:latitude': 'latitude',
+    'place:location:longitude': 'longitude',
+    'place:locality': 'city',
+}
+
+# Page level fields where only the first match in document order is used
+FIRST_MATCH_FIELDS = ['building_title', 'neighbourhood_divider', 'summary_table']
+
+# Page level fields where every match is used
+ALL_MATCH_FIELDS = ['amenities_header', 'floorplans_container']
+
+# Fields read from each unit container
+UNIT_FIELDS = ['unit_title', 'unit_price', 'unit_sqft', 'unit_bath']
+
+# A unit container missing one of these is only partly rendered, the page fails so it is fetched again
+#   (the original find based extractor raised on them too, while a missing title or price gives '')
+REQUIRED_UNIT_FIELDS = ['unit_sqft', 'unit_bath']
+
+class DataExtractor():
+    """
+    Extracts listing data from a parsed listing page.
+
+    Each extraction walks the tree once and tests every tag against the precompiled SELECTORS,
+    instead of one find / find_all call (and one full tree walk) per field.
+    """
+    @staticmethod
+    def parse_html(html_content, parser_backend: str = PARSER_BACKEND) -> BeautifulSoup:
+        """
+        Parses listing page HTML with the configured parser backend.
+
+        Args:
+            html_content (str | bytes): The HTML content of the page.
+            parser_backend (str): BeautifulSoup tree builder to use e.g. 'lxml' or 'html.parser'.
+
+        Returns:
+            BeautifulSoup: The parsed page.
+        """
+        return BeautifulSoup(html_content, parser_backend)
+
+    @staticmethod
+    def _matches(tag, field: str) -> bool:
+        tag_name, class_pattern = SELECTORS[field]
+        return tag.name == tag_name and any(class_pattern.search(cls) for cls in tag.get('class') or ())
+
+    @staticmethod
+    def _walk_tags(root):
+        # Yields every tag below root in document order, skipping text nodes
+        for element in root.descendants:
+            if element.name is not None:
+                yield element
+
+    @staticmethod
+    def index_page(soup: BeautifulSoup) -> dict:
+        """
+        Collects every element the extractors need in a single walk of the tree.
+
+        Args:
+            soup (BeautifulSoup): The BeautifulSoup object to index.
+
+        Returns:
+            dict: Field name to the first matching tag (or None) for FIRST_MATCH_FIELDS,
+            a list of matching tags for ALL_MATCH_FIELDS and the content of each META_FIELDS tag.
+        """
+        page_index = {field: None for field in FIRST_MATCH_FIELDS}
+        page_index.update({field: [] for field in ALL_MATCH_FIELDS})
+        page_index.update({meta_field: None for meta_field in META_FIELDS.values()})
+
+        for tag in DataExtractor._walk_tags(soup):
+            if tag.name == 'meta':
+                meta_field = META_FIELDS.get(tag.get('name'))
+                if meta_field and page_index[meta_field] is None:
+                    page_index[meta_field] = tag
+                continue
+            if not tag.get('class'):
+                continue
+            for field in FIRST_MATCH_FIELDS:
+                if page_index[field] is None and DataExtractor._matches(tag, field):
+                    page_index[field] = tag
+            for field in ALL_MATCH_FIELDS:
+                if DataExtractor._matches(tag, field):
+                    page_index[field].append(tag)
+
+        return page_index
+
+    @staticmethod
+    def has_listing_content(page_index: dict) -> bool:
+        """
+        Checks an indexed page holds a summary table and at least one expanded unit container.
+
+        Args:
+            page_index (dict): Result of index_page(soup).
+
+        Returns:
+            bool: True if the units can be extracted from the page.
+        """
+        has_unit_container = any(DataExtractor._find_all(floorplan, 'unit_container') for floorplan in page_index['floorplans_container'])
+        return bool(page_index['summary_table']) and has_unit_container
+
+    @staticmethod
+    def extract_listing_units(soup: BeautifulSoup, is_single_unit: bool, url: str, page_index: dict = None) -> list:
+        """
+        Extracts relevant data for each rental unit from an already parsed listing page.
+
+        Args:
+            soup (BeautifulSoup): The parsed HTML content of the listing page.
             is_single_unit (bool): Whether the listing is a single unit or has multiple units.
             url (str): URL of the listing page.
+            page_index (dict): Result of index_page(soup), built if not provided.
 
         Returns:
             list: A list of dictionaries, each containing data for a rental unit.
         """
-        # Parse the HTML with BeautifulSoup
-        soup = BeautifulSoup(link_html_content, 'html.parser')
-        
-        building_title_text, neighborhood_title_text, price_text, bed_text, bath_text, sqft_text, address_text, pets_text, lat_text, lon_text, city_text = DataExtractor.extract_building_details(soup)
+        # Walk the page once and share the index between the extractors
+        page_index = page_index or DataExtractor.index_page(soup)
+
+        building_title_text, neighborhood_title_text, price_text, bed_text, bath_text, sqft_text, address_text, pets_text, lat_text, lon_text, city_text = DataExtractor.extract_building_details(soup, page_index)
 
-        unit_amenities_text, building_amenities_text = DataExtractor.extract_amenities(soup)
+        unit_amenities_text, building_amenities_text = DataExtractor.extract_amenities(soup, page_index)
 
-        all_units_data = DataExtractor.extract_rental_unit_details(soup)
+        all_units_data = DataExtractor.extract_rental_unit_details(soup, page_index)
 
         # For single page listings, all_units_data is already extracted from extract_building_details(), extract_rental_unit_details() will return empty
         all_units_data = all_units_data if not is_single_unit else [
@@ -271,47 +889,41 @@ class PadmapperScraper(BaseScraper):
             unit_data[TableHeaders.URL.value] = url
             rental_listing_units.append(unit_data)
 
-        self.listings += rental_listing_units
-        print(f"Extracted {len(rental_listing_units)} units in {city_text}")
-        print(f"Total units: {len(self.listings)}")
-        with open('listings.pkl', 'wb') as file:
-            pickle.dump(self.listings, file)
         return rental_listing_units
-        
-class DataExtractor():
+
     @staticmethod
-    def extract_building_details(soup: BeautifulSoup) -> tuple:
+    def extract_building_details(soup: BeautifulSoup, page_index: dict = None) -> tuple:
         """
         Extracts building details from the listing page.
 
         Args:
             soup (BeautifulSoup): The BeautifulSoup object to extract data from.
+            page_index (dict): Result of index_page(soup), built if not provided.
 
         Returns:
             tuple: A tuple containing building details.
         """
-        building_title = soup.find('h1', class_=lambda cls: cls and 'FullDetail_street_' in cls)
+        page_index = page_index or DataExtractor.index_page(soup)
+
+        building_title = page_index['building_title']
         building_title_text = re.split(r'[^\w ]+',  building_title.get_text())[0] if building_title else ""
 
-        neighborhood_title_sep = soup.find('span', class_=lambda cls: cls and 'FullDetail_cityStateDivider_' in cls)
-        neighborhood_title = neighborhood_title_sep.find_next_sibling('a', class_=lambda cls: cls and 'FullDetail_cityStateLink_' in cls)
+        neighborhood_title_sep = page_index['neighbourhood_divider']
+        neighborhood_title = None
+        if neighborhood_title_sep:
+            neighborhood_title = next(
+                (sibling for sibling in neighborhood_title_sep.next_siblings if DataExtractor._matches(sibling, 'neighbourhood_link')), None
+            )
         neighborhood_title_text = re.split(r'[^\w ]+',  neighborhood_title.get_text())[0] if neighborhood_title else ""
 
-        details = soup.find('div', class_=lambda cls: cls and 'SummaryTable_summaryTable_' in cls)
+        details = page_index['summary_table']
 
         [price_text, bed_text, bath_text, sqft_text, address_text, pets_text] = DataExtractor.extract_summary_table(details)
 
-        # Find the latitude meta tag
-        latitude_tag = soup.find('meta', {'name': 'place:location:latitude'})
-        lat_text = latitude_tag['content'] if latitude_tag else ""
-
-        # Find the longitude meta tag
-        longitude_tag = soup.find('meta', {'name': 'place:location:longitude'})
-        lon_text = longitude_tag['content'] if longitude_tag else ""
-
-        # Find the city meta tag
-        city_tag = soup.find('meta', {'name': 'place:locality'})
-        city_text = city_tag['content'] if city_tag else ""
+        # Latitude, longitude and city come from the place meta tags
+        lat_text = page_index['latitude']['content'] if page_index['latitude'] else ""
+        lon_text = page_index['longitude']['content'] if page_index['longitude'] else ""
+        city_text = page_index['city']['content'] if page_index['city'] else ""
 
         return (building_title_text, neighborhood_title_text, price_text, bed_text, bath_text, sqft_text, address_text, pets_text, lat_text, lon_text, city_text)
 
@@ -326,9 +938,24 @@ class DataExtractor():
         Returns:
             list: A list of extracted details.
         """
+        matching_functions = [match_price, match_bed, match_bath, match_sqft, match_address, match_pets]
+        detail_headers = [None] * len(matching_functions)
+
+        if soup:
+            # Single walk of the table, computing each candidate header's text once for all matchers
+            for tag in DataExtractor._walk_tags(soup):
+                header_text = None
+                for position, matching_function in enumerate(matching_functions):
+                    if detail_headers[position] is not None or matching_function.tag_name not in tag.name:
+                        continue
+                    header_text = header_text if header_text is not None else tag.get_text().lower().strip()
+                    if matching_function.text in header_text:
+                        detail_headers[position] = tag
+                if all(detail_headers):
+                    break
+
         extracted_text = []
-        for matching_function in [match_price, match_bed, match_bath, match_sqft, match_address, match_pets]:
-            detail_header = soup.find(matching_function)
+        for detail_header in detail_headers:
             parent_detail_li = detail_header.find_parent('li') if detail_header else None
             detail_div = parent_detail_li.find('div') if parent_detail_li else None
             detail_text = detail_div.get_text().strip() if detail_div else ""
@@ -336,25 +963,28 @@ class DataExtractor():
         return extracted_text
 
     @staticmethod
-    def extract_amenities(soup: BeautifulSoup) -> tuple:
+    def extract_amenities(soup: BeautifulSoup, page_index: dict = None) -> tuple:
         """
         Extracts text of unit and building amenities.
 
         Args:
             soup (BeautifulSoup): The BeautifulSoup object to extract data from.
+            page_index (dict): Result of index_page(soup), built if not provided.
 
         Returns:
             tuple: A tuple containing text of unit amenities and building amenities.
         """
-        amenities = soup.find_all('div', class_=lambda value: value and 'Amenities_header_' in value)
+        page_index = page_index or DataExtractor.index_page(soup)
+
+        amenities = page_index['amenities_header']
         unit_amenities, building_amenities = [], []
         try:
             unit_amenities_header = amenities[0] if len(amenities) == 2 and "apartment" in amenities[0].get_text().lower() else ""
             building_amenities_header = amenities[1] if len(amenities) == 2 and "building" in amenities[1].get_text().lower() else ""
             unit_amenities_container = unit_amenities_header.find_parent('div') if unit_amenities_header else ""
             building_amenities_container = building_amenities_header.find_parent('div') if building_amenities_header else ""
-            unit_amenities = unit_amenities_container.find_all('div', class_=lambda cls: cls and 'Amenities_text_' in cls) if unit_amenities_container else []
-            building_amenities = building_amenities_container.find_all('div', class_=lambda cls: cls and 'Amenities_text_' in cls) if building_amenities_container else []
+            unit_amenities = DataExtractor._find_all(unit_amenities_container, 'amenities_text') if unit_amenities_container else []
+            building_amenities = DataExtractor._find_all(building_amenities_container, 'amenities_text') if building_amenities_container else []
         except Exception as e:
             print("Error - Getting amenities: ", e)
             
@@ -364,30 +994,55 @@ class DataExtractor():
         return (unit_amenities_text, building_amenities_text)
 
     @staticmethod
-    def extract_rental_unit_details(soup: BeautifulSoup) -> list:
+    def _find_all(root, field: str) -> list:
+        return [tag for tag in DataExtractor._walk_tags(root) if DataExtractor._matches(tag, field)]
+
+    @staticmethod
+    def extract_rental_unit_details(soup: BeautifulSoup, page_index: dict = None) -> list:
         """
         Extracts rental unit details from the listing page.
 
         Args:
             soup (BeautifulSoup): The BeautifulSoup object to extract data from.
+            page_index (dict): Result of index_page(soup), built if not provided.
 
         Returns:
             list: A list of dictionaries, each containing data for a rental unit.
+
+        Raises:
+            ValueError: If a unit container has no sqft or bath element.
         """
+        page_index = page_index or DataExtractor.index_page(soup)
+
         all_units_data = []
 
-        # Find all divs where class contains 'Floorplan_floorplan'
-        floorplans = soup.find_all('div', class_=lambda cls: cls and 'Floorplan_floorplansContainer_' in cls)
-        for floorplan in floorplans:
-            current_floorplan = floorplan.find('div', class_=lambda cls: cls and 'Floorplan_title_' in cls)
+        for floorplan in page_index['floorplans_container']:
+            # One walk per floorplan collects its title and every unit container
+            current_floorplan = None
+            unit_containers = []
+            for tag in DataExtractor._walk_tags(floorplan):
+                if current_floorplan is None and DataExtractor._matches(tag, 'floorplan_title'):
+                    current_floorplan = tag
+                if DataExtractor._matches(tag, 'unit_container'):
+                    unit_containers.append(tag)
             floorplan_title_text = current_floorplan.get_text().strip() if current_floorplan else ""
             
-            unit_containers = floorplan.find_all('div', class_=lambda cls: cls and 'Floorplan_floorplanDetailContainer_' in cls)
             for unit_container in unit_containers:
-                unit_title = unit_container.find('div', class_=lambda cls: cls and 'Floorplan_floorplanTitle' in cls)
-                unit_price = unit_container.find('div', class_=lambda cls: cls and 'Floorplan_floorplanPrice' in cls)
-                unit_sqft = unit_container.find('div', class_=lambda cls: cls and 'Floorplan_sqft' in cls).find('span')
-                unit_bath = unit_container.find('div', class_=lambda cls: cls and 'Floorplan_bath' in cls).find('span')
+                # One walk per unit container collects every unit field
+                unit_fields = {field: None for field in UNIT_FIELDS}
+                for tag in DataExtractor._walk_tags(unit_container):
+                    for field in UNIT_FIELDS:
+                        if unit_fields[field] is None and DataExtractor._matches(tag, field):
+                            unit_fields[field] = tag
+
+                missing_fields = [field for field in REQUIRED_UNIT_FIELDS if unit_fields[field] is None]
+                if missing_fields:
+                    raise ValueError(f"Unit container without {', '.join(missing_fields)} under floorplan '{floorplan_title_text}'")
+
+                unit_title = unit_fields['unit_title']
+                unit_price = unit_fields['unit_price']
+                unit_sqft = unit_fields['unit_sqft'].find('span')
+                unit_bath = unit_fields['unit_bath'].find('span')
                 
                 unit_title_text = unit_title.get_text().strip() if unit_title else ""
                 unit_price_text = unit_price.get_text().strip() if unit_price else ""
@@ -408,4 +1063,4 @@ class DataExtractor():
 
                 all_units_data.append(unit_data)
         
-        return all_units_data
\ No newline at end of file
+        return all_units_data
@@ -4,9 +4,14 @@ from constants import (
 
 from azure.identity import DefaultAzureCredential, CertificateCredential
 from azure.keyvault.secrets import SecretClient
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 from datetime import datetime
+import threading
 import os
+import time
 import base64
 import requests
 
@@ -14,15 +19,40 @@ load_dotenv()
 
 APP_TENANT_ID = os.getenv("APP_TENANT_ID")
 APP_CLIENT_ID = os.getenv("APP_CLIENT_ID")
-KEY_VAULT_URL = os.getenv("KEY_VAULT_URL")        
+KEY_VAULT_URL = os.getenv("KEY_VAULT_URL")
 
-def get_access_token() -> str:
+#################################### High Level Comments ###################################
+# Uploads the month's cleaned data, raw data and log files to SharePoint through the Microsoft Graph API
+# The Key Vault certificate is read once per process and its Graph token is cached until TOKEN_REFRESH_MARGIN before expiry
+# Every Graph call of an uploader goes through one pooled session, the site and drive ids are looked up once
+# Files up to SIMPLE_UPLOAD_LIMIT are sent in a single PUT (Graph's limit for simple uploads)
+#   larger files go through a Graph upload session in UPLOAD_CHUNK_SIZE chunks,
+#   a failed chunk asks the session which ranges it still expects and resumes from there
+# The three directories are uploaded concurrently
+# Each directory uploads its newest UPLOAD_EXTENSIONS file of the month, so the raw Parquet dataset, its journal
+#   and the cleaned Parquet files next to the Excel exports are never picked
+# GRAPH_BASE_URL can point at a local mock Graph endpoint, with a token provider that does not need Key Vault
+
+GRAPH_BASE_URL = os.getenv("GRAPH_BASE_URL", "https://graph.microsoft.com/v1.0")
+GRAPH_SCOPE = "https://graph.microsoft.com/.default"
+SHAREPOINT_DRIVE_NAME = "Documents"
+TOKEN_REFRESH_MARGIN = 300
+SIMPLE_UPLOAD_LIMIT = 4 * 1024 * 1024
+# Upload session chunks must be a multiple of 320 KiB
+UPLOAD_CHUNK_SIZE = 10 * 320 * 1024
+MAX_CHUNK_ATTEMPTS = 5
+UPLOAD_TIMEOUT = 60
+UPLOAD_WORKERS = 3
+# Only the month's Excel exports and log files are uploaded, not the Parquet datasets or journals stored beside them
+UPLOAD_EXTENSIONS = ('.xlsx', '.txt', '.log')
+
+def create_certificate_credential() -> CertificateCredential:
     default_credential = DefaultAzureCredential()
     vault_url = KEY_VAULT_URL
     secret_client = SecretClient(vault_url=vault_url, credential=default_credential)
 
     secret_name = [secret.name for secret in secret_client.list_properties_of_secrets()][0]
-    secret = secret_client.get_secret(secret_name)  
+    secret = secret_client.get_secret(secret_name)
 
     # The value of the secret is the base64-encoded bytes of the .pfx certificate
     certificate_bytes = base64.b64decode(secret.value)
@@ -30,63 +60,238 @@ def get_access_token() -> str:
     tenant_id = APP_TENANT_ID
     client_id = APP_CLIENT_ID
 
-    credential = CertificateCredential(
+    return CertificateCredential(
         tenant_id=tenant_id,
         client_id=client_id,
         certificate_data=certificate_bytes,
     )
 
-    token = credential.get_token("https://graph.microsoft.com/.default")
+class GraphTokenProvider():
+    """
+    Thread safe cache of the Graph access token, refreshed shortly before it expires.
+
+    Attributes:
+        credential_factory (callable): Creates the credential tokens are requested from, called once.
+        refresh_margin (float): Seconds before expiry the token is refreshed.
+    """
+    def __init__(self, credential_factory=None, refresh_margin: float = TOKEN_REFRESH_MARGIN):
+        self.credential_factory = credential_factory or create_certificate_credential
+        self.refresh_margin = refresh_margin
+        self._credential = None
+        self._token = None
+        self._expires_on = 0
+        self._lock = threading.Lock()
+
+    def get_token(self) -> str:
+        """
+        Returns the cached access token, requesting a new one if it expires within the refresh margin.
 
-    return token.token 
+        Returns:
+            str: A Graph access token.
+        """
+        with self._lock:
+            if self._token is None or time.time() >= self._expires_on - self.refresh_margin:
+                if self._credential is None:
+                    self._credential = self.credential_factory()
+                access_token = self._credential.get_token(GRAPH_SCOPE)
+                self._token, self._expires_on = access_token.token, access_token.expires_on
+            return self._token
+
+_default_token_provider = GraphTokenProvider()
+
+def get_access_token() -> str:
+    return _default_token_provider.get_token()
 
 def get_sharepoint_headers(access_token: str) -> dict:
-    access_token = get_access_token()
     return {"Authorization": f"Bearer {access_token}"}
 
+def create_graph_session(pool_size: int = UPLOAD_WORKERS) -> requests.Session:
+    graph_session = requests.Session()
+
+    # Throttled (429) and transient server errors are retried, honouring Graph's Retry-After header
+    retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+    http_adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=retries)
+    graph_session.mount('https://', http_adapter)
+    graph_session.mount('http://', http_adapter)
 
-def get_sharepoint_site_id(graph_api_endpoint: str, access_token: str):
+    return graph_session
+
+def get_sharepoint_site_id(graph_api_endpoint: str, access_token: str, graph_session: requests.Session = None):
     headers = get_sharepoint_headers(access_token)
-    response = requests.get(graph_api_endpoint, headers=headers)
+    response = (graph_session or requests).get(graph_api_endpoint, headers=headers, timeout=UPLOAD_TIMEOUT)
     return response.json().get('id')
 
-def get_sharepoint_drive_id(site_id: str, access_token: str) -> str:
+def get_sharepoint_drive_id(site_id: str, access_token: str, graph_session: requests.Session = None, graph_base_url: str = GRAPH_BASE_URL) -> str:
     headers = get_sharepoint_headers(access_token)
-    drives_api_endpoint = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives"
-    response = requests.get(drives_api_endpoint, headers=headers)
+    drives_api_endpoint = f"{graph_base_url}/sites/{site_id}/drives"
+    response = (graph_session or requests).get(drives_api_endpoint, headers=headers, timeout=UPLOAD_TIMEOUT)
     drives = response.json().get('value')
     for drive in drives:
-        if drive.get('name') == "Documents":
+        if drive.get('name') == SHAREPOINT_DRIVE_NAME:
             drive_id = drive.get('id')
             return drive_id
     return ""
 
-def upload_document_to_sharepoint(file_content: bytes, file_path: str):
-    try:
-        access_token = get_access_token()
-        headers = get_sharepoint_headers(access_token)
-        site_id = get_sharepoint_site_id(os.getenv("GRAPH_API_ENDPOINT"), access_token)
-        drive_id = get_sharepoint_drive_id(site_id, access_token)
-        if drive_id is None or site_id is None:
-            raise Exception("Failed to get SharePoint site or drive ID")
-        upload_api_endpoint = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/root:/{file_path}:/content"
-        response = requests.put(upload_api_endpoint,
-                                headers=headers, data=file_content, timeout=60)
-    except Exception as e:
-        raise e
-    return response.status_code in (200, 201)
-
-current_timestamp = datetime.now().strftime("%m-%Y")
-cleaned_data_files = os.listdir(os.path.join('data', 'cleaned_data'))
-
-for directory in [
-    r'C:\Users\adamc\Downloads\RentalScraper\RentalScraperCode\data\cleaned_data', r'C:\Users\adamc\Downloads\RentalScraper\RentalScraperCode\data\raw_data', r'C:\Users\adamc\Downloads\RentalScraper\RentalScraperCode\logs'
-]:
-    files = [os.path.join(directory, f) for f in os.listdir(directory)]
-    files.sort(key=os.path.getmtime, reverse=True)
-    target_files =  [file_path for file_path in files if current_timestamp in file_path]
-    target_file = target_files[0] if target_files else None
+class SharePointUploader():
+    """
+    Uploads files to the SharePoint document library, sharing one token, session and site / drive lookup between uploads.
+
+    Attributes:
+        graph_api_endpoint (str): Graph endpoint of the SharePoint site, defaults to GRAPH_API_ENDPOINT in .env.
+        graph_base_url (str): Base url of the Graph API, e.g. a local mock endpoint.
+        token_provider (GraphTokenProvider): Source of the cached access token.
+        graph_session (requests.Session): Pooled session every request goes through.
+    """
+    def __init__(self, graph_api_endpoint: str = None, graph_base_url: str = GRAPH_BASE_URL, token_provider: GraphTokenProvider = None, graph_session: requests.Session = None):
+        self.graph_api_endpoint = graph_api_endpoint or os.getenv("GRAPH_API_ENDPOINT")
+        self.graph_base_url = graph_base_url
+        self.token_provider = token_provider or _default_token_provider
+        self.graph_session = graph_session or create_graph_session()
+        self._drive_url = None
+        self._lock = threading.Lock()
+
+    def get_drive_url(self) -> str:
+        """
+        Looks up the site and drive ids once and returns the drive's Graph url.
+
+        Returns:
+            str: e.g. https://graph.microsoft.com/v1.0/sites/<site id>/drives/<drive id>.
+        """
+        with self._lock:
+            if self._drive_url is None:
+                access_token = self.token_provider.get_token()
+                site_id = get_sharepoint_site_id(self.graph_api_endpoint, access_token, self.graph_session)
+                drive_id = get_sharepoint_drive_id(site_id, access_token, self.graph_session, self.graph_base_url) if site_id else None
+                if not drive_id or not site_id:
+                    raise Exception("Failed to get SharePoint site or drive ID")
+                self._drive_url = f"{self.graph_base_url}/sites/{site_id}/drives/{drive_id}"
+            return self._drive_url
+
+    def upload(self, file_content: bytes, file_path: str) -> bool:
+        """
+        Uploads a file, in one request or through an upload session depending on its size.
+
+        Args:
+            file_content (bytes): Content of the file.
+            file_path (str): Path of the file in the document library, e.g. Rental Web Scraper/06-2024/raw_listings.xlsx.
+
+        Returns:
+            bool: True if the file was uploaded.
+        """
+        if len(file_content) <= SIMPLE_UPLOAD_LIMIT:
+            upload_api_endpoint = f"{self.get_drive_url()}/root:/{file_path}:/content"
+            response = self.graph_session.put(upload_api_endpoint, headers=get_sharepoint_headers(self.token_provider.get_token()), data=file_content, timeout=UPLOAD_TIMEOUT)
+            return response.status_code in (200, 201)
+        return self._upload_in_chunks(file_content, file_path)
+
+    def upload_files(self, uploads: list[tuple]) -> list[bool]:
+        """
+        Uploads several files concurrently.
+
+        Args:
+            uploads (list[tuple]): (file content, file path in the document library) pairs.
+
+        Returns:
+            list[bool]: Whether each file was uploaded, in order.
+        """
+        # Resolved before the workers start, so the site and drive ids are looked up once
+        self.get_drive_url()
+        with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as upload_executor:
+            return list(upload_executor.map(lambda upload: self.upload(*upload), uploads))
+
+    def close(self):
+        self.graph_session.close()
+
+    def _upload_in_chunks(self, file_content: bytes, file_path: str) -> bool:
+        """
+        Uploads a large file through a Graph upload session, resuming from the ranges the session still expects after a failed chunk.
+
+        Args:
+            file_content (bytes): Content of the file.
+            file_path (str): Path of the file in the document library.
+
+        Returns:
+            bool: True if the file was uploaded.
+        """
+        session_api_endpoint = f"{self.get_drive_url()}/root:/{file_path}:/createUploadSession"
+        response = self.graph_session.post(
+            session_api_endpoint, headers=get_sharepoint_headers(self.token_provider.get_token()),
+            json={"item": {"@microsoft.graph.conflictBehavior": "replace"}}, timeout=UPLOAD_TIMEOUT
+        )
+        response.raise_for_status()
+        # The upload url is pre-authenticated, Graph rejects requests to it that carry a bearer token
+        upload_url = response.json()['uploadUrl']
+
+        file_size = len(file_content)
+        offset = 0
+        failed_attempts = 0
+        while offset < file_size:
+            chunk = file_content[offset:offset + UPLOAD_CHUNK_SIZE]
+            content_range = f"bytes {offset}-{offset + len(chunk) - 1}/{file_size}"
+            try:
+                response = self.graph_session.put(upload_url, headers={"Content-Range": content_range}, data=chunk, timeout=UPLOAD_TIMEOUT)
+                if response.status_code in (200, 201):
+                    return True
+                response.raise_for_status()
+                offset = self._get_next_offset(response.json(), offset + len(chunk))
+            except requests.RequestException as e:
+                failed_attempts += 1
+                if failed_attempts >= MAX_CHUNK_ATTEMPTS:
+                    self.graph_session.delete(upload_url, timeout=UPLOAD_TIMEOUT)
+                    raise e
+                print(f"ERROR: Chunk {content_range} of {file_path} failed, resuming: {e}")
+                time.sleep(2 ** failed_attempts)
+                status_response = self.graph_session.get(upload_url, timeout=UPLOAD_TIMEOUT)
+                offset = self._get_next_offset(status_response.json(), offset)
+        return False
+
+    def _get_next_offset(self, upload_status: dict, default_offset: int) -> int:
+        # e.g. {"nextExpectedRanges": ["3276800-"]}
+        next_expected_ranges = upload_status.get('nextExpectedRanges')
+        if not next_expected_ranges:
+            return default_offset
+        return int(next_expected_ranges[0].split('-')[0])
+
+def upload_document_to_sharepoint(file_content: bytes, file_path: str, sharepoint_uploader: SharePointUploader = None) -> bool:
+    sharepoint_uploader = sharepoint_uploader or SharePointUploader()
+    return sharepoint_uploader.upload(file_content, file_path)
+
+def get_month_upload(directory: str, current_timestamp: str) -> tuple:
+    """
+    Finds the newest Excel or log file of the month in a directory and the path it is uploaded to.
+
+    Args:
+        directory (str): Directory of cleaned data, raw data or logs.
+        current_timestamp (str): Month of the run e.g. 06-2024.
+
+    Returns:
+        tuple: The file's content and its path in the document library.
+
+    Raises:
+        FileNotFoundError: If the directory has no Excel or log file for the month.
+    """
+    target_files = [
+        os.path.join(directory, file_name) for file_name in os.listdir(directory)
+        if current_timestamp in file_name and file_name.endswith(UPLOAD_EXTENSIONS) and os.path.isfile(os.path.join(directory, file_name))
+    ]
+    if not target_files:
+        raise FileNotFoundError(f"No {', '.join(UPLOAD_EXTENSIONS)} file for {current_timestamp} in {directory}")
+    target_file = max(target_files, key=os.path.getmtime)
+    print(f"Uploading {target_file}")
     with open(target_file, 'rb') as f:
         data = f.read()
-    file_date, file_name = target_file.split('\\')[-1].split('_')[0], target_file.split('\\')[-1].replace(current_timestamp, "")[1:]
-    upload_document_to_sharepoint(data, f'{SHAREPOINT_ROOT_FOLDER}/{file_date}/{file_name}')
\ No newline at end of file
+    file_date, file_name = os.path.basename(target_file).split('_')[0], os.path.basename(target_file).replace(current_timestamp, "")[1:]
+    return data, f'{SHAREPOINT_ROOT_FOLDER}/{file_date}/{file_name}'
+
+if __name__ == '__main__':
+    current_timestamp = datetime.now().strftime("%m-%Y")
+
+    sharepoint_uploader = SharePointUploader()
+    try:
+        sharepoint_uploader.upload_files([
+            get_month_upload(directory, current_timestamp) for directory in [
+                r'C:\Users\adamc\Downloads\RentalScraper\RentalScraperCode\data\cleaned_data', r'C:\Users\adamc\Downloads\RentalScraper\RentalScraperCode\data\raw_data', r'C:\Users\adamc\Downloads\RentalScraper\RentalScraperCode\logs'
+            ]
+        ])
+    finally:
+        sharepoint_uploader.close()
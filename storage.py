@@ -0,0 +1,137 @@
+import os
+import glob
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from constants import (
+    table_columns, TableHeaders
+)
+
+#################################### High Level Comments ###################################
+# Raw and cleaned stages are stored as Parquet, Excel is only written as the final export artifact
+# The raw stage is a dataset directory next to the Excel export e.g. data/raw_data/06-2024_raw_listings.parquet/
+# Checkpoints append only the newly scraped units as a new part file - the cost does not grow with the run
+# Once a city is done its checkpoint parts are replaced by one part holding the city's units in url order
+# Every raw column is stored as a string except Date and the coordinates, so parts written at different times share one schema
+
+NUMERIC_COLUMNS = [TableHeaders.LAT.value, TableHeaders.LON.value]
+
+RAW_SCHEMA = pa.schema([
+    (
+        column,
+        pa.timestamp('us') if column == TableHeaders.DATE.value
+        else pa.float64() if column in NUMERIC_COLUMNS
+        else pa.string()
+    )
+    for column in table_columns
+])
+
+CHECKPOINT_PART_PREFIX = 'checkpoint'
+CITY_PART_PREFIX = 'city'
+
+def get_dataset_path(filepath: str) -> str:
+    """
+    Returns the Parquet path paired with an Excel export path.
+
+    Args:
+        filepath (str): Path of the Excel file e.g. data/raw_data/06-2024_raw_listings.xlsx.
+
+    Returns:
+        str: The same path with a .parquet extension.
+    """
+    return f"{os.path.splitext(filepath)[0]}.parquet"
+
+class RawDataset():
+    """
+    Appendable Parquet dataset holding the raw listings of a run.
+
+    Attributes:
+        dataset_path (str): Directory holding the part files.
+    """
+    def __init__(self, dataset_path: str):
+        self.dataset_path = dataset_path
+
+    def reset(self):
+        # The scrape journal is the source of truth when resuming, so parts from a previous attempt are dropped
+        for part_path in self._part_paths():
+            os.remove(part_path)
+        os.makedirs(self.dataset_path, exist_ok=True)
+
+    def checkpoint(self, units: list[dict]):
+        """
+        Appends newly scraped units as a new part file.
+
+        Args:
+            units (list[dict]): Rental unit data dictionaries scraped since the last checkpoint.
+        """
+        part_index = len(self._part_paths(CHECKPOINT_PART_PREFIX))
+        self._write_part(units, f"{CHECKPOINT_PART_PREFIX}-{part_index:05d}.parquet")
+
+    def commit_city(self, units: list[dict], city_index: int):
+        """
+        Writes every unit of a city in url order and drops the city's checkpoint parts.
+
+        Args:
+            units (list[dict]): Rental unit data dictionaries for the city, in url order.
+            city_index (int): Position of the city's landing page, used to order the parts.
+        """
+        self._write_part(units, f"{CITY_PART_PREFIX}-{city_index:03d}.parquet")
+        for part_path in self._part_paths(CHECKPOINT_PART_PREFIX):
+            os.remove(part_path)
+
+    def read(self) -> pd.DataFrame:
+        """
+        Reads every part of the dataset, completed cities first.
+
+        Returns:
+            pd.DataFrame: A DataFrame containing the raw data.
+        """
+        part_paths = self._part_paths(CITY_PART_PREFIX) + self._part_paths(CHECKPOINT_PART_PREFIX)
+        if not part_paths:
+            return RAW_SCHEMA.empty_table().to_pandas()
+        return pa.concat_tables([pq.read_table(part_path, schema=RAW_SCHEMA) for part_path in part_paths]).to_pandas()
+
+    def _part_paths(self, prefix: str = '') -> list[str]:
+        return sorted(glob.glob(os.path.join(self.dataset_path, f"{prefix}*.parquet")))
+
+    def _write_part(self, units: list[dict], part_name: str):
+        if not units:
+            return
+        units_df = pd.DataFrame(units, columns=table_columns)
+        units_df[TableHeaders.DATE.value] = pd.to_datetime(units_df[TableHeaders.DATE.value], errors='coerce').fillna(pd.Timestamp.now())
+        for column in NUMERIC_COLUMNS:
+            units_df[column] = pd.to_numeric(units_df[column], errors='coerce')
+        units_table = pa.Table.from_pandas(units_df, schema=RAW_SCHEMA, preserve_index=False)
+
+        # Write to a temporary file first so a crash never leaves a truncated part behind
+        part_path = os.path.join(self.dataset_path, part_name)
+        pq.write_table(units_table, f"{part_path}.tmp")
+        os.replace(f"{part_path}.tmp", part_path)
+
+def write_cleaned_data(cleaned_df: pd.DataFrame, cleaned_filepath: str):
+    """
+    Stores the cleaned data as Parquet and exports it to Excel.
+
+    Args:
+        cleaned_df (pd.DataFrame): The cleaned data.
+        cleaned_filepath (str): Path of the Excel export, the Parquet file is written alongside it.
+    """
+    cleaned_df.to_parquet(get_dataset_path(cleaned_filepath), index=False)
+    cleaned_df.to_excel(cleaned_filepath, index=False)
+
+def read_cleaned_data(cleaned_filepath: str) -> pd.DataFrame:
+    """
+    Reads the cleaned data for an Excel path, preferring the Parquet file stored alongside it.
+
+    Args:
+        cleaned_filepath (str): Path of the cleaned Excel file.
+
+    Returns:
+        pd.DataFrame: The cleaned data.
+    """
+    cleaned_dataset_path = get_dataset_path(cleaned_filepath)
+    if os.path.exists(cleaned_dataset_path):
+        return pd.read_parquet(cleaned_dataset_path)
+    # Months cleaned before the Parquet stage only have the Excel file
+    return pd.read_excel(cleaned_filepath)
@@ -0,0 +1,149 @@
+from bs4 import BeautifulSoup
+from constants import TableHeaders
+from utils import (
+    match_address, 
+    match_pets,
+    match_bed,
+    match_bath,
+    match_price,
+    match_sqft
+)
+
+import re
+
+#################################### High Level Comments ###################################
+# The original find / find_all based DataExtractor, copied unchanged from the first commit of scraper.py
+# Kept as the reference the single walk DataExtractor is checked against in test_extractor_equivalence.py
+# The original only ever parsed pages with html.parser
+
+class DataExtractor():
+    @staticmethod
+    def extract_building_details(soup: BeautifulSoup) -> tuple:
+        """
+        Extracts building details from the listing page.
+
+        Args:
+            soup (BeautifulSoup): The BeautifulSoup object to extract data from.
+
+        Returns:
+            tuple: A tuple containing building details.
+        """
+        building_title = soup.find('h1', class_=lambda cls: cls and 'FullDetail_street_' in cls)
+        building_title_text = re.split(r'[^\w ]+',  building_title.get_text())[0] if building_title else ""
+
+        neighborhood_title_sep = soup.find('span', class_=lambda cls: cls and 'FullDetail_cityStateDivider_' in cls)
+        neighborhood_title = neighborhood_title_sep.find_next_sibling('a', class_=lambda cls: cls and 'FullDetail_cityStateLink_' in cls)
+        neighborhood_title_text = re.split(r'[^\w ]+',  neighborhood_title.get_text())[0] if neighborhood_title else ""
+
+        details = soup.find('div', class_=lambda cls: cls and 'SummaryTable_summaryTable_' in cls)
+
+        [price_text, bed_text, bath_text, sqft_text, address_text, pets_text] = DataExtractor.extract_summary_table(details)
+
+        # Find the latitude meta tag
+        latitude_tag = soup.find('meta', {'name': 'place:location:latitude'})
+        lat_text = latitude_tag['content'] if latitude_tag else ""
+
+        # Find the longitude meta tag
+        longitude_tag = soup.find('meta', {'name': 'place:location:longitude'})
+        lon_text = longitude_tag['content'] if longitude_tag else ""
+
+        # Find the city meta tag
+        city_tag = soup.find('meta', {'name': 'place:locality'})
+        city_text = city_tag['content'] if city_tag else ""
+
+        return (building_title_text, neighborhood_title_text, price_text, bed_text, bath_text, sqft_text, address_text, pets_text, lat_text, lon_text, city_text)
+
+    @staticmethod
+    def extract_summary_table(soup: BeautifulSoup) -> list:
+        """
+        Extracts summary table details from the listing page.
+
+        Args:
+            soup (BeautifulSoup): The BeautifulSoup object containing the summary table.
+
+        Returns:
+            list: A list of extracted details.
+        """
+        extracted_text = []
+        for matching_function in [match_price, match_bed, match_bath, match_sqft, match_address, match_pets]:
+            detail_header = soup.find(matching_function)
+            parent_detail_li = detail_header.find_parent('li') if detail_header else None
+            detail_div = parent_detail_li.find('div') if parent_detail_li else None
+            detail_text = detail_div.get_text().strip() if detail_div else ""
+            extracted_text.append(detail_text)
+        return extracted_text
+
+    @staticmethod
+    def extract_amenities(soup: BeautifulSoup) -> tuple:
+        """
+        Extracts text of unit and building amenities.
+
+        Args:
+            soup (BeautifulSoup): The BeautifulSoup object to extract data from.
+
+        Returns:
+            tuple: A tuple containing text of unit amenities and building amenities.
+        """
+        amenities = soup.find_all('div', class_=lambda value: value and 'Amenities_header_' in value)
+        unit_amenities, building_amenities = [], []
+        try:
+            unit_amenities_header = amenities[0] if len(amenities) == 2 and "apartment" in amenities[0].get_text().lower() else ""
+            building_amenities_header = amenities[1] if len(amenities) == 2 and "building" in amenities[1].get_text().lower() else ""
+            unit_amenities_container = unit_amenities_header.find_parent('div') if unit_amenities_header else ""
+            building_amenities_container = building_amenities_header.find_parent('div') if building_amenities_header else ""
+            unit_amenities = unit_amenities_container.find_all('div', class_=lambda cls: cls and 'Amenities_text_' in cls) if unit_amenities_container else []
+            building_amenities = building_amenities_container.find_all('div', class_=lambda cls: cls and 'Amenities_text_' in cls) if building_amenities_container else []
+        except Exception as e:
+            print("Error - Getting amenities: ", e)
+            
+        unit_amenities_text = ", ".join([amenity.get_text() for amenity in unit_amenities])  
+        building_amenities_text = ", ".join([amenity.get_text() for amenity in building_amenities])  
+
+        return (unit_amenities_text, building_amenities_text)
+
+    @staticmethod
+    def extract_rental_unit_details(soup: BeautifulSoup) -> list:
+        """
+        Extracts rental unit details from the listing page.
+
+        Args:
+            soup (BeautifulSoup): The BeautifulSoup object to extract data from.
+
+        Returns:
+            list: A list of dictionaries, each containing data for a rental unit.
+        """
+        all_units_data = []
+
+        # Find all divs where class contains 'Floorplan_floorplan'
+        floorplans = soup.find_all('div', class_=lambda cls: cls and 'Floorplan_floorplansContainer_' in cls)
+        for floorplan in floorplans:
+            current_floorplan = floorplan.find('div', class_=lambda cls: cls and 'Floorplan_title_' in cls)
+            floorplan_title_text = current_floorplan.get_text().strip() if current_floorplan else ""
+            
+            unit_containers = floorplan.find_all('div', class_=lambda cls: cls and 'Floorplan_floorplanDetailContainer_' in cls)
+            for unit_container in unit_containers:
+                unit_title = unit_container.find('div', class_=lambda cls: cls and 'Floorplan_floorplanTitle' in cls)
+                unit_price = unit_container.find('div', class_=lambda cls: cls and 'Floorplan_floorplanPrice' in cls)
+                unit_sqft = unit_container.find('div', class_=lambda cls: cls and 'Floorplan_sqft' in cls).find('span')
+                unit_bath = unit_container.find('div', class_=lambda cls: cls and 'Floorplan_bath' in cls).find('span')
+                
+                unit_title_text = unit_title.get_text().strip() if unit_title else ""
+                unit_price_text = unit_price.get_text().strip() if unit_price else ""
+                
+                unit_sqft_text = unit_sqft.get_text().strip() if unit_sqft else ""
+                unit_sqft_text = unit_sqft_text if len(re.sub(r'[^\w]', '', unit_sqft_text)) >= 1 else ""
+                
+                unit_bath_text = unit_bath.get_text().strip() if unit_bath else ""
+                unit_bath_text = unit_bath_text if len(unit_bath_text) >= 3 else ""
+                
+                unit_data = {
+                    TableHeaders.LISTING.value: unit_title_text,
+                    TableHeaders.BED.value: floorplan_title_text,
+                    TableHeaders.BATH.value: unit_bath_text,
+                    TableHeaders.SQFT.value: unit_sqft_text,
+                    TableHeaders.PRICE.value: unit_price_text,
+                }
+
+                all_units_data.append(unit_data)
+        
+        return all_units_data
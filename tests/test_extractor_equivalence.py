@@ -0,0 +1,87 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import baseline_extractor
+from scraper import DataExtractor, PARSER_BACKEND, extract_listing_units
+
+#################################### High Level Comments ###################################
+# Checks the single walk DataExtractor (lxml by default) returns exactly what the original
+#   find / find_all DataExtractor returned when it parsed the same page with html.parser
+# Listing pages are saved under fixtures/listing_pages: a multi unit building, a single unit listing,
+#   a page without a summary table or neighbourhood divider and a multi unit page with a unit missing its sqft element
+# Behaviour change: the original raised AttributeError on a page without a summary table or neighbourhood divider,
+#   the current extractor returns '' for those fields and still extracts the rest of the page
+# Kept: a unit container without its sqft / bath element fails the page (ValueError) as the original did (AttributeError),
+#   so a browser page is fetched again and a server-rendered page falls back to the browser
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'fixtures', 'listing_pages')
+COMPLETE_PAGES = ['multi_unit.html', 'single_unit.html']
+
+def read_page(filename: str) -> bytes:
+    with open(os.path.join(FIXTURES_DIR, filename), 'rb') as page_file:
+        return page_file.read()
+
+def parse_pages(filename: str) -> tuple:
+    # Baseline soup with html.parser, current soup with the configured backend and its page index
+    page = read_page(filename)
+    baseline_soup = DataExtractor.parse_html(page, 'html.parser')
+    soup = DataExtractor.parse_html(page, PARSER_BACKEND)
+    return baseline_soup, soup, DataExtractor.index_page(soup)
+
+@pytest.mark.parametrize('filename', COMPLETE_PAGES)
+def test_building_details_match_baseline(filename):
+    baseline_soup, soup, page_index = parse_pages(filename)
+    expected = baseline_extractor.DataExtractor.extract_building_details(baseline_soup)
+    assert DataExtractor.extract_building_details(soup, page_index) == expected
+    assert DataExtractor.extract_building_details(soup) == expected
+
+@pytest.mark.parametrize('filename', COMPLETE_PAGES + ['missing_summary_table.html'])
+def test_amenities_match_baseline(filename):
+    baseline_soup, soup, page_index = parse_pages(filename)
+    expected = baseline_extractor.DataExtractor.extract_amenities(baseline_soup)
+    assert DataExtractor.extract_amenities(soup, page_index) == expected
+    assert DataExtractor.extract_amenities(soup) == expected
+
+@pytest.mark.parametrize('filename', COMPLETE_PAGES + ['missing_summary_table.html'])
+def test_rental_unit_details_match_baseline(filename):
+    baseline_soup, soup, page_index = parse_pages(filename)
+    expected = baseline_extractor.DataExtractor.extract_rental_unit_details(baseline_soup)
+    assert DataExtractor.extract_rental_unit_details(soup, page_index) == expected
+    assert DataExtractor.extract_rental_unit_details(soup) == expected
+
+def test_fixtures_cover_each_page_shape():
+    # Guards against a fixture edit silently turning a case into an empty comparison
+    _, multi_unit_soup, multi_unit_index = parse_pages('multi_unit.html')
+    _, single_unit_soup, single_unit_index = parse_pages('single_unit.html')
+    assert len(DataExtractor.extract_rental_unit_details(multi_unit_soup, multi_unit_index)) == 5
+    assert DataExtractor.extract_rental_unit_details(single_unit_soup, single_unit_index) == []
+    assert all(DataExtractor.extract_building_details(single_unit_soup, single_unit_index))
+
+def test_missing_summary_table_returns_empty_fields():
+    baseline_soup, soup, page_index = parse_pages('missing_summary_table.html')
+
+    # The original raised on the missing neighbourhood divider / summary table
+    with pytest.raises(AttributeError):
+        baseline_extractor.DataExtractor.extract_building_details(baseline_soup)
+
+    building_title_text, neighborhood_title_text, price_text, bed_text, bath_text, sqft_text, address_text, pets_text, lat_text, lon_text, city_text = DataExtractor.extract_building_details(soup, page_index)
+    assert building_title_text == '2200 Lakeshore Blvd W'
+    assert (neighborhood_title_text, price_text, bed_text, bath_text, sqft_text, address_text, pets_text, city_text) == ('',) * 8
+    assert (lat_text, lon_text) == ('43.6225213', '-79.4821755')
+    assert DataExtractor.has_listing_content(page_index) is False
+
+def test_missing_unit_sqft_fails_page_like_baseline():
+    baseline_soup, soup, page_index = parse_pages('missing_unit_sqft.html')
+
+    with pytest.raises(AttributeError):
+        baseline_extractor.DataExtractor.extract_rental_unit_details(baseline_soup)
+    with pytest.raises(ValueError):
+        DataExtractor.extract_rental_unit_details(soup, page_index)
+
+    page = read_page('missing_unit_sqft.html')
+    with pytest.raises(ValueError):
+        extract_listing_units(page, False, 'https://www.padmapper.com/buildings/p1')
+    assert extract_listing_units(page, False, 'https://www.padmapper.com/buildings/p1', from_http=True) is None
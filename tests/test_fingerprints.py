@@ -0,0 +1,32 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from constants import TableHeaders
+from fingerprints import FingerprintCache, get_tile_fingerprint
+
+#################################### High Level Comments ###################################
+# Checks a listing keeps its fingerprint whether its tile was harvested while scrolling or built from a search API listable
+# Checks an unchanged listing is carried forward over the next two monthly runs and revisited on the third
+
+URL = 'https://www.padmapper.com/buildings/p1'
+HARVESTED_TILE = {'floorplans': '3 Floorplans', 'price': '$2,150 - $3,480'}
+API_LISTABLE_TILE = {'floorplans': '3 Floorplans', 'price': '2150 - 3480'}
+RUN_INTERVAL_DAYS = 31
+
+def test_harvested_and_api_tiles_share_fingerprint():
+    assert get_tile_fingerprint(HARVESTED_TILE) == get_tile_fingerprint(API_LISTABLE_TILE)
+    assert get_tile_fingerprint({'floorplans': '3 Floorplans', 'price': '$2,150'}) == get_tile_fingerprint({'floorplans': '3 Floorplans', 'price': '2150 - '})
+    assert get_tile_fingerprint(HARVESTED_TILE) != get_tile_fingerprint({'floorplans': '3 Floorplans', 'price': '$2,150 - $3,500'})
+    assert get_tile_fingerprint(HARVESTED_TILE) != get_tile_fingerprint({'floorplans': '4 Floorplans', 'price': '$2,150 - $3,480'})
+
+def test_unchanged_listing_carried_forward_for_two_runs(tmp_path):
+    fingerprint_cache = FingerprintCache(str(tmp_path / 'tile_fingerprints.json'))
+    fingerprint_cache.update(URL, HARVESTED_TILE, [{TableHeaders.URL.value: URL}])
+
+    for runs_since_scrape, carried_forward in [(1, True), (2, True), (3, False)]:
+        scraped_at = datetime.now() - timedelta(days=RUN_INTERVAL_DAYS * runs_since_scrape)
+        fingerprint_cache.entries[URL]['scraped_at'] = scraped_at.isoformat()
+        assert (fingerprint_cache.get_unchanged_units(URL, API_LISTABLE_TILE) is not None) == carried_forward
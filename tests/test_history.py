@@ -0,0 +1,37 @@
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from constants import TableHeaders
+from history import ListingHistory, PARTITION_COLUMN
+
+#################################### High Level Comments ###################################
+# Checks writing a month again replaces every city's partition of that month,
+#   including cities missing from the new data, and leaves other months alone
+
+def cleaned_listings(cities: list[str], date: str) -> pd.DataFrame:
+    return pd.DataFrame({
+        TableHeaders.BUILDING.value: [f"{city} Tower" for city in cities],
+        TableHeaders.ADDRESS.value: [f"{index + 1} Main St, {city}" for index, city in enumerate(cities)],
+        TableHeaders.CITY.value: cities,
+        TableHeaders.DATE.value: date,
+        TableHeaders.URL.value: [f"https://www.padmapper.com/buildings/{city.lower()}" for city in cities],
+        TableHeaders.PRICE.value: 2000.0,
+        TableHeaders.LAT.value: [43.0 + index for index in range(len(cities))],
+        TableHeaders.LON.value: -79.0,
+    })
+
+def test_rewriting_month_removes_cities_missing_from_new_data(tmp_path):
+    listing_history = ListingHistory(str(tmp_path))
+    listing_history.append(cleaned_listings(['Toronto', 'Ottawa'], 'May 2024'))
+    listing_history.append(cleaned_listings(['Toronto', 'Ottawa'], 'Jun 2024'))
+
+    listing_history.append(cleaned_listings(['Toronto'], 'Jun 2024'))
+
+    assert not os.path.exists(tmp_path / 'City=Ottawa' / 'Month=2024-06')
+    assert os.path.exists(tmp_path / 'City=Ottawa' / 'Month=2024-05')
+    assert sorted(listing_history.read(months=['2024-06'])[TableHeaders.CITY.value]) == ['Toronto']
+    assert sorted(listing_history.read(months=['2024-05'])[TableHeaders.CITY.value]) == ['Ottawa', 'Toronto']
+    assert all(os.path.exists(tmp_path / partition) for partition in listing_history._read_index()[PARTITION_COLUMN])
@@ -0,0 +1,31 @@
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from page_archive import PageArchive
+
+#################################### High Level Comments ###################################
+# Checks workers draining one run write separate indexes and reading the run merges them with the run's own index,
+#   keeping the latest scrape of a url
+
+RUN_NAME = '06-2024_raw_listings'
+
+def test_worker_indexes_are_merged_on_read(tmp_path):
+    worker_archives = [PageArchive(str(tmp_path), RUN_NAME, worker_id=f"host-{pid}") for pid in (101, 102)]
+    for position, worker_archive in enumerate(worker_archives):
+        worker_archive.add_page(f"https://www.padmapper.com/buildings/p{position}", f"<html>{position}</html>", False, True, 0, position)
+    assert len({worker_archive.index_filepath for worker_archive in worker_archives}) == 2
+
+    # A later scrape of the first url, e.g. a resumed single process run
+    run_archive = PageArchive(str(tmp_path), RUN_NAME)
+    run_archive.add_page('https://www.padmapper.com/buildings/p0', '<html>retry</html>', False, True, 0, 0)
+    for page_archive in worker_archives + [run_archive]:
+        page_archive.close()
+    with open(worker_archives[0].index_filepath, 'a', encoding='utf-8') as index_file:
+        index_file.write(json.dumps({'url': 'https://www.padmapper.com/buildings/p0', 'scraped_at': '2000-01-01T00:00:00'}) + '\n')
+
+    entries = PageArchive(str(tmp_path), RUN_NAME).read_index()
+    assert [entry['url'] for entry in entries] == ['https://www.padmapper.com/buildings/p0', 'https://www.padmapper.com/buildings/p1']
+    assert [run_archive.read_page(entry) for entry in entries] == ['<html>retry</html>', '<html>1</html>']
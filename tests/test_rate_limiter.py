@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from rate_limiter import RateLimiter, RequestOutcome, RATE_DECREASE_FACTOR
+
+#################################### High Level Comments ###################################
+# Checks callers queued behind a block cooldown leave it spaced at the reduced rate instead of as one burst
+
+URL = 'https://www.padmapper.com/buildings/p1'
+INITIAL_RATE = 20.0
+COOLDOWN = 0.3
+CALLER_COUNT = 5
+# Scheduling jitter allowed on each measured interval
+TOLERANCE = 0.03
+
+def acquire_times_after_block(caller_count: int) -> tuple:
+    # Blocks the host with a 429, then lets caller_count threads queue for a token during the cooldown
+    rate_limiter = RateLimiter(initial_rate=INITIAL_RATE, burst_size=2)
+    rate_limiter.acquire(URL)
+    blocked_at = time.monotonic()
+    rate_limiter.record(URL, RequestOutcome.BLOCKED, retry_after=COOLDOWN)
+
+    acquired_at = []
+    acquired_at_lock = threading.Lock()
+
+    def caller():
+        rate_limiter.acquire(URL)
+        with acquired_at_lock:
+            acquired_at.append(time.monotonic())
+
+    callers = [threading.Thread(target=caller) for _ in range(caller_count)]
+    for thread in callers:
+        thread.start()
+    for thread in callers:
+        thread.join()
+    return blocked_at, sorted(acquired_at), rate_limiter
+
+def test_no_request_during_cooldown():
+    blocked_at, acquired_at, _ = acquire_times_after_block(CALLER_COUNT)
+    assert acquired_at[0] - blocked_at >= COOLDOWN - TOLERANCE
+
+def test_callers_leave_cooldown_spaced_at_reduced_rate():
+    _, acquired_at, rate_limiter = acquire_times_after_block(CALLER_COUNT)
+    reduced_rate = INITIAL_RATE * RATE_DECREASE_FACTOR
+    assert rate_limiter.get_rates()['www.padmapper.com'] == reduced_rate
+
+    intervals = [later - earlier for earlier, later in zip(acquired_at, acquired_at[1:])]
+    assert all(interval >= 1 / reduced_rate - TOLERANCE for interval in intervals), intervals
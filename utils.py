@@ -1,15 +1,61 @@
 # Import necessary libraries
-from fake_useragent import UserAgent
-import random
+import os
+import json
 import time
+import random
+import threading
 
-def get_headers(base_url):
-    # Create a UserAgent object to generate random user agent strings
-    user_agent = UserAgent().random
+# Windows Chrome user agents are sampled once into a pool cached on disk, instead of constructing UserAgent() in a loop
+# fake_useragent is only imported when the pool is (re)built, i.e. the cache is missing or older than USER_AGENT_CACHE_TTL_DAYS
+USER_AGENT_CACHE_FILEPATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data', 'user_agents.json')
+USER_AGENT_CACHE_TTL_DAYS = 30
+USER_AGENT_SAMPLE_SIZE = 200
+
+_user_agent_pool = []
+_user_agent_pool_lock = threading.Lock()
+
+def build_user_agent_pool():
+    # Samples fake_useragent's chrome user agents and keeps the distinct Windows ones
+    from fake_useragent import UserAgent
+    user_agent_generator = UserAgent()
+    user_agents = {user_agent_generator.chrome for _ in range(USER_AGENT_SAMPLE_SIZE)}
+    user_agent_pool = sorted(user_agent for user_agent in user_agents if 'windows' in user_agent.lower() and 'chrome' in user_agent.lower())
 
-    # Loop to ensure the user agent is for Windows Chrome
-    while not ('windows' in user_agent.lower() and 'chrome' in user_agent.lower()):
-        user_agent = UserAgent().random
+    # Same filter as the pool, as a fallback in case the sample held no Windows Chrome user agent
+    while not user_agent_pool:
+        user_agent = user_agent_generator.random
+        if 'windows' in user_agent.lower() and 'chrome' in user_agent.lower():
+            user_agent_pool.append(user_agent)
+    return user_agent_pool
+
+def get_user_agent_pool():
+    # Returns the Windows Chrome user agent pool, loading it from the disk cache or building it on first use
+    global _user_agent_pool
+    with _user_agent_pool_lock:
+        if _user_agent_pool:
+            return _user_agent_pool
+        try:
+            if time.time() - os.path.getmtime(USER_AGENT_CACHE_FILEPATH) < USER_AGENT_CACHE_TTL_DAYS * 86400:
+                with open(USER_AGENT_CACHE_FILEPATH) as cache_file:
+                    _user_agent_pool = json.load(cache_file)
+        except (OSError, ValueError):
+            # Missing or corrupt cache, rebuild it below
+            _user_agent_pool = []
+        if not _user_agent_pool:
+            _user_agent_pool = build_user_agent_pool()
+            os.makedirs(os.path.dirname(USER_AGENT_CACHE_FILEPATH), exist_ok=True)
+            temporary_filepath = f"{USER_AGENT_CACHE_FILEPATH}.tmp"
+            with open(temporary_filepath, 'w') as cache_file:
+                json.dump(_user_agent_pool, cache_file, indent=1)
+            os.replace(temporary_filepath, USER_AGENT_CACHE_FILEPATH)
+        return _user_agent_pool
+
+def get_random_user_agent():
+    # Picks a random Windows Chrome user agent string from the cached pool
+    return random.choice(get_user_agent_pool())
+
+def get_headers(base_url):
+    user_agent = get_random_user_agent()
 
     # Set the headers to mimic a browser request from Chrome on Windows
     headers = {
@@ -28,10 +74,6 @@ def get_headers(base_url):
     }
     return headers
 
-def generate_time_gap(min=2, max=4):
-    # Generates a random time delay to simulate human browsing and avoid server overload or detection
-    time.sleep(random.uniform(min, max))
-
 def get_absolute_url(base_url, href):
     # Constructs an absolute URL from a base URL and a relative URL (href)
     return href if href.startswith('http') else f'{base_url}{href}'
@@ -44,6 +86,9 @@ def make_matcher(tag_name, text):
             tag_name in element.name and 
             text.lower() in element.get_text().lower().strip()
         )
+    # Expose the match criteria so callers can test many matchers against one tag's text in a single pass
+    match_tag.tag_name = tag_name
+    match_tag.text = text.lower()
     return match_tag
 
 # Using make_matcher to create specific tag matchers